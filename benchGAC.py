@@ -0,0 +1,433 @@
+# MIT License
+#
+# Copyright (c) 2025 Cronomantic
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+# Benchmarks of the decoder, the interpreter and the pygame renderer.
+#
+# The inputs are synthetic adventures from enGAC, so every run measures the
+# same work. Each benchmark is timed several times and summarised; the
+# results can be saved as JSON and compared with those of another commit.
+
+import sys
+import os
+import argparse
+import gettext
+import json
+import time
+import platform
+import statistics
+import subprocess
+import tempfile
+import fnmatch
+
+import deGAC
+from deGAC import GacImage, load_file, peek2, MESSAGES_ADDR
+from enGAC import GAC_Encoder, encode_database, synthetic_database
+from runGAC import GAC_Interpreter, IoHeadlessGAC
+
+WIDTH = 32
+MIN_RUN_TIME = 0.05  # Seconds of each timed run, to calibrate the loops
+
+# Game sizes: rooms, messages, condition blocks
+SMALL = (10, 40, 20)
+LARGE = (60, 200, 60)
+
+# Registered benchmarks: name -> setup function returning the timed callable
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def file_path(string):
+    """_summary_
+
+    Args:
+        string (_type_): _description_
+
+    Raises:
+        FileNotFoundError: _description_
+
+    Returns:
+        _type_: _description_
+    """
+    if os.path.isfile(string):
+        return string
+    else:
+        raise FileNotFoundError(string)
+
+
+def new_interpreter(ddb, lines=[]):
+    io = IoHeadlessGAC(WIDTH, lines)
+    interpreter = GAC_Interpreter(ddb, io, seed=0)
+    if not interpreter.start_adventure(validated=True):
+        raise ValueError("Invalid Database")
+    return interpreter, io
+
+
+# Decoder
+
+
+def encoded_game(size):
+    return GAC_Encoder(synthetic_database(*size)).encode()
+
+
+@benchmark("decode/file")
+def bench_decode_file():
+    # End to end: snapshot file to database dictionary
+    fd, path = tempfile.mkstemp(suffix=".sna")
+    with os.fdopen(fd, "wb") as f:
+        f.write(encode_database(synthetic_database(*LARGE)))
+
+    def run():
+        GacImage(load_file(path)).database()
+
+    return run, lambda: os.remove(path)
+
+
+def section_benchmark(section, getter):
+    @benchmark(f"decode/{section}")
+    def setup():
+        sysram = encoded_game(LARGE)
+        return lambda: getter(sysram), None
+
+
+for section, getter in [
+    ("font", deGAC.get_font),
+    ("verbs", deGAC.get_verbs),
+    ("nouns", deGAC.get_nouns),
+    ("adverbs", deGAC.get_adverbs),
+    ("messages", deGAC.get_messages),
+    ("objects", deGAC.get_objects),
+    ("rooms", deGAC.get_rooms),
+    ("graphics", deGAC.get_graphics),
+    ("hpcs", deGAC.get_hpcs),
+    ("lpcs", deGAC.get_lpcs),
+    ("lcs", deGAC.get_lcs),
+]:
+    section_benchmark(section, getter)
+
+
+@benchmark("decode/find_token")
+def bench_find_token():
+    # The table is walked from the start, so the last tokens cost the most
+    sysram = encoded_game(LARGE)
+    tokens = range(0, 400, 7)
+
+    def run():
+        for n in tokens:
+            deGAC.find_token(sysram, n)
+
+    return run, None
+
+
+@benchmark("decode/get_message_len")
+def bench_get_message_len():
+    sysram = encoded_game(LARGE)
+    messages = []
+    addr = peek2(sysram, MESSAGES_ADDR)
+    while sysram[addr] != 0:
+        messages.append((addr + 2, sysram[addr + 1]))
+        addr += sysram[addr + 1] + 2
+
+    def run():
+        for addr, length in messages:
+            deGAC.get_message_len(sysram, addr, length)
+
+    return run, None
+
+
+# Interpreter
+
+
+def parse_benchmark(size):
+    @benchmark(f"interpreter/parse_input/{size}")
+    def setup():
+        ddb = synthetic_database(*SMALL)
+        # The last words, the slowest to find before the word indexes
+        ddb["verbs"] = {f"VERB{n}": n % 250 + 1 for n in range(size)}
+        ddb["nouns"] = {f"NOUN{n}": n % 250 + 1 for n in range(size)}
+        interpreter, io = new_interpreter(ddb)
+        parse = interpreter._GAC_Interpreter__parse_input
+        inputs = [
+            f"VERB{size - 1} NOUN{size - 1}",
+            f"verb{size // 2} the noun{size // 2} slowly",
+            "unknown words only",
+        ]
+
+        def run():
+            # Without the recent inputs every statement is tokenized again
+            interpreter.recent_inputs.clear()
+            for txt in inputs:
+                parse(txt)
+
+        return run, None
+
+
+for size in (10, 100, 1000):
+    parse_benchmark(size)
+
+
+def hpcs_heavy_database(blocks):
+    # Blocks that always run, mixing counter arithmetic and flag tests
+    ddb = synthetic_database(*SMALL)
+    hpcs = []
+    for n in range(blocks):
+        c = n % 100 + 1
+        f = n % 200 + 10
+        hpcs += [
+            ["PUSH", c],
+            ["CTR"],
+            ["PUSH", 1],
+            ["+"],
+            ["PUSH", c],
+            ["CSET"],
+            ["PUSH", f],
+            ["SET?"],
+            ["IF"],
+            ["PUSH", f],
+            ["RESE"],
+            ["END"],
+            ["PUSH", f],
+            ["RES?"],
+            ["IF"],
+            ["PUSH", f],
+            ["SET"],
+            ["END"],
+        ]
+    ddb["hpcs"] = hpcs
+    return ddb
+
+
+@benchmark("interpreter/hpcs")
+def bench_hpcs():
+    interpreter, io = new_interpreter(hpcs_heavy_database(200))
+    perform = interpreter._GAC_Interpreter__perfom_conditions
+    return lambda: perform(interpreter.hpcs, False), None
+
+
+@benchmark("interpreter/playthrough")
+def bench_playthrough():
+    ddb = synthetic_database(*LARGE)
+    ddb["hpcs"] = hpcs_heavy_database(20)["hpcs"]
+    words = sorted(ddb["verbs"])
+    nouns = sorted(ddb["nouns"])
+    lines = []
+    for n in range(1000):
+        if n % 3 == 0:
+            lines.append("NORTH" if n % 2 == 0 else "SOUTH")
+        else:
+            lines.append(f"{words[n % len(words)]} {nouns[n % len(nouns)]}")
+
+    def run():
+        interpreter, io = new_interpreter(ddb, lines)
+        interpreter.run()
+
+    return run, None
+
+
+# Renderer
+
+
+@benchmark("pygame/on_draw")
+def bench_on_draw():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    try:
+        from runGAC_pygame import GAC_interface_Pygame
+    except ImportError:
+        return None, None
+    io = GAC_interface_Pygame()
+    io.font = synthetic_database(*SMALL)["font"]
+    io.print_txt("The quick brown fox jumps over the lazy dog. " * 15)
+    io.flash = True
+    return io.on_draw, None
+
+
+def calibrate(func):
+    # Number of calls that take at least MIN_RUN_TIME
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for n in range(number):
+            func()
+        if time.perf_counter() - start >= MIN_RUN_TIME:
+            return number
+        number *= 2
+
+
+def measure(func, repeat):
+    number = calibrate(func)
+    times = []
+    for n in range(repeat):
+        start = time.perf_counter()
+        for m in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    quartiles = statistics.quantiles(times, n=4) if repeat > 1 else times * 3
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "stdev": statistics.stdev(times) if repeat > 1 else 0.0,
+        "iqr": quartiles[2] - quartiles[0],
+        "times": times,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(patterns, repeat):
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if patterns and not any(fnmatch.fnmatch(name, p) for p in patterns):
+            continue
+        func, cleanup = setup()
+        if func is None:
+            print(f"{name:34} skipped")
+            continue
+        try:
+            result = measure(func, repeat)
+        finally:
+            if cleanup:
+                cleanup()
+        results[name] = result
+        print(
+            f"{name:34} {result['median'] * 1e3:10.4f} ms "
+            f"+- {result['stdev'] * 1e3:.4f} (min {result['min'] * 1e3:.4f}, "
+            f"{repeat}x{result['number']})"
+        )
+    return results
+
+
+def compare(results, baseline):
+    # Ratios of the medians: above 1 is slower than the baseline
+    for name, result in results.items():
+        old = baseline["benchmarks"].get(name)
+        if old is None:
+            continue
+        ratio = result["median"] / old["median"]
+        # Differences within the spread of both runs are noise
+        noise = (result["iqr"] + old["iqr"]) / old["median"]
+        mark = "" if abs(ratio - 1) <= noise else (" slower" if ratio > 1 else " faster")
+        print(f"{name:34} {ratio:8.3f}x{mark}")
+
+
+def main():
+    if sys.version_info[0] < 3:  # Python 2
+        sys.exit(_("ERROR: Invalid python version"))
+
+    version = "1.0.0"
+    program = "GAC benchmarks " + version
+    exec = "benchGAC"
+
+    gettext.bindtextdomain(
+        exec, os.path.join(os.path.abspath(os.path.dirname(__file__)), "locale")
+    )
+    gettext.textdomain(exec)
+    _ = gettext.gettext
+
+    arg_parser = argparse.ArgumentParser(sys.argv[0], description=program)
+    arg_parser.add_argument(
+        "patterns",
+        nargs="*",
+        metavar=_("PATTERN"),
+        help=_("run only the benchmarks matching these patterns"),
+    )
+    arg_parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=7,
+        help=_("timed runs of each benchmark"),
+    )
+    arg_parser.add_argument(
+        "-o",
+        "--output",
+        metavar=_("OUTPUT_FILE"),
+        help=_("write the results as JSON"),
+    )
+    arg_parser.add_argument(
+        "--compare",
+        type=file_path,
+        metavar=_("BASELINE_FILE"),
+        help=_("compare with the JSON results of a previous run"),
+    )
+    arg_parser.add_argument(
+        "--list",
+        action="store_true",
+        help=_("list the benchmarks"),
+    )
+
+    try:
+        args = arg_parser.parse_args()
+    except FileNotFoundError as f1:
+        sys.exit(_("ERROR: File not found:") + f"{f1}")
+
+    if args.list:
+        for name in BENCHMARKS:
+            print(name)
+        return
+
+    results = run_benchmarks(args.patterns, max(1, args.repeat))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "revision": git_revision(),
+                    "python": platform.python_version(),
+                    "implementation": platform.python_implementation(),
+                    "machine": platform.machine(),
+                    "time": time.time(),
+                    "benchmarks": results,
+                },
+                f,
+                indent=1,
+            )
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        compare(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
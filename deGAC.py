@@ -26,8 +26,23 @@ import os
 import argparse
 import gettext
 import json
+import gzip
+import re
+import struct
+from functools import cached_property, wraps
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    zstd = None
 
 SEEKPOS = 0x1C1B  # Number of bytes to skip in the file
+SNA_HEADER = 27  # Registers stored before the memory in .sna files
+SNA48_SIZE = 49179
+SNA128_SIZE = 131103
+SNA128_TRDOS_SIZE = 147487  # 128K snapshot with TR-DOS paged in
+Z80_HEADER = 30  # Version 1 header of .z80 files
+Z80_V2_EXTRA = 23  # Extra header length of version 2 .z80 files
 MEM_BASE = 0x5C00  # First address loaded
 MEM_SIZE = 0xA400  # Number of bytes to load from it
 
@@ -48,6 +63,27 @@ DBASE_ADDR = 0xA1E5  # Start of database
 MINRAM = 0x4000  # Minimum RAM address
 MAXRAM = 0xFFFF  # Maximum RAM address
 
+WRITE_CHUNK = 0x10000  # Bytes of JSON text buffered before each write
+
+# Iterations allowed to the decoding of each section: records, instructions,
+# exits, tokens walked and characters. A database fits in about 24K, so real
+# games need far fewer; corrupted ones fail fast instead of looping.
+TEXT_BUDGET = 1 << 18
+TABLE_BUDGET = 1 << 16
+SECTION_BUDGETS = {
+    "font": TABLE_BUDGET,
+    "verbs": TEXT_BUDGET,
+    "nouns": TEXT_BUDGET,
+    "adverbs": TEXT_BUDGET,
+    "messages": TEXT_BUDGET,
+    "objects": TEXT_BUDGET,
+    "rooms": TEXT_BUDGET,
+    "graphics": TABLE_BUDGET,
+    "hpcs": TABLE_BUDGET,
+    "lpcs": TABLE_BUDGET,
+    "lcs": TABLE_BUDGET,
+}
+
 
 def dir_path(string):
     """_summary_
@@ -103,18 +139,159 @@ def valid_path(string):
         raise NotADirectoryError(string)
 
 
-def load_file(file_path):
-    file_array = []
-    with open(file_path, "rb") as file:
-        file.seek(SEEKPOS)
-        file_array = file.read()
+def load_sna(file):
+    # 48K and 128K snapshots start with the 48K of memory currently paged
+    # in. The other 128K banks come after it and are not needed.
+    size = os.fstat(file.fileno()).st_size
+    if size not in (SNA48_SIZE, SNA128_SIZE, SNA128_TRDOS_SIZE):
+        raise ValueError("Invalid file size")
+    file.seek(SNA_HEADER)
+    ram = bytearray(MINRAM)
+    ram += file.read(0x10000 - MINRAM)
+    return ram
+
+
+def z80_decompress(data, size, end_marker=False):
+    # ED ED nn bb is a run of nn bytes bb, everything else is copied as is
+    out = bytearray()
+    pos = 0
+    while len(out) < size:
+        n = data.find(b"\xed\xed", pos)
+        if n < 0 or n + 3 >= len(data):
+            out += data[pos:]
+            break
+        out += data[pos:n]
+        count = data[n + 2]
+        if count == 0 and end_marker:
+            break  # 00 ED ED 00 ends version 1 snapshots
+        out += bytes((data[n + 3],)) * count
+        pos = n + 4
+    if len(out) < size:
+        raise ValueError("Truncated z80 memory block")
+    return out[0:size]
+
+
+def load_z80(file):
+    header = file.read(Z80_HEADER)
+    if len(header) != Z80_HEADER:
+        raise ValueError("Invalid file size")
+    flags = header[12]
+    if flags == 0xFF:
+        flags = 1
+    ram = bytearray(0x10000)
+    if header[6] | header[7]:  # Version 1: PC set, 48K in a single block
+        data = file.read()
+        if flags & 0x20:
+            data = z80_decompress(data, 0xC000, True)
+        elif len(data) < 0xC000:
+            raise ValueError("Truncated z80 memory block")
+        ram[MINRAM:] = data[0:0xC000]
+        return ram
+
+    # Versions 2 and 3: extra header and one block for each 16K page
+    length = int.from_bytes(file.read(2), "little")
+    extra = file.read(length)
+    if len(extra) != length or length < 4:
+        raise ValueError("Invalid z80 header")
+    hardware = extra[2]
+    if length == Z80_V2_EXTRA:
+        is_128k = hardware >= 3
+    else:
+        is_128k = hardware >= 4
+    # (page, address) pairs. Banks 5 and 2 can also be paged in at 0xC000,
+    # so a page may go to two addresses.
+    if is_128k:
+        pages = [(8, 0x4000), (5, 0x8000), ((extra[3] & 7) + 3, 0xC000)]
+    else:
+        pages = [(8, 0x4000), (4, 0x8000), (5, 0xC000)]
+    while len(pages) > 0:
+        block = file.read(3)
+        if len(block) < 3:
+            raise ValueError("Missing z80 memory pages")
+        length = block[0] | (block[1] << 8)
+        page = block[2]
+        if length == 0xFFFF:
+            data = file.read(0x4000)
+        else:
+            data = z80_decompress(file.read(length), 0x4000)
+        addrs = [x[1] for x in pages if x[0] == page]
+        if addrs and len(data) != 0x4000:
+            raise ValueError("Truncated z80 memory block")
+        for addr in addrs:
+            ram[addr : addr + 0x4000] = data
+        pages = [x for x in pages if x[0] != page]
+    return ram
 
-    if len(file_array) != (49179 - SEEKPOS):
-        sys.exit("Invalid file size")
 
-    sysmem = [0] * MEM_BASE
-    sysmem += file_array[0:MEM_SIZE]
-    return sysmem
+def load_file(file_path):
+    with open(file_path, "rb") as file:
+        try:
+            if file_path.lower().endswith(".z80"):
+                ram = load_z80(file)
+            else:
+                ram = load_sna(file)
+        except ValueError as e:
+            sys.exit(f"{e}")
+
+    # Only the memory from MEM_BASE is used
+    ram[0:MEM_BASE] = bytes(MEM_BASE)
+    return ram
+
+
+class GacDecodeError(ValueError):
+    """A section of the image can't be decoded: it reads beyond the memory,
+    has invalid text or needs more iterations than its budget."""
+
+    def __init__(self, section, addr, reason):
+        self.section = section
+        self.addr = addr
+        self.reason = reason
+        super().__init__(f"{section}: {reason} at {addr:#06x}")
+
+
+class GacBudget(object):
+    """Iterations left to the decoding of a section, and the addresses and
+    text of the tokens it has read so far."""
+
+    def __init__(self, section, steps=None):
+        self.section = section
+        self.steps = SECTION_BUDGETS[section] if steps is None else steps
+        self.addr = 0
+        self.tokens = []
+        self.texts = {}
+
+    def step(self, addr, n=1):
+        # Accounts for n iterations reading from addr
+        self.addr = addr
+        self.steps -= n
+        if self.steps < 0:
+            raise self.error("iteration budget exceeded")
+        if addr > MAXRAM:
+            raise self.error("address beyond the memory")
+
+    def error(self, reason):
+        return GacDecodeError(self.section, self.addr, reason)
+
+
+def section(name):
+    # Decoder of a section. Runs with the budget of the section, unless one
+    # is given, and raises GacDecodeError for reads past the end of memory
+    # and invalid text.
+    def wrap(decode):
+        @wraps(decode)
+        def run(sysram, *args, budget=None):
+            if budget is None:
+                budget = GacBudget(name)
+            try:
+                return decode(sysram, *args, budget=budget)
+            except IndexError:
+                raise budget.error("read beyond the memory") from None
+            except UnicodeDecodeError:
+                raise budget.error("invalid character") from None
+
+        return run
+
+    return wrap
 
 
 def peek1(sysram, addr):
@@ -129,264 +306,441 @@ def peek2(sysram, addr):
     return sysram[addr] + 256 * sysram[addr + 1]
 
 
-def find_token(sysram, token):
-    addr = peek2(sysram, TOKENS_ADDR)
-    while token > 0:
-        length = peek1(sysram, addr)
-        addr += 1
-        addr += length
-        token -= 1
-    return addr + 1
-
-
-def get_message_len(sysram, addr, length):
-    msg = []
-    for n in range(0, length, 2):
-        w = peek2(sysram, addr + n)
+def find_token(sysram, token, budget=None):
+    if budget is None:
+        addr = peek2(sysram, TOKENS_ADDR)
+        while token > 0:
+            length = peek1(sysram, addr)
+            addr += 1
+            addr += length
+            token -= 1
+        return addr + 1
+    # The budget keeps the address of every token walked, so each section
+    # walks the table once
+    starts = budget.tokens
+    if len(starts) == 0:
+        starts.append(peek2(sysram, TOKENS_ADDR))
+    # The tokens walked are charged at once, unless one of them is out of
+    # the budget or the memory
+    walked = 0
+    while len(starts) <= token:
+        addr = starts[-1]
+        if walked == budget.steps or addr > MAXRAM:
+            budget.step(addr, walked + 1)
+        walked += 1
+        starts.append(addr + 1 + peek1(sysram, addr))
+    if walked > 0:
+        budget.step(starts[-2], walked)
+    return starts[token] + 1
+
+
+# Characters of the tokens without the end mark, as is and in lower case
+TOKEN_CHARS = bytes(c & 0x7F for c in range(256))
+TOKEN_LOWER = bytes((c | 0x20 if c & 0x40 else c) & 0x7F for c in range(256))
+TOKEN_END = re.compile(rb"[\x80-\xff]")
+
+
+def token_text(sysram, token, budget):
+    # Bytes of a token up to the one with bit 7 set, cached in the budget
+    text = budget.texts.get(token)
+    if text is None:
+        addr = find_token(sysram, token, budget)
+        if addr < MINRAM:
+            text = bytes([peek1(sysram, addr)])
+        else:
+            end = TOKEN_END.search(sysram, addr)
+            if end is None:
+                budget.addr = addr
+                raise IndexError(addr)
+            text = bytes(sysram[addr : end.start() + 1])
+        budget.texts[token] = text
+    return text
+
+
+def get_message_len(sysram, addr, length, budget=None):
+    if budget is None:
+        budget = GacBudget("messages")
+    msg = bytearray()
+    punctuation = sysram[PUNCTUATION_ADDR : PUNCTUATION_ADDR + 8]
+    if length > 0 and MINRAM <= addr and addr + length + 1 <= len(sysram):
+        words = struct.unpack_from(f"<{(length + 1) // 2}H", sysram, addr)
+    else:
+        # Read one at a time, so it fails at the word beyond the memory
+        words = (peek2(sysram, addr + n) for n in range(0, length, 2))
+    # Iterations of the words, charged to the budget once the message ends
+    # or as soon as they exceed it
+    cost = 0
+    for n, w in enumerate(words):
         top = (w >> 14) & 3
         if top == 3:
-            a = (w >> 11) & 7  # The punctuation ending
-            b = peek1(sysram, PUNCTUATION_ADDR + a)  #
+            b = punctuation[(w >> 11) & 7]  # The punctuation ending
             if b == 0:
-                return msg  # End of string
+                break  # End of string
             a = w & 0xFF
-            while a > 0:
-                msg += [b]
-                a -= 1
+            cost += a + 1
+            budget.addr = addr + 2 * n
+            if cost > budget.steps:
+                budget.step(budget.addr, cost)
+            msg += bytes((b,)) * a
         else:
-            token = find_token(sysram, w & 0x7FF)
-            do_loop = True
-            while do_loop:
-                if top == 0:
-                    a = peek1(sysram, token)
-                    top = 1
-                elif top == 1:
-                    a = peek1(sysram, token)
-                    if (a & 0x40) != 0:
-                        a |= 0x20
-                elif top == 2:
-                    a = peek1(sysram, token)
-                msg += [(a & 0x7F)]
-                token += 1
-                do_loop = (a & 0x80) == 0
-            a = (w >> 11) & 7
-            b = peek1(sysram, PUNCTUATION_ADDR + a)
+            text = budget.texts.get(w & 0x7FF)
+            if text is None:
+                # The walk of the token table is charged after the words
+                budget.step(budget.addr, cost)
+                cost = 0
+                text = token_text(sysram, w & 0x7FF, budget)
+            # The word and its characters
+            cost += len(text) + 1
+            budget.addr = addr + 2 * n
+            if cost > budget.steps:
+                budget.step(budget.addr, cost)
+            if top == 0:  # Capitalised
+                msg.append(text[0] & 0x7F)
+                msg += text[1:].translate(TOKEN_LOWER)
+            elif top == 1:
+                msg += text.translate(TOKEN_LOWER)
+            else:
+                msg += text.translate(TOKEN_CHARS)
+            b = punctuation[(w >> 11) & 7]
             if b == 0:
-                return msg  # End of string
-            msg += [b]
+                break  # End of string
+            msg.append(b)
+    if cost > 0:
+        budget.step(budget.addr, cost)
     return msg
 
 
-def get_messages(sysram):
-    result = {}
+# The iter_* functions walk the headers of a table without decoding the
+# records, yielding (id, address, length) for each one of them.
+
+
+def iter_messages(sysram, budget=None):
     msg_addr = peek2(sysram, MESSAGES_ADDR)
     id = peek1(sysram, msg_addr)
     while id != 0:
+        if budget:
+            budget.step(msg_addr)
         length = peek1(sysram, msg_addr + 1)
         msg_addr += 2
-        msg = get_message_len(sysram, msg_addr, length)
-        result[id] = bytearray(msg).decode("ascii")
+        yield id, msg_addr, length
         msg_addr += length
         id = peek1(sysram, msg_addr)
-    return result
 
 
-def get_objects(sysram):
+def decode_message(sysram, addr, length, budget=None):
+    return get_message_len(sysram, addr, length, budget).decode("ascii")
+
+
+@section("messages")
+def get_messages(sysram, budget=None):
     result = {}
+    for id, addr, length in iter_messages(sysram, budget):
+        result[id] = decode_message(sysram, addr, length, budget)
+    return result
+
+
+@section("messages")
+def find_message(sysram, id, budget=None):
+    # Last message with the id, or None
+    found = None
+    for k, addr, length in iter_messages(sysram, budget):
+        if k == id:
+            found = (addr, length)
+    if found is None:
+        return None
+    addr, length = found
+    return decode_message(sysram, addr, length, budget)
+
+
+def iter_objects(sysram, budget=None):
     objects = peek2(sysram, OBJECTS_ADDR)
     id = peek1(sysram, objects)
     while id != 0:
-        obj = {}
+        if budget:
+            budget.step(objects)
         length = peek1(sysram, objects + 1)
         objects += 2
-        obj["weight"] = peek1(sysram, objects)
-        obj["initial_loc"] = peek2(sysram, objects + 1)
-        name = get_message_len(sysram, objects + 3, length - 3)
-        obj["name"] = bytearray(name).decode("ascii")
-        result[id] = obj
+        yield id, objects, length
         objects += length
         id = peek1(sysram, objects)
-    return result
 
 
-def get_rooms(sysram):
+def decode_object(sysram, addr, length, budget=None):
+    obj = {}
+    obj["weight"] = peek1(sysram, addr)
+    obj["initial_loc"] = peek2(sysram, addr + 1)
+    obj["name"] = decode_message(sysram, addr + 3, length - 3, budget)
+    return obj
+
+
+@section("objects")
+def get_objects(sysram, budget=None):
     result = {}
+    for id, addr, length in iter_objects(sysram, budget):
+        result[id] = decode_object(sysram, addr, length, budget)
+    return result
+
+
+@section("objects")
+def find_object(sysram, id, budget=None):
+    # Last object with the id, or None
+    found = None
+    for k, addr, length in iter_objects(sysram, budget):
+        if k == id:
+            found = (addr, length)
+    if found is None:
+        return None
+    addr, length = found
+    return decode_object(sysram, addr, length, budget)
+
+
+def iter_rooms(sysram, budget=None):
     rooms = peek2(sysram, ROOMS_ADDR)
     id = peek2(sysram, rooms)
     while id != 0:
-        room = {}
+        if budget:
+            budget.step(rooms)
         length = peek2(sysram, rooms + 2)
         rooms += 4
-        base = rooms
-        room["graphic_id"] = peek2(sysram, rooms)
-        rooms += 2
-        exits = []
-        while peek1(sysram, rooms) != 0:
-            dir = peek1(sysram, rooms)
-            dest = peek2(sysram, rooms + 1)
-            exits.append({"dir": dir, "dest": dest})
-            rooms += 3
-        room["exits"] = exits
-        rooms += 1
-        desc = get_message_len(sysram, rooms, length - (rooms - base))
-        room["desc"] = bytearray(desc).decode("ascii")
-        result[id] = room
-        rooms = base + length
+        yield id, rooms, length
+        rooms += length
         id = peek2(sysram, rooms)
-    return result
 
 
-def get_graphics(sysram):
+def decode_room(sysram, base, length, budget=None):
+    room = {}
+    rooms = base
+    room["graphic_id"] = peek2(sysram, rooms)
+    rooms += 2
+    exits = []
+    if budget and rooms >= MINRAM:
+        # The directions of the exits, up to the end mark or past the budget,
+        # so the run is charged at once
+        dirs = sysram[rooms : rooms + 3 * (budget.steps + 1) : 3]
+        n = dirs.find(0)
+        if n < 0 and len(dirs) == budget.steps + 1:
+            budget.step(rooms + 3 * budget.steps, len(dirs))
+        if n < 0:
+            # No end before the memory does: the exits with a destination
+            # in it, and the loop below fails on the next one
+            n = min(len(dirs), max(0, (len(sysram) - rooms) // 3))
+        if n > 0:
+            budget.step(rooms + 3 * (n - 1), n)
+        for n in range(n):
+            exits.append({"dir": sysram[rooms], "dest": peek2(sysram, rooms + 1)})
+            rooms += 3
+    while peek1(sysram, rooms) != 0:
+        if budget:
+            budget.step(rooms)
+        dir = peek1(sysram, rooms)
+        dest = peek2(sysram, rooms + 1)
+        exits.append({"dir": dir, "dest": dest})
+        rooms += 3
+    room["exits"] = exits
+    rooms += 1
+    room["desc"] = decode_message(sysram, rooms, length - (rooms - base), budget)
+    return room
+
+
+@section("rooms")
+def get_rooms(sysram, budget=None):
     result = {}
+    for id, base, length in iter_rooms(sysram, budget):
+        result[id] = decode_room(sysram, base, length, budget)
+    return result
+
+
+@section("rooms")
+def find_room(sysram, id, budget=None):
+    # Last room with the id, or None
+    found = None
+    for k, base, length in iter_rooms(sysram, budget):
+        if k == id:
+            found = (base, length)
+    if found is None:
+        return None
+    base, length = found
+    return decode_room(sysram, base, length, budget)
+
+
+def iter_graphics(sysram, budget=None):
     gfx = peek2(sysram, GRAPHICS_ADDR)
     id = peek2(sysram, gfx)
     while id != 0:
+        if budget:
+            budget.step(gfx)
         length = peek2(sysram, gfx + 2)
         if length <= 4:  # No valid record has a length of <= 4, so bail out
-            return result
+            return
         gfx += 4
         length -= 4
-        base = gfx
-        num_inst = peek1(sysram, gfx)
+        yield id, gfx, length
+        gfx += length
+        id = peek2(sysram, gfx)
+
+
+def decode_graphic(sysram, gfx, budget=None):
+    num_inst = peek1(sysram, gfx)
+    gfx += 1
+    inst = []
+    while num_inst > 0:
+        if budget:
+            budget.step(gfx)
+        cmd = peek1(sysram, gfx)
         gfx += 1
-        inst = []
-        while num_inst > 0:
-            cmd = peek1(sysram, gfx)
-            gfx += 1
-            num_inst -= 1
-            param = []
-            param.append(peek1(sysram, gfx + 0))
-            param.append(peek1(sysram, gfx + 1))
-            param.append(peek1(sysram, gfx + 2))
-            param.append(peek1(sysram, gfx + 3))
-            if cmd == 0x01:
-                inst.append(
-                    (
-                        "BORDER",
-                        param[0],
-                    )
+        num_inst -= 1
+        param = []
+        param.append(peek1(sysram, gfx + 0))
+        param.append(peek1(sysram, gfx + 1))
+        param.append(peek1(sysram, gfx + 2))
+        param.append(peek1(sysram, gfx + 3))
+        if cmd == 0x01:
+            inst.append(
+                (
+                    "BORDER",
+                    param[0],
                 )
-                gfx += 1
-            elif cmd == 0x02:
-                inst.append(
-                    (
-                        "PLOT",
-                        param[0],
-                        param[1],
-                    )
+            )
+            gfx += 1
+        elif cmd == 0x02:
+            inst.append(
+                (
+                    "PLOT",
+                    param[0],
+                    param[1],
                 )
-                gfx += 2
-            elif cmd == 0x03:
-                inst.append(
-                    (
-                        "ELLIPSE",
-                        param[0],
-                        param[1],
-                        param[2],
-                        param[3],
-                    )
+            )
+            gfx += 2
+        elif cmd == 0x03:
+            inst.append(
+                (
+                    "ELLIPSE",
+                    param[0],
+                    param[1],
+                    param[2],
+                    param[3],
                 )
-                gfx += 4
-            elif cmd == 0x04:
-                inst.append(
-                    (
-                        "FILL",
-                        param[0],
-                        param[1],
-                    )
+            )
+            gfx += 4
+        elif cmd == 0x04:
+            inst.append(
+                (
+                    "FILL",
+                    param[0],
+                    param[1],
                 )
-                gfx += 2
-            elif cmd == 0x05:
-                inst.append(
-                    (
-                        "BGFILL",
-                        param[0],
-                        param[1],
-                    )
+            )
+            gfx += 2
+        elif cmd == 0x05:
+            inst.append(
+                (
+                    "BGFILL",
+                    param[0],
+                    param[1],
                 )
-                gfx += 2
-            elif cmd == 0x06:
-                inst.append(
-                    (
-                        "SHADE",
-                        param[0],
-                        param[1],
-                    )
+            )
+            gfx += 2
+        elif cmd == 0x06:
+            inst.append(
+                (
+                    "SHADE",
+                    param[0],
+                    param[1],
                 )
-                gfx += 2
-            elif cmd == 0x07:
-                inst.append(
-                    (
-                        "CALL",
-                        param[1] * 256 + param[0],
-                    )
+            )
+            gfx += 2
+        elif cmd == 0x07:
+            inst.append(
+                (
+                    "CALL",
+                    param[1] * 256 + param[0],
                 )
-                gfx += 2
-            elif cmd == 0x08:
-                inst.append(
-                    (
-                        "RECT",
-                        param[0],
-                        param[1],
-                        param[2],
-                        param[3],
-                    )
+            )
+            gfx += 2
+        elif cmd == 0x08:
+            inst.append(
+                (
+                    "RECT",
+                    param[0],
+                    param[1],
+                    param[2],
+                    param[3],
                 )
-                gfx += 4
-            elif cmd == 0x09:
-                inst.append(
-                    (
-                        "LINE",
-                        param[0],
-                        param[1],
-                        param[2],
-                        param[3],
-                    )
+            )
+            gfx += 4
+        elif cmd == 0x09:
+            inst.append(
+                (
+                    "LINE",
+                    param[0],
+                    param[1],
+                    param[2],
+                    param[3],
                 )
-                gfx += 4
-            elif cmd == 0x10:
-                inst.append(
-                    (
-                        "INK",
-                        param[0],
-                    )
+            )
+            gfx += 4
+        elif cmd == 0x10:
+            inst.append(
+                (
+                    "INK",
+                    param[0],
                 )
-                gfx += 1
-            elif cmd == 0x11:
-                inst.append(
-                    (
-                        "PAPER",
-                        param[0],
-                    )
+            )
+            gfx += 1
+        elif cmd == 0x11:
+            inst.append(
+                (
+                    "PAPER",
+                    param[0],
                 )
-                gfx += 1
-            elif cmd == 0x12:
-                inst.append(
-                    (
-                        "BRIGHT",
-                        param[0],
-                    )
+            )
+            gfx += 1
+        elif cmd == 0x12:
+            inst.append(
+                (
+                    "BRIGHT",
+                    param[0],
                 )
-                gfx += 1
-            elif cmd == 0x13:
-                inst.append(
-                    (
-                        "FLASH",
-                        param[0],
-                    )
+            )
+            gfx += 1
+        elif cmd == 0x13:
+            inst.append(
+                (
+                    "FLASH",
+                    param[0],
                 )
-                gfx += 1
-            else:
-                inst.append(("UNKNOWN", cmd))
-        result[id] = inst
-        gfx = base + length
-        id = peek2(sysram, gfx)
+            )
+            gfx += 1
+        else:
+            inst.append(("UNKNOWN", cmd))
+    return inst
+
+
+@section("graphics")
+def get_graphics(sysram, budget=None):
+    result = {}
+    for id, base, length in iter_graphics(sysram, budget):
+        result[id] = decode_graphic(sysram, base, budget)
     return result
 
 
-def get_cond(sysram, cond):
+@section("graphics")
+def find_graphic(sysram, id, budget=None):
+    # Last graphic with the id, or None
+    found = None
+    for k, base, length in iter_graphics(sysram, budget):
+        if k == id:
+            found = base
+    if found is None:
+        return None
+    return decode_graphic(sysram, found, budget)
+
+
+def get_cond(sysram, cond, budget=None):
     result = []
     while True:
+        if budget:
+            budget.step(cond)
         bt = peek1(sysram, cond)
         if bt == 0:
             return (cond + 1, result)
@@ -529,29 +883,66 @@ def get_cond(sysram, cond):
                 result.append(("UNKNOWN", bt))
 
 
-def get_hpcs(sysram):
+@section("hpcs")
+def get_hpcs(sysram, budget=None):
     cond = peek2(sysram, HPCS_ADDR)
-    cond, result = get_cond(sysram, cond)
+    cond, result = get_cond(sysram, cond, budget)
     return result
 
 
-def get_lpcs(sysram):
+@section("lpcs")
+def get_lpcs(sysram, budget=None):
     cond = peek2(sysram, LPCS_ADDR)
-    cond, result = get_cond(sysram, cond)
+    cond, result = get_cond(sysram, cond, budget)
     return result
 
 
-def get_lcs(sysram):
+def skip_cond(sysram, cond, budget=None):
+    # Address after a condition block, found without decoding it
+    while True:
+        if budget:
+            budget.step(cond)
+        bt = peek1(sysram, cond)
+        if bt == 0:
+            return cond + 1
+        if (bt & 0x80) != 0:
+            cond += 2
+        else:
+            cond += 1
+            if (bt & 0x3F) == 0x00:
+                return cond
+
+
+def iter_lcs(sysram, budget=None):
+    # Yields (room, address) for each block of local conditions
     cond = peek2(sysram, LCS_ADDR)
-    result = {}
     room = peek2(sysram, cond)
     while room != 0:
-        cond, res = get_cond(sysram, cond + 2)
-        result[room] = res
+        yield room, cond + 2
+        cond = skip_cond(sysram, cond + 2, budget)
         room = peek2(sysram, cond)
+
+
+@section("lcs")
+def get_lcs(sysram, budget=None):
+    result = {}
+    for room, cond in iter_lcs(sysram, budget):
+        result[room] = get_cond(sysram, cond, budget)[1]
     return result
 
 
+@section("lcs")
+def find_local_conditions(sysram, room, budget=None):
+    # Last block of local conditions of the room, or None
+    found = None
+    for k, cond in iter_lcs(sysram, budget):
+        if k == room:
+            found = cond
+    if found is None:
+        return None
+    return get_cond(sysram, found, budget)[1]
+
+
 def mirror_byte(c):
     o = 0
     for n in range(0, 8):
@@ -561,105 +952,227 @@ def mirror_byte(c):
     return o & 0xFF
 
 
-def get_font(sysram):
+@section("font")
+def get_font(sysram, budget=None):
     font = []
     fontbase = peek2(sysram, 23606) + 256
     if fontbase < 0x5B00:  # Using ROM font
         return font
-    for n in range(0, 96):
-        for m in range(0, 8):
-            font.append(peek1(sysram, fontbase + (8 * n) + m))
+    if fontbase + 96 * 8 > MAXRAM + 1:
+        raise budget.error("font beyond the memory")
+    font += sysram[fontbase : fontbase + 96 * 8]
     return font
 
 
-def get_words(sysram, addr):
+def get_words(sysram, addr, budget):
     words = {}
     while True:
-        word = []
         id = peek1(sysram, addr)
         if id == 0:
             return words
         addr += 1
-        token = find_token(sysram, 0x7FF & peek2(sysram, addr))
-        do_loop = True
-        while do_loop:
-            a = peek1(sysram, token)
-            word.append(a & 0x7F)
-            token += 1
-            do_loop = (a & 0x80) == 0
+        text = token_text(sysram, 0x7FF & peek2(sysram, addr), budget)
+        # The word and its characters
+        budget.step(addr, len(text) + 1)
+        word = text.translate(TOKEN_CHARS)
         addr += 2
-        word = bytearray(word).decode("ascii")
-        words[word] = id
+        words[word.decode("ascii")] = id
 
 
-def get_verbs(sysram):
+@section("verbs")
+def get_verbs(sysram, budget=None):
     addr = VERBS_ADDR
-    return get_words(sysram, addr)
+    return get_words(sysram, addr, budget)
 
 
-def get_nouns(sysram):
+@section("nouns")
+def get_nouns(sysram, budget=None):
     addr = peek2(sysram, NOUNS_ADDR)
-    return get_words(sysram, addr)
+    return get_words(sysram, addr, budget)
 
 
-def get_adverbs(sysram):
+@section("adverbs")
+def get_adverbs(sysram, budget=None):
     addr = peek2(sysram, ADVERBS_ADDR)
-    return get_words(sysram, addr)
+    return get_words(sysram, addr, budget)
+
+
+class GacImage(object):
+    """Read-only view of the GAC database in a memory image.
+
+    Each section is decoded the first time it is used and then cached.
+    message(), object(), room(), graphic() and local_conditions() only walk
+    the record headers and decode the requested record when the whole
+    section is not cached yet. As in the sections, the last record wins
+    when an id is repeated.
+    """
+
+    def __init__(self, sysram):
+        self.sysram = sysram
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(load_file(path))
+
+    @cached_property
+    def font(self):
+        return get_font(self.sysram)
+
+    @cached_property
+    def verbs(self):
+        return get_verbs(self.sysram)
+
+    @cached_property
+    def nouns(self):
+        # Pronouns included, with id 255
+        return get_nouns(self.sysram)
+
+    @cached_property
+    def adverbs(self):
+        return get_adverbs(self.sysram)
+
+    @cached_property
+    def messages(self):
+        return get_messages(self.sysram)
+
+    @cached_property
+    def objects(self):
+        return get_objects(self.sysram)
+
+    @cached_property
+    def rooms(self):
+        return get_rooms(self.sysram)
+
+    @cached_property
+    def hpcs(self):
+        return get_hpcs(self.sysram)
+
+    @cached_property
+    def lpcs(self):
+        return get_lpcs(self.sysram)
+
+    @cached_property
+    def lcs(self):
+        return get_lcs(self.sysram)
+
+    @cached_property
+    def gfx(self):
+        return get_graphics(self.sysram)
+
+    @property
+    def start_room(self):
+        return peek2(self.sysram, STARTROOM_ADDR)
+
+    def message(self, id):
+        if "messages" in self.__dict__:
+            return self.messages.get(id)
+        return find_message(self.sysram, id)
+
+    def object(self, id):
+        if "objects" in self.__dict__:
+            return self.objects.get(id)
+        return find_object(self.sysram, id)
+
+    def room(self, id):
+        if "rooms" in self.__dict__:
+            return self.rooms.get(id)
+        return find_room(self.sysram, id)
+
+    def graphic(self, id):
+        if "gfx" in self.__dict__:
+            return self.gfx.get(id)
+        return find_graphic(self.sysram, id)
+
+    def local_conditions(self, room):
+        if "lcs" in self.__dict__:
+            return self.lcs.get(room)
+        return find_local_conditions(self.sysram, room)
+
+    def database(self):
+        database = {}
+        # Characters 0-31 aren't printable. An empty font means the ROM one.
+        font = self.font
+        database["font"] = [0 for x in range(8 * 32)] + font if font else []
+        database["verbs"] = self.verbs
+        database["nouns"] = {}
+        database["pronouns"] = []
+        for k, v in self.nouns.items():
+            if v == 255:  # Pronoun detected
+                database["pronouns"].append(k)
+            else:
+                database["nouns"][k] = v
+        database["adverbs"] = self.adverbs
+        database["messages"] = self.messages
+        database["objects"] = self.objects
+        database["locations"] = self.rooms
+        database["hpcs"] = self.hpcs
+        database["lpcs"] = self.lpcs
+        database["lcs"] = self.lcs
+        database["gfx"] = self.gfx
+        database["model"] = "SPECTRUM"
+        database["punctuation"] = list("\0 .,-!?:")
+        database["separators"] = ["then", "and"]
+        database["init_loc"] = self.start_room
+        database["no_objs_msg"] = "Nothing"
+        return database
 
 
 def get_database(sysram):
-    database = {}
-
-    font = get_font(sysram)
-    verbs = get_verbs(sysram)
-    nouns = get_nouns(sysram)
-    adverbs = get_adverbs(sysram)
-    messages = get_messages(sysram)
-    objects = get_objects(sysram)
-    rooms = get_rooms(sysram)
-    hpcs = get_hpcs(sysram)
-    lpcs = get_lpcs(sysram)
-    lcs = get_lcs(sysram)
-    gfx = get_graphics(sysram)
-
-    database["font"] = [0 for x in range(8 * 32)] + font
-    database["verbs"] = verbs
-    database["nouns"] = {}
-    database["pronouns"] = []
-    for k, v in nouns.items():
-        if v == 255:  # Pronoun detected
-            database["pronouns"].append(v)
-        else:
-            database["nouns"][k] = v
-    database["adverbs"] = adverbs
-    database["messages"] = messages
-    database["objects"] = objects
-    database["locations"] = rooms
-    database["hpcs"] = hpcs
-    database["lpcs"] = lpcs
-    database["lcs"] = lcs
-    database["gfx"] = gfx
-    database["model"] = "SPECTRUM"
-    database["punctuation"] = list("\0 .,-!?:")
-    database["separators"] = ["then", "and"]
-    database["init_loc"] = peek2(sysram, STARTROOM_ADDR)
-    database["no_objs_msg"] = "Nothing"
-
-    print(f"font {len(font)}")
-    print(f"verbs {len(verbs)}")
-    print(f"nouns {len(nouns)}")
-    print(f"adverbs {len(adverbs)}")
-    print(f"messages {len(messages)}")
-    print(f"objects  {len(objects)}")
-    print(f"locations {len(rooms)}")
-    print(f"hpcs {len(hpcs)}")
-    print(f"lpcs {len(lpcs)}")
-    print(f"lcs {len(lcs)}")
-    print(f"gfx {len(gfx)}")
+    image = GacImage(sysram)
+    database = image.database()
+
+    print(f"font {len(image.font)}")
+    print(f"verbs {len(image.verbs)}")
+    print(f"nouns {len(image.nouns)}")
+    print(f"adverbs {len(image.adverbs)}")
+    print(f"messages {len(image.messages)}")
+    print(f"objects  {len(image.objects)}")
+    print(f"locations {len(image.rooms)}")
+    print(f"hpcs {len(image.hpcs)}")
+    print(f"lpcs {len(image.lpcs)}")
+    print(f"lcs {len(image.lcs)}")
+    print(f"gfx {len(image.gfx)}")
 
     return database
 
 
+def open_output(path, compression=None):
+    if compression is None:
+        if path.endswith(".gz"):
+            compression = "gzip"
+        elif path.endswith(".zst"):
+            compression = "zstd"
+    if compression == "gzip":
+        return gzip.open(path, "wt", encoding="ascii")
+    elif compression == "zstd":
+        if zstd is None:
+            raise ValueError("zstd compression needs Python 3.14 or later")
+        return zstd.open(path, "wt", encoding="ascii")
+    return open(path, "w", encoding="ascii")
+
+
+def write_database(ddb, path, compression=None):
+    # Same output as json.dumps(ddb), but encoded and written one section at
+    # a time so the whole text is never held in memory.
+    encoder = json.JSONEncoder()
+    with open_output(path, compression) as file:
+        buffer = []
+        size = 0
+        sep = "{"
+        for k, v in ddb.items():
+            buffer.append(sep + encoder.encode(k) + ": ")
+            for chunk in encoder.iterencode(v):
+                buffer.append(chunk)
+                size += len(chunk)
+                if size >= WRITE_CHUNK:
+                    file.write("".join(buffer))
+                    buffer = []
+                    size = 0
+            sep = ", "
+        buffer.append("}" if sep == ", " else "{}")
+        file.write("".join(buffer))
+
+
 def main():
     if sys.version_info[0] < 3:  # Python 2
         sys.exit(_("ERROR: Invalid python version"))
@@ -679,13 +1192,20 @@ def main():
         "input_path",
         type=file_path,
         metavar=_("INPUT_FILE"),
-        help=_("sna file"),
+        help=_("48K or 128K sna file, or z80 file"),
     )
     arg_parser.add_argument(
         "output_path",
         type=valid_path,
         metavar=_("OUTPUT PATHS"),
-        help=_("json database file"),
+        help=_("json database file (.gz or .zst to compress it)"),
+    )
+    arg_parser.add_argument(
+        "-c",
+        "--compress",
+        choices=["gzip", "zstd"],
+        default=None,
+        help=_("compress the json database"),
     )
 
     try:
@@ -700,15 +1220,19 @@ def main():
     sysram = load_file(args.input_path)
 
     # The 8 bytes that should be at PUNCTUATION. UnGAC uses this as a magic number  to detect a GAC database.
-    punc_magic = list("\0 .,-!?:".encode(encoding="ascii"))
+    punc_magic = "\0 .,-!?:".encode(encoding="ascii")
     if (sysram[PUNCTUATION_ADDR : PUNCTUATION_ADDR + len(punc_magic)]) != punc_magic:
         sys.exit("Magic characters not found")
 
-    ddb = get_database(sysram)
-    ddb_json = json.dumps(ddb)
+    try:
+        ddb = get_database(sysram)
+    except GacDecodeError as e:
+        sys.exit(_("ERROR: ") + f"{e}")
 
-    with open(args.output_path, "w") as file:
-        file.write(ddb_json)
+    try:
+        write_database(ddb, args.output_path, args.compress)
+    except ValueError as e:
+        sys.exit(_("ERROR: ") + f"{e}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,692 @@
+# MIT License
+#
+# Copyright (c) 2025 Cronomantic
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+# GAC encoder: the inverse of deGAC.
+#
+# Packs a JSON database into the memory layout deGAC reads and writes it as
+# a 48K .sna. Only the database is written, not the GAC engine, so the
+# snapshot is meant for deGAC and the tools built on it and won't run on a
+# Spectrum. It can also generate synthetic adventures of any size.
+
+import sys
+import os
+import argparse
+import gettext
+import json
+import random
+
+from deGAC import (
+    PUNCTUATION_ADDR,
+    NOUNS_ADDR,
+    ADVERBS_ADDR,
+    OBJECTS_ADDR,
+    ROOMS_ADDR,
+    HPCS_ADDR,
+    LCS_ADDR,
+    LPCS_ADDR,
+    MESSAGES_ADDR,
+    GRAPHICS_ADDR,
+    TOKENS_ADDR,
+    STARTROOM_ADDR,
+    VERBS_ADDR,
+    MINRAM,
+    MAXRAM,
+    SNA_HEADER,
+    GacImage,
+    load_file,
+)
+from runGAC import load_database
+
+CHARS_ADDR = 23606  # System variable with the font address - 256
+ROM_CHARS = 0x3C00  # Value of CHARS for the ROM font
+MAX_TOKENS = 0x800
+
+# Opcode of each condition instruction, as decoded by deGAC.get_cond
+COND_OPCODES = {
+    "OP0": 0x40,  # A 0x00 byte would end the block
+    "AND": 0x01,
+    "OR": 0x02,
+    "NOT": 0x03,
+    "XOR": 0x04,
+    "HOLD": 0x05,
+    "GET": 0x06,
+    "DROP": 0x07,
+    "SWAP": 0x08,
+    "TO": 0x09,
+    "OBJ": 0x0A,
+    "SET": 0x0B,
+    "RESE": 0x0C,
+    "SET?": 0x0D,
+    "RES?": 0x0E,
+    "CSET": 0x0F,
+    "CTR": 0x10,
+    "DECR": 0x11,
+    "INCR": 0x12,
+    "EQU?": 0x13,
+    "DESC": 0x14,
+    "LOOK": 0x15,
+    "MESS": 0x16,
+    "PRIN": 0x17,
+    "RAND": 0x18,
+    "<": 0x19,
+    ">": 0x1A,
+    "=": 0x1B,
+    "SAVE": 0x1C,
+    "LOAD": 0x1D,
+    "HERE": 0x1E,
+    "CARR": 0x1F,
+    "+": 0x21,
+    "-": 0x22,
+    "TURN": 0x23,
+    "AT": 0x24,
+    "BRIN": 0x25,
+    "FIND": 0x26,
+    "IN": 0x27,
+    "NOP": 0x28,
+    "OKAY": 0x2A,
+    "WAIT": 0x2B,
+    "QUIT": 0x2C,
+    "EXIT": 0x2D,
+    "ROOM": 0x2E,
+    "NOUN": 0x2F,
+    "VERB": 0x30,
+    "ADVE": 0x31,
+    "GOTO": 0x32,
+    "NO1": 0x33,
+    "NO2": 0x34,
+    "VBNO": 0x35,
+    "LIST": 0x36,
+    "PICT": 0x37,
+    "TEXT": 0x38,
+    "CONN": 0x39,
+    "WEIG": 0x3A,
+    "WITH": 0x3B,
+    "STRE": 0x3C,
+    "LF": 0x3D,
+    "IF": 0x3E,
+    "END": 0x3F,
+}
+
+# Opcode and number of parameter bytes of each graphic instruction
+GFX_OPCODES = {
+    "BORDER": (0x01, 1),
+    "PLOT": (0x02, 2),
+    "ELLIPSE": (0x03, 4),
+    "FILL": (0x04, 2),
+    "BGFILL": (0x05, 2),
+    "SHADE": (0x06, 2),
+    "CALL": (0x07, 2),
+    "RECT": (0x08, 4),
+    "LINE": (0x09, 4),
+    "INK": (0x10, 1),
+    "PAPER": (0x11, 1),
+    "BRIGHT": (0x12, 1),
+    "FLASH": (0x13, 1),
+}
+
+
+class GAC_Encoder(object):
+    """Builds the 64K memory image of a database."""
+
+    def __init__(self, ddb):
+        self.ddb = ddb
+        self.ram = bytearray(0x10000)
+        self.punctuation = "".join(ddb["punctuation"])
+        self.tokens = {}  # Token text -> token number
+        self.token_list = []
+
+    def __token(self, txt):
+        n = self.tokens.get(txt)
+        if n is None:
+            n = len(self.token_list)
+            if n >= MAX_TOKENS:
+                raise ValueError("Too many tokens")
+            if len(txt) == 0 or len(txt) > 255:
+                raise ValueError(f"Invalid token length: {txt!r}")
+            self.tokens[txt] = n
+            self.token_list.append(txt)
+        return n
+
+    @staticmethod
+    def __lower(txt):
+        # Case conversion applied by GAC to tokens printed in lower case
+        return "".join(chr(ord(c) | 0x20) if ord(c) & 0x40 else c for c in txt)
+
+    def __word(self, word, punct):
+        # Word followed by the punctuation number punct. Tokens are kept in
+        # upper case when the word can be printed from it.
+        token = word.upper()
+        if self.__lower(token) == word:
+            top = 1
+        elif word[0] + self.__lower(token[1:]) == word:
+            top = 0
+        elif token == word:
+            top = 2
+        else:
+            token = word
+            top = 2
+        return (top << 14) | (punct << 11) | self.__token(token)
+
+    def text(self, txt):
+        # Packs a text as 16 bit words: a token and the punctuation after it,
+        # or (top bits 11) a run of a single punctuation character.
+        for c in txt:
+            if ord(c) >= 0x80 or c == self.punctuation[0]:
+                raise ValueError(f"Invalid character in text: {txt!r}")
+        words = []
+        pos = 0
+        while pos < len(txt):
+            end = pos
+            while end < len(txt) and txt[end] not in self.punctuation:
+                end += 1
+            if end > pos:
+                if end < len(txt):
+                    punct = self.punctuation.index(txt[end])
+                    end += 1
+                else:
+                    punct = 0  # End of text
+                words.append(self.__word(txt[pos:end - (punct != 0)], punct))
+            else:
+                c = txt[pos]
+                while end < len(txt) and txt[end] == c and end - pos < 255:
+                    end += 1
+                words.append(0xC000 | (self.punctuation.index(c) << 11) | (end - pos))
+            pos = end
+        out = bytearray()
+        for w in words:
+            out += w.to_bytes(2, "little")
+        return out
+
+    @staticmethod
+    def __check_id(what, k, max_id):
+        # Ids are table keys; 0 would end the table
+        if not 0 < int(k) <= max_id:
+            raise ValueError(f"Invalid {what} id {k}")
+
+    def words(self, words):
+        out = bytearray()
+        for k, v in words:
+            if v < 1 or v > 255:
+                raise ValueError(f"Invalid word id {v} for {k!r}")
+            out.append(v)
+            out += self.__token(k).to_bytes(2, "little")
+        out.append(0)
+        return out
+
+    def messages(self):
+        out = bytearray()
+        for k, v in self.ddb["messages"].items():
+            self.__check_id("message", k, 255)
+            txt = self.text(v)
+            if len(txt) > 255:
+                raise ValueError(f"Message {k} is too long")
+            out += bytes((int(k), len(txt))) + txt
+        out.append(0)
+        return out
+
+    def objects(self):
+        out = bytearray()
+        for k, v in self.ddb["objects"].items():
+            self.__check_id("object", k, 255)
+            txt = self.text(v["name"])
+            if len(txt) + 3 > 255:
+                raise ValueError(f"Object {k} name is too long")
+            out += bytes((int(k), len(txt) + 3, v["weight"]))
+            out += v["initial_loc"].to_bytes(2, "little") + txt
+        out.append(0)
+        return out
+
+    def rooms(self):
+        out = bytearray()
+        for k, v in self.ddb["locations"].items():
+            self.__check_id("room", k, 0xFFFF)
+            body = bytearray(v["graphic_id"].to_bytes(2, "little"))
+            for exit in v["exits"]:
+                body.append(exit["dir"])
+                body += exit["dest"].to_bytes(2, "little")
+            body.append(0)
+            body += self.text(v["desc"])
+            out += int(k).to_bytes(2, "little") + len(body).to_bytes(2, "little")
+            out += body
+        out += bytes(2)
+        return out
+
+    @staticmethod
+    def cond(code):
+        out = bytearray()
+        for n, inst in enumerate(code):
+            if inst[0] == "PUSH":
+                if inst[1] < 0 or inst[1] > 0x7FFF:
+                    raise ValueError(f"Invalid PUSH value {inst[1]}")
+                out += bytes((0x80 | (inst[1] >> 8), inst[1] & 0xFF))
+            elif inst[0] == "OP0":
+                if n != len(code) - 1:
+                    raise ValueError("OP0 ends a block, it must be the last one")
+                out.append(COND_OPCODES["OP0"])
+                return out
+            elif inst[0] in COND_OPCODES:
+                out.append(COND_OPCODES[inst[0]])
+            else:
+                raise ValueError(f"Unknown condition opcode {inst[0]}")
+        out.append(0)
+        return out
+
+    def lcs(self):
+        out = bytearray()
+        for k, v in self.ddb["lcs"].items():
+            self.__check_id("local conditions room", k, 0xFFFF)
+            out += int(k).to_bytes(2, "little") + self.cond(v)
+        out += bytes(2)
+        return out
+
+    @staticmethod
+    def graphic(code):
+        body = bytearray((len(code),))
+        for inst in code:
+            if inst[0] == "UNKNOWN":
+                body.append(inst[1])
+                continue
+            op, params = GFX_OPCODES[inst[0]]
+            body.append(op)
+            if inst[0] == "CALL":
+                body += inst[1].to_bytes(2, "little")
+            else:
+                body += bytes(inst[1 : 1 + params])
+        return body
+
+    def graphics(self):
+        out = bytearray()
+        for k, v in self.ddb["gfx"].items():
+            self.__check_id("graphic", k, 0xFFFF)
+            body = self.graphic(v)
+            out += int(k).to_bytes(2, "little") + (len(body) + 4).to_bytes(2, "little")
+            out += body
+        out += bytes(2)
+        return out
+
+    def tokens_table(self):
+        out = bytearray()
+        for txt in self.token_list:
+            chars = bytearray(txt.encode("ascii"))
+            chars[-1] |= 0x80  # Last character
+            out += bytes((len(chars),)) + chars
+        return out
+
+    def encode(self):
+        ram = self.ram
+        nouns = list(self.ddb["nouns"].items())
+        for k, v in nouns:
+            if v == 255:  # The id of the pronouns
+                raise ValueError(f"Invalid word id {v} for {k!r}")
+        nouns += [(x, 255) for x in self.ddb["pronouns"]]
+
+        # Tables are placed one after another from the verbs, that have a
+        # fixed address. The tokens go last, once every text is packed.
+        sections = [
+            (None, self.words(self.ddb["verbs"].items())),
+            (NOUNS_ADDR, self.words(nouns)),
+            (ADVERBS_ADDR, self.words(self.ddb["adverbs"].items())),
+            (OBJECTS_ADDR, self.objects()),
+            (ROOMS_ADDR, self.rooms()),
+            (HPCS_ADDR, self.cond(self.ddb["hpcs"])),
+            (LCS_ADDR, self.lcs()),
+            (LPCS_ADDR, self.cond(self.ddb["lpcs"])),
+            (MESSAGES_ADDR, self.messages()),
+            (GRAPHICS_ADDR, self.graphics()),
+        ]
+        sections.append((TOKENS_ADDR, self.tokens_table()))
+        font = self.ddb["font"][8 * 32 :]
+        if len(font) > 0:
+            sections.append((CHARS_ADDR, bytes(font)))
+
+        addr = VERBS_ADDR
+        for ptr, data in sections:
+            if addr + len(data) > MAXRAM - 1:  # Leave room for the stack
+                raise ValueError("The database does not fit in memory")
+            if ptr == CHARS_ADDR:
+                ram[ptr : ptr + 2] = (addr - 256).to_bytes(2, "little")
+            elif ptr is not None:
+                ram[ptr : ptr + 2] = addr.to_bytes(2, "little")
+            ram[addr : addr + len(data)] = data
+            addr += len(data)
+        if len(font) == 0:
+            ram[CHARS_ADDR : CHARS_ADDR + 2] = ROM_CHARS.to_bytes(2, "little")
+
+        punctuation = self.punctuation.encode("ascii")
+        ram[PUNCTUATION_ADDR : PUNCTUATION_ADDR + len(punctuation)] = punctuation
+        ram[STARTROOM_ADDR : STARTROOM_ADDR + 2] = self.ddb["init_loc"].to_bytes(
+            2, "little"
+        )
+        return ram
+
+
+def sna_image(ram):
+    # 48K snapshot. Registers are mostly zero: the stack holds a return
+    # address of 0 (a reset), as the engine itself is not included.
+    header = bytearray(SNA_HEADER)
+    header[0] = 0x3F  # I
+    header[15:17] = (0x5C3A).to_bytes(2, "little")  # IY
+    header[23:25] = (MAXRAM - 1).to_bytes(2, "little")  # SP
+    header[25] = 1  # IM
+    header[26] = 7  # Border
+    return bytes(header) + bytes(ram[MINRAM:])
+
+
+def encode_database(ddb):
+    return sna_image(GAC_Encoder(ddb).encode())
+
+
+def synthetic_database(rooms, messages, conditions, seed=0):
+    """Random adventure with the given number of rooms, messages (up to
+    239, the rest are the standard ones) and blocks of conditions."""
+    rng = random.Random(seed)
+    syllables = ["ka", "lo", "mi", "ne", "ru", "ta", "shi", "zo", "bel", "dar"]
+
+    def word():
+        return "".join(rng.choice(syllables) for x in range(rng.randint(1, 3)))
+
+    def sentence(n):
+        txt = " ".join(word() for x in range(n))
+        return txt[0].upper() + txt[1:] + rng.choice([".", "!", "?"]) + " "
+
+    directions = {"NORTH": 1, "SOUTH": 2, "EAST": 3, "WEST": 4}
+    verbs = dict(directions)
+    for n in range(10, 30):
+        verbs[word().upper() + str(n)] = n
+    nouns = {}
+    objects = {}
+    for n in range(1, min(rooms, 200) + 1):
+        name = word()
+        nouns[name.upper() + str(n)] = n
+        objects[str(n)] = {
+            "weight": rng.randint(0, 10),
+            "initial_loc": rng.randint(1, rooms),
+            "name": f"a {name}",
+        }
+
+    msgs = {}
+    for n in range(1, min(messages, 239) + 1):
+        msgs[str(n)] = sentence(rng.randint(3, 12))
+    for n in range(240, 256):
+        msgs[str(n)] = sentence(rng.randint(1, 4))
+
+    locations = {}
+    gfx = {}
+    for n in range(1, rooms + 1):
+        exits = []
+        if n < rooms:
+            exits.append({"dir": 1, "dest": n + 1})
+        if n > 1:
+            exits.append({"dir": 2, "dest": n - 1})
+        if rng.random() < 0.3:
+            exits.append({"dir": rng.randint(3, 4), "dest": rng.randint(1, rooms)})
+        locations[str(n)] = {
+            "graphic_id": n,
+            "desc": sentence(rng.randint(4, 12)) + sentence(rng.randint(2, 6)),
+            "exits": exits,
+        }
+        gfx[str(n)] = [
+            ["BORDER", rng.randint(0, 7)],
+            ["INK", rng.randint(0, 7)],
+            ["RECT", rng.randint(0, 255), rng.randint(0, 175), 10, 10],
+            ["LINE", 0, 0, rng.randint(0, 255), rng.randint(0, 175)],
+        ]
+
+    def block():
+        verb = rng.randint(10, 29)
+        obj = rng.randint(1, len(objects))
+        return [
+            ["PUSH", verb],
+            ["VERB"],
+            ["PUSH", obj],
+            ["NOUN"],
+            ["AND"],
+            ["IF"],
+            ["PUSH", obj],
+            rng.choice([["GET"], ["DROP"], ["OBJ"]]),
+            ["PUSH", rng.randint(1, len(msgs) - 16) if messages else 254],
+            ["MESS"],
+            ["PUSH", rng.randint(0, 255)],
+            ["SET"],
+            ["OKAY"],
+            ["END"],
+        ]
+
+    lcs = {}
+    lpcs = []
+    for n in range(conditions):
+        if n % 2 == 0:
+            lpcs += block()
+        else:
+            room = str(rng.randint(1, rooms))
+            lcs[room] = lcs.get(room, []) + block()
+
+    return {
+        "font": [0 for x in range(8 * 32)] + [rng.randint(0, 255) for x in range(768)],
+        "verbs": verbs,
+        "nouns": nouns,
+        "pronouns": ["IT"],
+        "adverbs": {"QUICKLY": 1, "SLOWLY": 2},
+        "messages": msgs,
+        "objects": objects,
+        "locations": locations,
+        "hpcs": [["PUSH", 3], ["SET?"], ["IF"], ["PUSH", 0], ["CTR"], ["PRIN"], ["END"]],
+        "lpcs": lpcs,
+        "lcs": lcs,
+        "gfx": gfx,
+        "model": "SPECTRUM",
+        "punctuation": list("\0 .,-!?:"),
+        "separators": ["then", "and"],
+        "init_loc": 1,
+        "no_objs_msg": "Nothing",
+    }
+
+
+def random_database(seed):
+    """Synthetic adventure of a random size, with some of the edge cases of
+    the format: empty tables, the ROM font and the largest ids."""
+    rng = random.Random(seed)
+    ddb = synthetic_database(
+        rng.randint(1, 40),
+        rng.choice([0, rng.randint(1, 239)]),
+        rng.randint(0, 20),
+        seed=seed,
+    )
+    if rng.random() < 0.2:
+        ddb["font"] = []
+    for k in ("hpcs", "lpcs"):
+        if rng.random() < 0.2:
+            ddb[k] = []
+    for k in ("adverbs", "objects", "lcs", "gfx"):
+        if rng.random() < 0.2:
+            ddb[k] = {}
+    if rng.random() < 0.5:
+        # Pronouns have the noun id 255
+        ddb["verbs"]["LAST"] = 255
+        ddb["nouns"]["LAST"] = 254
+        ddb["adverbs"]["LAST"] = 255
+        ddb["objects"]["255"] = {"weight": 255, "initial_loc": 0xFFFF, "name": "a"}
+        ddb["locations"]["65535"] = {
+            "graphic_id": 0xFFFF,
+            "desc": "Last.",
+            "exits": [{"dir": 255, "dest": 0xFFFF}],
+        }
+        ddb["lcs"]["65535"] = [["PUSH", 0x7FFF], ["PRIN"], ["END"]]
+        ddb["gfx"]["65535"] = [["PLOT", 255, 255], ["CALL", 0xFFFF]]
+    return ddb
+
+
+def round_trip_differences(ddb):
+    # Sections where decode(encode(ddb)) != ddb, both compared as JSON
+    expected = json.loads(json.dumps(ddb))
+    decoded = json.loads(json.dumps(GacImage(GAC_Encoder(ddb).encode()).database()))
+    return [k for k in expected if expected[k] != decoded.get(k)]
+
+
+def check_round_trip(ddb, sna_path):
+    # As round_trip_differences, decoding the written snapshot
+    expected = json.loads(json.dumps(ddb))
+    decoded = json.loads(json.dumps(GacImage(load_file(sna_path)).database()))
+    return [k for k in expected if expected[k] != decoded.get(k)]
+
+
+def check_round_trips(runs, seed=0):
+    """Round trips of runs random databases. Returns the failures as a list
+    of (seed, differences or error)."""
+    failures = []
+    for n in range(seed, seed + runs):
+        try:
+            differences = round_trip_differences(random_database(n))
+        except ValueError as e:
+            differences = f"{type(e).__name__}: {e}"
+        if differences:
+            failures.append((n, differences))
+    return failures
+
+
+def valid_path(string):
+    """_summary_
+
+    Args:
+        string (_type_): _description_
+
+    Raises:
+        NotADirectoryError: _description_
+
+    Returns:
+        _type_: _description_
+    """
+    if os.access(os.path.dirname(os.path.abspath(string)), os.W_OK):
+        return string
+    else:
+        raise NotADirectoryError(string)
+
+
+def main():
+    if sys.version_info[0] < 3:  # Python 2
+        sys.exit(_("ERROR: Invalid python version"))
+
+    version = "1.0.0"
+    program = "GAC encoder " + version
+    exec = "enGAC"
+
+    gettext.bindtextdomain(
+        exec, os.path.join(os.path.abspath(os.path.dirname(__file__)), "locale")
+    )
+    gettext.textdomain(exec)
+    _ = gettext.gettext
+
+    arg_parser = argparse.ArgumentParser(sys.argv[0], description=program)
+    arg_parser.add_argument(
+        "output_path",
+        type=valid_path,
+        nargs="?",
+        metavar=_("OUTPUT_FILE"),
+        help=_("sna file"),
+    )
+    source = arg_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument(
+        "-i",
+        "--input",
+        metavar=_("INPUT_FILE"),
+        help=_("JSON database file"),
+    )
+    source.add_argument(
+        "--synthetic",
+        type=int,
+        nargs=3,
+        metavar=("ROOMS", "MESSAGES", "CONDITIONS"),
+        help=_("generate a random adventure"),
+    )
+    source.add_argument(
+        "--round-trips",
+        type=int,
+        metavar=_("RUNS"),
+        help=_("check the round trip of this many random adventures"),
+    )
+    arg_parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help=_("seed of the random adventure, or of the first one"),
+    )
+    arg_parser.add_argument(
+        "--json",
+        type=valid_path,
+        metavar=_("JSON_FILE"),
+        help=_("also write the JSON database"),
+    )
+    arg_parser.add_argument(
+        "--check",
+        action="store_true",
+        help=_("check that deGAC decodes the same database"),
+    )
+
+    try:
+        args = arg_parser.parse_args()
+    except NotADirectoryError as f2:
+        sys.exit(_("ERROR: Not a valid path:") + f"{f2}")
+
+    if args.round_trips is not None:
+        failures = check_round_trips(args.round_trips, args.seed)
+        for seed, differences in failures:
+            if isinstance(differences, list):
+                differences = "sections differ: " + ", ".join(differences)
+            print(f"seed {seed}: {differences}")
+        if len(failures) > 0:
+            sys.exit(_("ERROR: Round trips failed: ") + f"{len(failures)}")
+        print(f"{args.round_trips} round trips OK")
+        return
+
+    if args.output_path is None:
+        arg_parser.error(_("the output file is required"))
+
+    if args.synthetic:
+        ddb = synthetic_database(*args.synthetic, seed=args.seed)
+    else:
+        if not os.path.isfile(args.input):
+            sys.exit(_("ERROR: File not found:") + f"{args.input}")
+        ddb, error = load_database(args.input)
+        if error is not None:
+            sys.exit(f"Invalid Database: {error}")
+
+    try:
+        image = encode_database(ddb)
+    except ValueError as e:
+        sys.exit(_("ERROR: ") + f"{e}")
+
+    with open(args.output_path, "wb") as f:
+        f.write(image)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(ddb, f)
+
+    if args.check:
+        differences = check_round_trip(ddb, args.output_path)
+        if len(differences) > 0:
+            sys.exit(_("ERROR: Sections differ after decoding: ") + ", ".join(differences))
+        print("Round trip OK")
+
+
+if __name__ == "__main__":
+    main()
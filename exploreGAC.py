@@ -0,0 +1,384 @@
+# MIT License
+#
+# Copyright (c) 2025 Cronomantic
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+# Breadth-first explorer of the states of a GAC adventure.
+#
+# Every state is a get_state() snapshot taken at the command prompt. Each
+# level of the search is split among worker processes, that restore the
+# states and try every candidate command on them. The master keeps the
+# transposition table, so only the first (shortest) path to a state is
+# expanded.
+
+import sys
+import os
+import argparse
+import gettext
+import json
+import hashlib
+import time
+import multiprocessing
+
+from runGAC import GAC_Interpreter, IoHeadlessGAC, load_database, vocabulary_words
+
+# Worker process state
+_interpreter = None
+_io = None
+_commands = None
+
+
+class PromptReached(Exception):
+    pass
+
+
+class IoExploreGAC(IoHeadlessGAC):
+    """Headless IO that answers a single command and stops the interpreter
+    the next time it waits for one."""
+
+    def __init__(self, width):
+        super().__init__(width)
+        self.interpreter = None
+        self.exited = False
+
+    def reset(self, command=None):
+        self.lines = [command] if command else []
+        self.next_line = 0
+        self.output = []
+        self.exited = False
+
+    def input(self):
+        if self.next_line >= len(self.lines):
+            if self.interpreter.prompting:
+                raise PromptReached()
+            return "N"  # Answer to questions such as the one of QUIT
+        return super().input()
+
+    def quit(self):
+        self.exited = True
+
+
+def file_path(string):
+    """_summary_
+
+    Args:
+        string (_type_): _description_
+
+    Raises:
+        FileNotFoundError: _description_
+
+    Returns:
+        _type_: _description_
+    """
+    if os.path.isfile(string):
+        return string
+    else:
+        raise FileNotFoundError(string)
+
+
+def vocabulary_commands(ddb):
+    verbs = vocabulary_words(ddb["verbs"])
+    nouns = vocabulary_words(ddb["nouns"])
+    commands = list(verbs)
+    for verb in verbs:
+        for noun in nouns:
+            commands.append(f"{verb} {noun}")
+    return commands
+
+
+def state_key(state, keep_turns):
+    # The RNG state is replaced by its digest, which is enough to tell apart
+    # the states whose RAND results differ
+    start, end = GAC_Interpreter.state_rng_span(state)
+    rng = hashlib.blake2b(state[start:end], digest_size=16).digest()
+    state = state[0:start] + rng + state[end:]
+    if keep_turns:
+        return state
+    # Clear the turn counters, otherwise no two states would ever be equal
+    pos = GAC_Interpreter.STATE_HEADER.size
+    low = pos + GAC_Interpreter.TURN_CNT_L
+    high = pos + GAC_Interpreter.TURN_CNT_H
+    return state[0:low] + b"\x00" + state[low + 1 : high] + b"\x00" + state[high + 1 :]
+
+
+def new_interpreter(ddb):
+    io = IoExploreGAC(32)
+    interpreter = GAC_Interpreter(ddb, io, seed=0)
+    io.interpreter = interpreter
+    # Callers load the database with load_database, that validates it
+    if not interpreter.start_adventure(validated=True):
+        raise ValueError("Invalid Database")
+    return interpreter, io
+
+
+def initial_state(ddb):
+    interpreter, io = new_interpreter(ddb)
+    io.reset()
+    try:
+        interpreter.run()
+    except PromptReached:
+        return interpreter.get_state(False)
+    raise ValueError("The adventure finished before asking for a command")
+
+
+def init_worker(ddb, commands):
+    global _interpreter, _io, _commands
+    _interpreter, _io = new_interpreter(ddb)
+    _commands = commands
+
+
+def expand(states):
+    # Returns, for each state, the list of (command index, new state, event)
+    # where event is None, "EXIT" or the error raised by the interpreter.
+    result = []
+    for state in states:
+        children = []
+        for n, command in enumerate(_commands):
+            _io.reset(command)
+            _interpreter.set_state(state)
+            event = None
+            try:
+                _interpreter.run(resume=True)
+                event = "EXIT" if _io.exited else "QUIT"
+            except PromptReached:
+                pass
+            except Exception as e:
+                event = f"{type(e).__name__}: {e}"
+            children.append((n, _interpreter.get_state(False), event))
+        result.append(children)
+    return result
+
+
+def state_room(state):
+    return GAC_Interpreter.STATE_HEADER.unpack_from(state)[1]
+
+
+def state_score(state):
+    return state[GAC_Interpreter.STATE_HEADER.size + GAC_Interpreter.SCORE_CNT]
+
+
+def explore(ddb, commands, max_depth, jobs, keep_turns=False, max_states=None):
+    start = initial_state(ddb)
+    start_key = state_key(start, keep_turns)
+    # Transposition table: key -> (parent key, command index, depth)
+    table = {start_key: (None, None, 0)}
+    parents = {start_key: set()}
+    exits = []
+    errors = []
+    rooms = {state_room(start): start_key}
+    scores = {state_score(start): start_key}
+    expanded = set()
+
+    frontier = [(start_key, start)]
+    depth = 0
+    with multiprocessing.Pool(jobs, init_worker, (ddb, commands)) as pool:
+        while len(frontier) > 0 and depth < max_depth:
+            chunk = max(1, len(frontier) // (4 * jobs))
+            shards = [
+                [state for key, state in frontier[n : n + chunk]]
+                for n in range(0, len(frontier), chunk)
+            ]
+            next_frontier = []
+            pos = 0
+            for shard_result in pool.imap(expand, shards):
+                for children in shard_result:
+                    parent_key = frontier[pos][0]
+                    pos += 1
+                    expanded.add(parent_key)
+                    for n, state, event in children:
+                        key = state_key(state, keep_turns)
+                        if event is not None:
+                            path = (parent_key, n)
+                            if event == "EXIT":
+                                exits.append(path)
+                            elif event != "QUIT":
+                                errors.append((path, event))
+                            continue
+                        parents.setdefault(key, set()).add(parent_key)
+                        if key in table:
+                            continue
+                        table[key] = (parent_key, n, depth + 1)
+                        next_frontier.append((key, state))
+                        rooms.setdefault(state_room(state), key)
+                        scores.setdefault(state_score(state), key)
+            frontier = next_frontier
+            depth += 1
+            print(f"depth {depth}: {len(table)} states, {len(frontier)} new")
+            if max_states and len(table) >= max_states:
+                break
+
+    def path_to(key):
+        path = []
+        while table[key][0] is not None:
+            parent, n, d = table[key]
+            path.append(commands[n])
+            key = parent
+        return path[::-1]
+
+    def ancestors(keys):
+        # The keys and every state that leads to them
+        found = set()
+        pending = list(keys)
+        while len(pending) > 0:
+            key = pending.pop()
+            if key not in found:
+                found.add(key)
+                pending.extend(parents.get(key, ()))
+        return found
+
+    # States that can't reach any EXIT. Only the states whose whole future
+    # was explored count: those leading to a state left unexpanded by the
+    # depth or state limits may still win.
+    winnable = ancestors(parent for parent, n in exits)
+    unexplored = ancestors(k for k in table if k not in expanded)
+    unwinnable = (
+        [k for k in expanded if k not in winnable and k not in unexplored]
+        if len(exits) > 0
+        else []
+    )
+
+    return {
+        "states": len(table),
+        "depth": depth,
+        "rooms": {room: path_to(key) for room, key in sorted(rooms.items())},
+        "scores": {score: path_to(key) for score, key in sorted(scores.items())},
+        "exits": [path_to(parent) + [commands[n]] for parent, n in exits],
+        "errors": [
+            {"path": path_to(parent) + [commands[n]], "error": event}
+            for (parent, n), event in errors
+        ],
+        "unwinnable": len(unwinnable),
+        "unexplored": len(unexplored),
+        "unwinnable_examples": [
+            path_to(k) for k in sorted(unwinnable, key=lambda k: table[k][2])[0:10]
+        ],
+    }
+
+
+def main():
+    if sys.version_info[0] < 3:  # Python 2
+        sys.exit(_("ERROR: Invalid python version"))
+
+    version = "1.0.0"
+    program = "GAC state explorer " + version
+    exec = "exploreGAC"
+
+    gettext.bindtextdomain(
+        exec, os.path.join(os.path.abspath(os.path.dirname(__file__)), "locale")
+    )
+    gettext.textdomain(exec)
+    _ = gettext.gettext
+
+    arg_parser = argparse.ArgumentParser(sys.argv[0], description=program)
+    arg_parser.add_argument(
+        "input_path",
+        type=file_path,
+        metavar=_("INPUT_FILE"),
+        help=_("JSON database file"),
+    )
+    arg_parser.add_argument(
+        "-d",
+        "--depth",
+        type=int,
+        default=6,
+        help=_("maximum number of commands"),
+    )
+    arg_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help=_("number of worker processes"),
+    )
+    arg_parser.add_argument(
+        "--commands",
+        type=file_path,
+        metavar=_("COMMANDS_FILE"),
+        help=_("file with the candidate commands, one per line"),
+    )
+    arg_parser.add_argument(
+        "--max-states",
+        type=int,
+        default=None,
+        help=_("stop after finding this number of states"),
+    )
+    arg_parser.add_argument(
+        "--keep-turns",
+        action="store_true",
+        help=_("tell apart states that only differ in the turn counter"),
+    )
+    arg_parser.add_argument(
+        "-o",
+        "--output",
+        metavar=_("OUTPUT_FILE"),
+        help=_("write the results as JSON"),
+    )
+
+    try:
+        args = arg_parser.parse_args()
+    except FileNotFoundError as f1:
+        sys.exit(_("ERROR: File not found:") + f"{f1}")
+
+    ddb, error = load_database(args.input_path)
+    if error is not None:
+        sys.exit(f"Invalid Database: {error}")
+
+    if args.commands:
+        with open(args.commands) as f:
+            commands = [x.strip() for x in f.read().splitlines() if x.strip()]
+    else:
+        commands = vocabulary_commands(ddb)
+
+    start = time.perf_counter()
+    try:
+        result = explore(
+            ddb,
+            commands,
+            args.depth,
+            max(1, args.jobs),
+            args.keep_turns,
+            args.max_states,
+        )
+    except ValueError as e:
+        sys.exit(_("ERROR: ") + f"{e}")
+    elapsed = time.perf_counter() - start
+
+    for room, path in result["rooms"].items():
+        print(f"room {room}: {' / '.join(path)}")
+    for score, path in result["scores"].items():
+        print(f"score {score}: {' / '.join(path)}")
+    for path in result["exits"][0:10]:
+        print(f"exit: {' / '.join(path)}")
+    for error in result["errors"][0:10]:
+        print(f"error {error['error']}: {' / '.join(error['path'])}")
+    print(
+        f"{result['states']} states, {len(result['exits'])} exits, "
+        f"{result['unwinnable']} unwinnable, "
+        f"{result['unexplored']} not fully explored, {elapsed:.3f}s"
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+# MIT License
+#
+# Copyright (c) 2025 Cronomantic
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+# Walkthrough regression farm.
+#
+# Every game database GAME.json found under the root directory may have a
+# sibling directory GAME/ with walkthrough scripts (*.txt, one input per
+# line) and their golden transcripts (same name, .golden extension).
+# Each (database, script) pair is played on a headless interpreter in a
+# process pool and its transcript compared against the golden one.
+
+import sys
+import os
+import argparse
+import gettext
+import time
+import difflib
+import multiprocessing
+import xml.etree.ElementTree as ET
+
+from runGAC import GAC_Interpreter, IoHeadlessGAC, load_database
+
+SCRIPT_EXT = ".txt"
+GOLDEN_EXT = ".golden"
+WIDTH = 32
+
+# Databases already loaded and compiled by this worker process
+_databases = {}
+
+
+def dir_path(string):
+    """_summary_
+
+    Args:
+        string (_type_): _description_
+
+    Raises:
+        NotADirectoryError: _description_
+
+    Returns:
+        _type_: _description_
+    """
+    if os.path.isdir(string):
+        return string
+    else:
+        raise NotADirectoryError(string)
+
+
+def find_tasks(root):
+    tasks = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if not name.endswith(".json"):
+                continue
+            db_path = os.path.join(dirpath, name)
+            script_dir = os.path.splitext(db_path)[0]
+            if not os.path.isdir(script_dir):
+                continue
+            for script in sorted(os.listdir(script_dir)):
+                if script.endswith(SCRIPT_EXT):
+                    tasks.append((db_path, os.path.join(script_dir, script)))
+    return tasks
+
+
+def cached_database(db_path):
+    db = _databases.get(db_path)
+    if db is None:
+        ddb, error = load_database(db_path)
+        if error is not None:
+            raise ValueError(f"Invalid Database: {error}")
+        db = GAC_Interpreter.compile_database(ddb)
+        _databases[db_path] = db
+    return db
+
+
+def play_script(db, lines, seed=0):
+    # db is a compiled database, see cached_database
+    io = IoHeadlessGAC(WIDTH, lines)
+    interpreter = GAC_Interpreter(None, io, seed=seed)
+    interpreter.use_database(db)
+    if not interpreter.start_adventure(validated=True):
+        raise ValueError("Invalid Database")
+    interpreter.run()
+    return io.transcript(), io.turns
+
+
+def run_task(task):
+    db_path, script_path, seed, update = task
+    result = {
+        "db": db_path,
+        "script": script_path,
+        "turns": 0,
+        "time": 0.0,
+        "status": "passed",
+        "message": "",
+    }
+    start = time.perf_counter()
+    try:
+        db = cached_database(db_path)
+        with open(script_path) as f:
+            lines = f.read().splitlines()
+        transcript, result["turns"] = play_script(db, lines, seed)
+    except Exception as e:
+        result["status"] = "error"
+        result["message"] = f"{type(e).__name__}: {e}"
+        result["time"] = time.perf_counter() - start
+        return result
+    result["time"] = time.perf_counter() - start
+
+    golden_path = os.path.splitext(script_path)[0] + GOLDEN_EXT
+    if update:
+        with open(golden_path, "w") as f:
+            f.write(transcript)
+    elif not os.path.isfile(golden_path):
+        result["status"] = "error"
+        result["message"] = "Golden transcript not found"
+    else:
+        with open(golden_path) as f:
+            golden = f.read()
+        if golden != transcript:
+            result["status"] = "failed"
+            diff = difflib.unified_diff(
+                golden.splitlines(),
+                transcript.splitlines(),
+                "golden",
+                "actual",
+                lineterm="",
+            )
+            result["message"] = "\n".join(diff)
+    return result
+
+
+def write_junit(results, path):
+    games = {}
+    for r in results:
+        games.setdefault(r["db"], []).append(r)
+    suites = ET.Element("testsuites")
+    for db_path, game_results in sorted(games.items()):
+        suite = ET.SubElement(
+            suites,
+            "testsuite",
+            name=db_path,
+            tests=str(len(game_results)),
+            failures=str(sum(r["status"] == "failed" for r in game_results)),
+            errors=str(sum(r["status"] == "error" for r in game_results)),
+            time=f"{sum(r['time'] for r in game_results):.6f}",
+        )
+        for r in game_results:
+            case = ET.SubElement(
+                suite,
+                "testcase",
+                classname=os.path.splitext(os.path.basename(db_path))[0],
+                name=os.path.basename(r["script"]),
+                time=f"{r['time']:.6f}",
+            )
+            if r["status"] == "failed":
+                ET.SubElement(case, "failure", message="Transcript differs").text = r[
+                    "message"
+                ]
+            elif r["status"] == "error":
+                ET.SubElement(case, "error", message=r["message"])
+    ET.ElementTree(suites).write(path, encoding="utf-8", xml_declaration=True)
+
+
+def main():
+    if sys.version_info[0] < 3:  # Python 2
+        sys.exit(_("ERROR: Invalid python version"))
+
+    version = "1.0.0"
+    program = "GAC walkthrough farm " + version
+    exec = "farmGAC"
+
+    gettext.bindtextdomain(
+        exec, os.path.join(os.path.abspath(os.path.dirname(__file__)), "locale")
+    )
+    gettext.textdomain(exec)
+    _ = gettext.gettext
+
+    arg_parser = argparse.ArgumentParser(sys.argv[0], description=program)
+    arg_parser.add_argument(
+        "root_path",
+        type=dir_path,
+        metavar=_("ROOT_DIR"),
+        help=_("directory with the databases and their walkthroughs"),
+    )
+    arg_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help=_("number of worker processes"),
+    )
+    arg_parser.add_argument(
+        "--junit",
+        metavar=_("XML_FILE"),
+        help=_("write the results as JUnit XML"),
+    )
+    arg_parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help=_("seed for the RAND opcode"),
+    )
+    arg_parser.add_argument(
+        "--update",
+        action="store_true",
+        help=_("write the golden transcripts instead of comparing them"),
+    )
+
+    try:
+        args = arg_parser.parse_args()
+    except NotADirectoryError as f2:
+        sys.exit(_("ERROR: Not a valid path:") + f"{f2}")
+
+    tasks = [
+        (db, script, args.seed, args.update) for db, script in find_tasks(args.root_path)
+    ]
+    if len(tasks) == 0:
+        sys.exit(_("ERROR: No walkthroughs found"))
+
+    start = time.perf_counter()
+    results = []
+    with multiprocessing.Pool(max(1, args.jobs)) as pool:
+        # Tasks are sorted by database, so chunks tend to hit the worker cache
+        chunksize = max(1, len(tasks) // (4 * max(1, args.jobs)))
+        for r in pool.imap_unordered(run_task, tasks, chunksize):
+            if r["status"] != "passed":
+                print(f"{r['status'].upper()}: {r['script']}")
+            results.append(r)
+    elapsed = time.perf_counter() - start
+
+    game_times = {}
+    for r in results:
+        game_times[r["db"]] = game_times.get(r["db"], 0.0) + r["time"]
+    for db_path, t in sorted(game_times.items()):
+        print(f"{t:10.3f}s {db_path}")
+
+    turns = sum(r["turns"] for r in results)
+    failed = sum(r["status"] != "passed" for r in results)
+    print(
+        f"{len(results)} walkthroughs, {failed} failed, {turns} turns "
+        f"in {elapsed:.3f}s ({turns / elapsed:.0f} turns/s)"
+    )
+
+    if args.junit:
+        write_junit(results, args.junit)
+
+    if failed > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
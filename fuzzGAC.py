@@ -0,0 +1,289 @@
+# MIT License
+#
+# Copyright (c) 2025 Cronomantic
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+# Mutation fuzzer of the decoder.
+#
+# Takes snapshots of GAC games (or synthetic ones from enGAC), corrupts a
+# few bytes or table pointers of their database and decodes the result in
+# this same process, as get_database does. Decoding must either succeed or
+# fail with GacDecodeError within the time limit; any other exception, or
+# a decode that takes longer, is saved as a .sna file to reproduce it.
+
+import sys
+import os
+import argparse
+import gettext
+import random
+import signal
+import time
+from collections import Counter
+
+from deGAC import (
+    GacDecodeError,
+    GacImage,
+    load_file,
+    NOUNS_ADDR,
+    VERBS_ADDR,
+    DBASE_ADDR,
+    MAXRAM,
+)
+from enGAC import GAC_Encoder, sna_image, synthetic_database
+from playGAC import crash_signature
+
+# Synthetic seeds: rooms, messages, condition blocks. Small games decode
+# faster, so more mutations are tried.
+SEED_SIZES = [(1, 2, 1), (2, 4, 2), (3, 6, 3)]
+
+# Table pointers and start room, between the nouns and the verbs
+HEADER_START = NOUNS_ADDR
+HEADER_END = VERBS_ADDR
+
+INTERESTING_BYTES = (0x00, 0x01, 0x7F, 0x80, 0xFF)
+INTERESTING_WORDS = (0x0000, 0x0001, 0x3FFF, 0x4000, 0x7FFF, 0x8000, 0xFFFE, 0xFFFF)
+
+MAX_MUTATIONS = 4
+
+
+class DecodeTimeout(Exception):
+    pass
+
+
+def mutate(ram, rng):
+    """Corrupts ram in place with a few random mutations, most of them in
+    the database. Returns their description."""
+    done = []
+    for n in range(rng.randint(1, MAX_MUTATIONS)):
+        kind = rng.randrange(6)
+        addr = rng.randrange(DBASE_ADDR, MAXRAM)
+        if kind == 0:
+            bit = rng.randrange(8)
+            ram[addr] ^= 1 << bit
+            done.append(f"flip {addr:#06x}.{bit}")
+        elif kind == 1:
+            ram[addr] = rng.randrange(256)
+            done.append(f"byte {addr:#06x}")
+        elif kind == 2:
+            ram[addr] = rng.choice(INTERESTING_BYTES)
+            done.append(f"special {addr:#06x}")
+        elif kind == 3:
+            # A table pointer or the start room
+            addr = rng.randrange(HEADER_START, HEADER_END, 2)
+            if rng.random() < 0.5:
+                word = rng.choice(INTERESTING_WORDS)
+            else:
+                word = (ram[addr] + 256 * ram[addr + 1] + rng.randint(-8, 8)) & 0xFFFF
+            ram[addr : addr + 2] = word.to_bytes(2, "little")
+            done.append(f"pointer {addr:#06x}={word:#06x}")
+        elif kind == 4:
+            # Copy of another run of the database
+            length = rng.randint(2, 64)
+            src = rng.randrange(DBASE_ADDR, MAXRAM - length)
+            addr = min(addr, MAXRAM + 1 - length)
+            ram[addr : addr + length] = ram[src : src + length]
+            done.append(f"copy {src:#06x}->{addr:#06x}+{length}")
+        else:
+            length = rng.randint(2, 64)
+            addr = min(addr, MAXRAM + 1 - length)
+            value = rng.choice(INTERESTING_BYTES)
+            ram[addr : addr + length] = bytes([value]) * length
+            done.append(f"fill {addr:#06x}+{length}={value:#04x}")
+    return done
+
+
+def decode(ram):
+    # The decoding of get_database, without its summary
+    return GacImage(ram).database()
+
+
+def fuzz(seeds, runs, rng, timeout, deadline=None):
+    """Decodes runs mutated copies of the seeds. Returns the statistics and
+    the failures as {signature: (ram, mutations)}."""
+    stats = Counter()
+    failures = {}
+    slowest = 0.0
+    alarm = hasattr(signal, "setitimer")
+    if alarm:
+
+        def expire(signum, frame):
+            raise DecodeTimeout(f"decoding took more than {timeout}s")
+
+        previous = signal.signal(signal.SIGALRM, expire)
+    try:
+        for n in range(runs):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            ram = bytearray(rng.choice(seeds))
+            mutations = mutate(ram, rng)
+            start = time.perf_counter()
+            if alarm:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+            try:
+                decode(ram)
+                stats["decoded"] += 1
+            except GacDecodeError as e:
+                stats[f"rejected: {e.section}: {e.reason}"] += 1
+            except Exception as e:
+                stats["failed"] += 1
+                failures.setdefault(crash_signature(e), (ram, mutations))
+            finally:
+                if alarm:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+            elapsed = time.perf_counter() - start
+            slowest = max(slowest, elapsed)
+            if not alarm and elapsed > timeout:
+                stats["failed"] += 1
+                signature = f"DecodeTimeout: {elapsed:.3f}s"
+                failures.setdefault(signature, (ram, mutations))
+            stats["execs"] += 1
+    finally:
+        if alarm:
+            signal.signal(signal.SIGALRM, previous)
+    stats["slowest_us"] = int(slowest * 1e6)
+    return stats, failures
+
+
+def file_path(string):
+    """_summary_
+
+    Args:
+        string (_type_): _description_
+
+    Raises:
+        FileNotFoundError: _description_
+
+    Returns:
+        _type_: _description_
+    """
+    if os.path.isfile(string):
+        return string
+    else:
+        raise FileNotFoundError(string)
+
+
+def main():
+    if sys.version_info[0] < 3:  # Python 2
+        sys.exit(_("ERROR: Invalid python version"))
+
+    version = "1.0.0"
+    program = "GAC decoder fuzzer " + version
+    exec = "fuzzGAC"
+
+    gettext.bindtextdomain(
+        exec, os.path.join(os.path.abspath(os.path.dirname(__file__)), "locale")
+    )
+    gettext.textdomain(exec)
+    _ = gettext.gettext
+
+    arg_parser = argparse.ArgumentParser(sys.argv[0], description=program)
+    arg_parser.add_argument(
+        "input_paths",
+        type=file_path,
+        nargs="*",
+        metavar=_("INPUT_FILE"),
+        help=_("SNA or Z80 seed files, synthetic games if there are none"),
+    )
+    arg_parser.add_argument(
+        "-n",
+        "--runs",
+        type=int,
+        default=10000,
+        help=_("number of mutated images to decode"),
+    )
+    arg_parser.add_argument(
+        "-d",
+        "--duration",
+        type=float,
+        default=None,
+        help=_("stop after this many seconds"),
+    )
+    arg_parser.add_argument(
+        "--timeout",
+        type=float,
+        default=1.0,
+        help=_("seconds a decode can take before it counts as a hang"),
+    )
+    arg_parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help=_("seed of the mutations"),
+    )
+    arg_parser.add_argument(
+        "--crash-dir",
+        default="crashes",
+        metavar=_("CRASH_DIR"),
+        help=_("directory for the images that crash or hang the decoder"),
+    )
+
+    try:
+        args = arg_parser.parse_args()
+    except FileNotFoundError as f1:
+        sys.exit(_("ERROR: File not found:") + f"{f1}")
+
+    seeds = []
+    for path in args.input_paths:
+        try:
+            seeds.append(bytes(load_file(path)))
+        except ValueError as e:
+            sys.exit(_("ERROR: ") + f"{path}: {e}")
+    if len(seeds) == 0:
+        seeds = [
+            bytes(GAC_Encoder(synthetic_database(*size, seed=n)).encode())
+            for n, size in enumerate(SEED_SIZES)
+        ]
+    for n, seed in enumerate(seeds):
+        try:
+            decode(bytearray(seed))
+        except GacDecodeError as e:
+            sys.exit(_("ERROR: Seed does not decode: ") + f"{n}: {e}")
+
+    rng = random.Random(args.seed)
+    deadline = None
+    if args.duration is not None:
+        deadline = time.monotonic() + args.duration
+    start = time.perf_counter()
+    stats, failures = fuzz(seeds, args.runs, rng, args.timeout, deadline)
+    elapsed = time.perf_counter() - start
+
+    execs = stats.pop("execs")
+    print(
+        f"{execs} execs in {elapsed:.3f}s ({execs / elapsed:.0f} execs/s), "
+        f"slowest {stats.pop('slowest_us') / 1000:.3f} ms"
+    )
+    for k, v in sorted(stats.items(), key=lambda x: -x[1]):
+        print(f"{v:8d} {k}")
+
+    if len(failures) > 0:
+        os.makedirs(args.crash_dir, exist_ok=True)
+    for n, (signature, (ram, mutations)) in enumerate(sorted(failures.items())):
+        path = os.path.join(args.crash_dir, f"decode-{n}.sna")
+        with open(path, "wb") as f:
+            f.write(sna_image(ram))
+        print(f"{signature}: {', '.join(mutations)} -> {path}")
+
+    if len(failures) > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
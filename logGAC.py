@@ -0,0 +1,296 @@
+# MIT License
+#
+# Copyright (c) 2025 Cronomantic
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+# Session transcripts.
+#
+# The IO of a session queues what is typed and printed, with timestamps, in
+# memory; a background thread writes the queue in batches to gzip files of
+# JSON lines, starting a new file when the current one grows too large and
+# removing the oldest ones. The queue is bounded: when the disk can't keep
+# up, records are dropped (and counted) instead of slowing down the game.
+
+import sys
+import os
+import argparse
+import gettext
+import gzip
+import json
+import re
+import threading
+import time
+from collections import deque
+
+from runGAC import GAC_Interpreter, IoCallbackGAC, load_database
+
+
+class GAC_TranscriptSink(object):
+    """Bounded queue of transcript records written to rotating gzip files
+    by a background thread.
+
+    Files are named <prefix>-<number>.jsonl.gz, and each line is a record
+    {"t": time, "s": session id, "k": kind, "x": text}, with kind "in" for
+    the commands typed, "out" for the text printed and "drop" for the
+    number of records lost since the previous one.
+    """
+
+    def __init__(
+        self,
+        directory,
+        prefix="transcript",
+        max_bytes=1 << 20,
+        max_files=10,
+        max_queue=10000,
+        flush_interval=0.5,
+    ):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        # The lock is only held to append a record or to take the whole
+        # queue, so record() never waits for the disk
+        self.lock = threading.Lock()
+        self.queue = deque()
+        self.dropped = 0
+        self.written = 0
+        self.error = None
+        self.file = None
+        self.stop = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+        numbers = self.file_numbers()
+        self.number = numbers[-1] + 1 if numbers else 0
+        self.writer = threading.Thread(target=self.__writer_task, daemon=True)
+        self.writer.start()
+
+    def file_numbers(self):
+        pattern = re.compile(re.escape(self.prefix) + r"-(\d+)\.jsonl\.gz$")
+        numbers = []
+        for name in os.listdir(self.directory):
+            m = pattern.match(name)
+            if m:
+                numbers.append(int(m.group(1)))
+        return sorted(numbers)
+
+    def path_of(self, number):
+        return os.path.join(self.directory, f"{self.prefix}-{number:06d}.jsonl.gz")
+
+    def record(self, session_id, kind, text):
+        # When the queue is full the record is only counted
+        record = (time.time(), session_id, kind, text)
+        with self.lock:
+            if len(self.queue) >= self.max_queue:
+                self.dropped += 1
+            else:
+                self.queue.append(record)
+
+    def __rotate(self):
+        if self.file is not None:
+            self.file.close()
+            self.number += 1
+        self.file = gzip.GzipFile(self.path_of(self.number), "wb")
+        for number in self.file_numbers()[: -self.max_files]:
+            os.remove(self.path_of(number))
+
+    def __write_batch(self):
+        # Only what is queued now, even if the game keeps adding records
+        with self.lock:
+            batch, self.queue = self.queue, deque()
+            dropped, self.dropped = self.dropped, 0
+        lines = [
+            json.dumps({"t": t, "s": session_id, "k": kind, "x": text})
+            for t, session_id, kind, text in batch
+        ]
+        if dropped > 0:
+            lines.append(
+                json.dumps({"t": time.time(), "s": None, "k": "drop", "x": dropped})
+            )
+        if len(lines) == 0:
+            return
+        if self.file is None or self.file.fileobj.tell() >= self.max_bytes:
+            self.__rotate()
+        self.file.write(("\n".join(lines) + "\n").encode("utf-8"))
+        # Complete deflate blocks, so the file can be read while it grows
+        self.file.flush()
+        self.written += len(lines)
+
+    def __writer_task(self):
+        while True:
+            stopping = self.stop.wait(self.flush_interval)
+            try:
+                self.__write_batch()
+            except OSError as e:
+                self.error = e
+            if stopping:
+                break
+        if self.file is not None:
+            self.file.close()
+
+    def close(self):
+        self.stop.set()
+        self.writer.join()
+        if self.error is not None:
+            raise self.error
+
+
+def read_transcripts(directory, prefix="transcript", session_id=None):
+    # Records of the files of a sink, oldest first
+    pattern = re.compile(re.escape(prefix) + r"-\d+\.jsonl\.gz$")
+    for name in sorted(x for x in os.listdir(directory) if pattern.match(x)):
+        try:
+            with gzip.open(os.path.join(directory, name), "rt", encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if session_id is None or record["s"] in (session_id, None):
+                        yield record
+        except EOFError:
+            # The file being written has no gzip trailer yet
+            pass
+
+
+class IoTranscriptGAC(IoCallbackGAC):
+    """Terminal IO that records the session in a transcript sink."""
+
+    def __init__(self, width, sink, session_id):
+        super().__init__(width)
+        self.sink = sink
+        self.session_id = session_id
+
+    def write(self, txt):
+        self.sink.record(self.session_id, "out", txt)
+        super().write(txt)
+
+    def input(self):
+        txt = super().input()
+        self.sink.record(self.session_id, "in", txt)
+        return txt
+
+    def replay_input(self, txt):
+        super().replay_input(txt)
+        self.sink.record(self.session_id, "in", txt)
+
+
+def file_path(string):
+    """_summary_
+
+    Args:
+        string (_type_): _description_
+
+    Raises:
+        FileNotFoundError: _description_
+
+    Returns:
+        _type_: _description_
+    """
+    if os.path.isfile(string):
+        return string
+    else:
+        raise FileNotFoundError(string)
+
+
+def main():
+    if sys.version_info[0] < 3:  # Python 2
+        sys.exit(_("ERROR: Invalid python version"))
+
+    version = "1.0.0"
+    program = "GAC session transcripts " + version
+    exec = "logGAC"
+
+    gettext.bindtextdomain(
+        exec, os.path.join(os.path.abspath(os.path.dirname(__file__)), "locale")
+    )
+    gettext.textdomain(exec)
+    _ = gettext.gettext
+
+    arg_parser = argparse.ArgumentParser(sys.argv[0], description=program)
+    arg_parser.add_argument(
+        "input_path",
+        type=file_path,
+        metavar=_("INPUT_FILE"),
+        help=_("JSON database file"),
+    )
+    arg_parser.add_argument(
+        "log_dir",
+        metavar=_("LOG_DIR"),
+        help=_("directory of the transcript files"),
+    )
+    arg_parser.add_argument(
+        "-s",
+        "--session",
+        default="default",
+        help=_("id of the session"),
+    )
+    arg_parser.add_argument(
+        "--max-bytes",
+        type=int,
+        default=1 << 20,
+        help=_("size of each transcript file before starting a new one"),
+    )
+    arg_parser.add_argument(
+        "--max-files",
+        type=int,
+        default=10,
+        help=_("transcript files kept"),
+    )
+    arg_parser.add_argument(
+        "--show",
+        action="store_true",
+        help=_("print the transcript of the session instead of playing"),
+    )
+
+    try:
+        args = arg_parser.parse_args()
+    except FileNotFoundError as f1:
+        sys.exit(_("ERROR: File not found:") + f"{f1}")
+
+    if args.show:
+        if not os.path.isdir(args.log_dir):
+            sys.exit(_("ERROR: Not a valid path:") + f"{args.log_dir}")
+        for record in read_transcripts(args.log_dir, session_id=args.session):
+            if record["k"] == "in":
+                print(f"[{time.ctime(record['t'])}] > {record['x']}")
+            elif record["k"] == "out":
+                print(record["x"], end="")
+            else:
+                print(f"[{time.ctime(record['t'])}] {record['x']} records lost")
+        return
+
+    ddb, error = load_database(args.input_path)
+    if error is not None:
+        sys.exit(f"Invalid Database: {error}")
+
+    sink = GAC_TranscriptSink(
+        args.log_dir, max_bytes=args.max_bytes, max_files=max(1, args.max_files)
+    )
+    try:
+        io = IoTranscriptGAC(32, sink, args.session)
+        interpreter = GAC_Interpreter(ddb, io)
+        if not interpreter.start_adventure(validated=True):
+            sys.exit("Invalid Database")
+        interpreter.run()
+    finally:
+        sink.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# MIT License
+#
+# Copyright (c) 2025 Cronomantic
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+# Map of the rooms of a GAC adventure.
+#
+# Builds the graph of the connection tables and precomputes the shortest
+# path between every pair of rooms, so paths are looked up, not searched.
+# Moves made by the conditions (GOTO) aren't part of the graph.
+
+import sys
+import os
+import argparse
+import gettext
+import json
+from collections import deque
+
+from runGAC import exit_table, load_database
+
+
+class GAC_RoomGraph(object):
+    """Room graph with reachability and all-pairs shortest paths."""
+
+    def __init__(self, connections, start=None):
+        # connections: room -> {direction: destination}
+        self.connections = connections
+        self.start = start
+        self.rooms = set(connections)
+        for table in connections.values():
+            self.rooms.update(table.values())
+        # next_step[a][b] = (direction, room) of the first move from a to b
+        self.next_step = {}
+        self.distance = {}
+        for room in self.rooms:
+            self.next_step[room], self.distance[room] = self.__search(room)
+
+    @classmethod
+    def from_database(cls, ddb):
+        return cls(
+            {int(k): exit_table(v["exits"]) for k, v in ddb["locations"].items()},
+            ddb["init_loc"],
+        )
+
+    def __search(self, origin):
+        # Breadth-first search, remembering the first move of every path
+        first = {}
+        distance = {origin: 0}
+        pending = deque([origin])
+        while len(pending) > 0:
+            room = pending.popleft()
+            for direction, dest in self.connections.get(room, {}).items():
+                if dest in distance:
+                    continue
+                distance[dest] = distance[room] + 1
+                first[dest] = first[room] if room != origin else (direction, dest)
+                pending.append(dest)
+        return first, distance
+
+    def missing(self):
+        # Destinations that aren't defined rooms
+        return sorted(self.rooms - set(self.connections))
+
+    def reachable(self, origin=None):
+        origin = self.start if origin is None else origin
+        return sorted(self.distance.get(origin, {origin: 0}))
+
+    def unreachable(self):
+        reachable = self.distance.get(self.start, {})
+        return sorted(x for x in self.connections if x not in reachable)
+
+    def traps(self):
+        # Rooms reachable from the start with no way back to it
+        return sorted(
+            x
+            for x in self.distance.get(self.start, {})
+            if self.start not in self.distance[x]
+        )
+
+    def path(self, origin, dest):
+        """Moves from origin to dest as a list of (direction, room), or
+        None if dest can't be reached."""
+        if dest not in self.distance.get(origin, {}):
+            return None
+        path = []
+        room = origin
+        while room != dest:
+            step = self.next_step[room][dest]
+            path.append(step)
+            room = step[1]
+        return path
+
+    def to_dot(self, names={}, descriptions={}):
+        # Graphviz graph. names: direction -> word, descriptions: room -> text
+        lines = ["digraph GAC {", "  node [shape=box];"]
+        missing = set(self.missing())
+        for room in sorted(self.rooms):
+            label = str(room)
+            desc = descriptions.get(room, "")
+            if desc:
+                label += "\\n" + json.dumps(desc[0:24])[1:-1]
+            attrs = f'label="{label}"'
+            if room in missing:
+                attrs += ", style=dashed"
+            elif room == self.start:
+                attrs += ", style=bold"
+            lines.append(f"  {room} [{attrs}];")
+        for room, table in sorted(self.connections.items()):
+            for direction, dest in table.items():
+                label = names.get(direction, str(direction))
+                lines.append(f'  {room} -> {dest} [label="{label}"];')
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+
+def direction_names(ddb):
+    # First verb of each id
+    names = {}
+    for k, v in ddb["verbs"].items():
+        names.setdefault(v, k)
+    return names
+
+
+def file_path(string):
+    """_summary_
+
+    Args:
+        string (_type_): _description_
+
+    Raises:
+        FileNotFoundError: _description_
+
+    Returns:
+        _type_: _description_
+    """
+    if os.path.isfile(string):
+        return string
+    else:
+        raise FileNotFoundError(string)
+
+
+def main():
+    if sys.version_info[0] < 3:  # Python 2
+        sys.exit(_("ERROR: Invalid python version"))
+
+    version = "1.0.0"
+    program = "GAC room map " + version
+    exec = "mapGAC"
+
+    gettext.bindtextdomain(
+        exec, os.path.join(os.path.abspath(os.path.dirname(__file__)), "locale")
+    )
+    gettext.textdomain(exec)
+    _ = gettext.gettext
+
+    arg_parser = argparse.ArgumentParser(sys.argv[0], description=program)
+    arg_parser.add_argument(
+        "input_path",
+        type=file_path,
+        metavar=_("INPUT_FILE"),
+        help=_("JSON database file"),
+    )
+    arg_parser.add_argument(
+        "--dot",
+        metavar=_("DOT_FILE"),
+        help=_("write the map as a Graphviz file"),
+    )
+    arg_parser.add_argument(
+        "--path",
+        type=int,
+        nargs=2,
+        metavar=("FROM", "TO"),
+        help=_("print the shortest path between two rooms"),
+    )
+
+    try:
+        args = arg_parser.parse_args()
+    except FileNotFoundError as f1:
+        sys.exit(_("ERROR: File not found:") + f"{f1}")
+
+    ddb, error = load_database(args.input_path)
+    if error is not None:
+        sys.exit(f"Invalid Database: {error}")
+
+    graph = GAC_RoomGraph.from_database(ddb)
+    names = direction_names(ddb)
+
+    if args.path:
+        path = graph.path(*args.path)
+        if path is None:
+            sys.exit(_("ERROR: No path between the rooms: ") + f"{args.path}")
+        for direction, room in path:
+            print(f"{names.get(direction, direction)} -> {room}")
+        print(f"{len(path)} moves")
+        return
+
+    print(
+        f"{len(graph.connections)} rooms, "
+        f"{sum(len(x) for x in graph.connections.values())} exits, "
+        f"{len(graph.reachable())} reachable from room {graph.start}"
+    )
+    for title, rooms in (
+        ("unreachable", graph.unreachable()),
+        ("no way back", graph.traps()),
+        ("missing", graph.missing()),
+    ):
+        if len(rooms) > 0:
+            print(f"{title}: {' '.join(str(x) for x in rooms)}")
+
+    if args.dot:
+        descriptions = {int(k): v["desc"] for k, v in ddb["locations"].items()}
+        with open(args.dot, "w") as f:
+            f.write(graph.to_dot(names, descriptions))
+
+
+if __name__ == "__main__":
+    main()
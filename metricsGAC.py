@@ -0,0 +1,323 @@
+# MIT License
+#
+# Copyright (c) 2025 Cronomantic
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+# Operational metrics of the interpreters of a process.
+#
+# Every thread running sessions updates its own slot of counters, so the
+# interpreter loop never takes a lock; the slots are only added up when the
+# metrics are read. They are served in the Prometheus text format over HTTP,
+# on a TCP port or a Unix socket.
+
+import sys
+import os
+import argparse
+import gettext
+import bisect
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from runGAC import GAC_Interpreter, IoCallbackGAC, load_database
+
+TABLES = ("hpcs", "lcs", "lpcs")
+
+# Upper bounds of the turn latency histogram, in seconds
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    1.0,
+)
+
+
+class GAC_MetricSlot(object):
+    """Counters of the sessions run by one thread. Only that thread writes
+    them."""
+
+    __slots__ = (
+        "sessions",
+        "turns",
+        "turn_buckets",
+        "turn_time",
+        "table_runs",
+        "table_time",
+        "instructions",
+        "not_understood",
+        "cant_do",
+    )
+
+    def __init__(self):
+        self.sessions = 0
+        self.turns = 0
+        # One more bucket for the turns above the last bound
+        self.turn_buckets = [0 for x in range(len(LATENCY_BUCKETS) + 1)]
+        self.turn_time = 0.0
+        self.table_runs = {k: 0 for k in TABLES}
+        self.table_time = {k: 0.0 for k in TABLES}
+        self.instructions = 0
+        self.not_understood = 0
+        self.cant_do = 0
+
+    def turn(self, seconds):
+        self.turns += 1
+        self.turn_buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.turn_time += seconds
+
+    def conditions(self, table, seconds, instructions):
+        self.table_runs[table] += 1
+        self.table_time[table] += seconds
+        self.instructions += instructions
+
+    def miss(self, not_understood):
+        if not_understood:
+            self.not_understood += 1
+        else:
+            self.cant_do += 1
+
+
+class GAC_Metrics(object):
+    """Metrics of the interpreters of a process, with a slot per thread."""
+
+    def __init__(self):
+        self.local = threading.local()
+        self.slots = []
+        self.slots_lock = threading.Lock()  # Only taken to add a slot
+        self.gauges = []
+
+    def slot(self):
+        slot = getattr(self.local, "slot", None)
+        if slot is None:
+            slot = GAC_MetricSlot()
+            self.local.slot = slot
+            with self.slots_lock:
+                self.slots.append(slot)
+        return slot
+
+    def gauge(self, name, help, func):
+        # Value read from func() every time the metrics are rendered
+        self.gauges.append((name, help, func))
+
+    def render(self):
+        """Metrics in the Prometheus text exposition format."""
+        with self.slots_lock:
+            slots = list(self.slots)
+        lines = []
+
+        def metric(name, kind, help, samples):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in samples:
+                labels = ",".join(f'{k}="{v}"' for k, v in labels)
+                labels = "{" + labels + "}" if labels else ""
+                lines.append(f"{name}{suffix}{labels} {value}")
+
+        metric(
+            "gac_sessions_active",
+            "gauge",
+            "Sessions running.",
+            [("", (), sum(x.sessions for x in slots))],
+        )
+        metric(
+            "gac_turns_total",
+            "counter",
+            "Commands processed.",
+            [("", (), sum(x.turns for x in slots))],
+        )
+        buckets = []
+        count = 0
+        for n, bound in enumerate(LATENCY_BUCKETS + ("+Inf",)):
+            count += sum(x.turn_buckets[n] for x in slots)
+            buckets.append(("_bucket", (("le", bound),), count))
+        metric(
+            "gac_turn_seconds",
+            "histogram",
+            "Time from a command to the next prompt.",
+            buckets
+            + [
+                ("_sum", (), sum(x.turn_time for x in slots)),
+                ("_count", (), count),
+            ],
+        )
+
+        def per_table(attr):
+            return [
+                ("", (("table", k),), sum(getattr(x, attr)[k] for x in slots))
+                for k in TABLES
+            ]
+
+        metric(
+            "gac_conditions_seconds_total",
+            "counter",
+            "Time running each condition table.",
+            per_table("table_time"),
+        )
+        metric(
+            "gac_conditions_runs_total",
+            "counter",
+            "Runs of each condition table.",
+            per_table("table_runs"),
+        )
+        metric(
+            "gac_instructions_total",
+            "counter",
+            "Condition instructions executed, not counting the skipped ones.",
+            [("", (), sum(x.instructions for x in slots))],
+        )
+        metric(
+            "gac_parser_misses_total",
+            "counter",
+            "Commands answered with NOTUNDERSTAND or CANTDO.",
+            [
+                (
+                    "",
+                    (("message", "notunderstand"),),
+                    sum(x.not_understood for x in slots),
+                ),
+                ("", (("message", "cantdo"),), sum(x.cant_do for x in slots)),
+            ],
+        )
+        for name, help, func in self.gauges:
+            metric(name, "gauge", help, [("", (), func())])
+        return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return str(self.client_address[0]) if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        pass
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve_metrics(metrics, address):
+    """Serves the metrics in a background thread.
+
+    address is "host:port", ":port" or "unix:<path>". Returns the server,
+    which is stopped with shutdown().
+    """
+    if address.startswith("unix:"):
+        path = address[5:]
+        if os.path.exists(path):
+            os.remove(path)
+        server = UnixHTTPServer(path, MetricsHandler)
+    else:
+        host, sep, port = address.rpartition(":")
+        server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), MetricsHandler)
+        server.daemon_threads = True
+    server.metrics = metrics
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def file_path(string):
+    """_summary_
+
+    Args:
+        string (_type_): _description_
+
+    Raises:
+        FileNotFoundError: _description_
+
+    Returns:
+        _type_: _description_
+    """
+    if os.path.isfile(string):
+        return string
+    else:
+        raise FileNotFoundError(string)
+
+
+def main():
+    if sys.version_info[0] < 3:  # Python 2
+        sys.exit(_("ERROR: Invalid python version"))
+
+    version = "1.0.0"
+    program = "GAC metrics " + version
+    exec = "metricsGAC"
+
+    gettext.bindtextdomain(
+        exec, os.path.join(os.path.abspath(os.path.dirname(__file__)), "locale")
+    )
+    gettext.textdomain(exec)
+    _ = gettext.gettext
+
+    arg_parser = argparse.ArgumentParser(sys.argv[0], description=program)
+    arg_parser.add_argument(
+        "input_path",
+        type=file_path,
+        metavar=_("INPUT_FILE"),
+        help=_("JSON database file"),
+    )
+    arg_parser.add_argument(
+        "address",
+        metavar=_("ADDRESS"),
+        help=_("where to serve the metrics: HOST:PORT, :PORT or unix:PATH"),
+    )
+
+    try:
+        args = arg_parser.parse_args()
+    except FileNotFoundError as f1:
+        sys.exit(_("ERROR: File not found:") + f"{f1}")
+
+    ddb, error = load_database(args.input_path)
+    if error is not None:
+        sys.exit(f"Invalid Database: {error}")
+
+    metrics = GAC_Metrics()
+    try:
+        server = serve_metrics(metrics, args.address)
+    except (OSError, ValueError) as e:
+        sys.exit(_("ERROR: ") + f"{e}")
+    try:
+        interpreter = GAC_Interpreter(ddb, IoCallbackGAC(32), metrics=metrics)
+        if not interpreter.start_adventure(validated=True):
+            sys.exit("Invalid Database")
+        interpreter.run()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+# MIT License
+#
+# Copyright (c) 2025 Cronomantic
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+# Monte-Carlo playtester.
+#
+# Plays many seeded sessions in parallel typing random commands. Words whose
+# commands reached a new room, printed a new text or set a new flag get more
+# weight in the following rounds. Sessions that crash the interpreter are
+# shrunk to a minimal list of commands and saved as event logs that runGAC
+# can replay.
+
+import sys
+import os
+import argparse
+import gettext
+import time
+import random
+import zlib
+import traceback
+import multiprocessing
+
+from runGAC import (
+    GAC_Interpreter,
+    GAC_EventLog,
+    IoHeadlessGAC,
+    load_database,
+    vocabulary_words,
+)
+
+WIDTH = 32
+BONUS = 1.0  # Weight added to a word each time it finds something new
+
+# Worker process state
+_ddb = None
+
+
+class IoPlayGAC(IoHeadlessGAC):
+    """Headless IO that types random commands and tracks the coverage
+    reached by each one of them.
+
+    inputs holds every line typed, answers to questions included, so the
+    session can be replayed. finds holds (coverage keys, words) for the
+    commands that reached something not in coverage yet.
+    """
+
+    def __init__(self, width, rng, verbs, nouns, weights, max_turns, coverage):
+        super().__init__(width)
+        self.rng = rng
+        self.verbs = verbs
+        self.nouns = nouns
+        self.verb_weights = [weights.get(x, 1.0) for x in verbs]
+        self.noun_weights = [weights.get(x, 1.0) for x in nouns]
+        self.max_turns = max_turns
+        self.coverage = coverage
+        self.interpreter = None
+        self.inputs = []
+        self.finds = []
+        self.last_words = ()
+
+    def __update_coverage(self):
+        found = []
+        interpreter = self.interpreter
+        key = ("room", interpreter.current_loc)
+        if key not in self.coverage:
+            found.append(key)
+        for n, flag in enumerate(interpreter.flags):
+            if flag and ("flag", n) not in self.coverage:
+                found.append(("flag", n))
+        for txt in self.output:
+            key = ("text", zlib.crc32(txt.encode("utf-8")))
+            if key not in self.coverage:
+                found.append(key)
+        self.output = []
+        if found:
+            self.coverage.update(found)
+            self.finds.append((found, self.last_words))
+
+    def input(self):
+        if not self.interpreter.prompting:
+            # Answer to questions such as the one of QUIT
+            self.inputs.append("N")
+            return "N"
+        self.__update_coverage()
+        if self.turns >= self.max_turns:
+            return "*QUIT"
+        self.turns += 1
+        verb = self.rng.choices(self.verbs, self.verb_weights)[0]
+        if self.rng.random() < 0.75:
+            noun = self.rng.choices(self.nouns, self.noun_weights)[0]
+            self.last_words = (verb, noun)
+            txt = f"{verb} {noun}"
+        else:
+            self.last_words = (verb,)
+            txt = verb
+        self.inputs.append(txt)
+        return txt
+
+
+def file_path(string):
+    """_summary_
+
+    Args:
+        string (_type_): _description_
+
+    Raises:
+        FileNotFoundError: _description_
+
+    Returns:
+        _type_: _description_
+    """
+    if os.path.isfile(string):
+        return string
+    else:
+        raise FileNotFoundError(string)
+
+
+def crash_signature(e):
+    frame = traceback.extract_tb(e.__traceback__)[-1]
+    where = f"{os.path.basename(frame.filename)}:{frame.lineno}"
+    return f"{type(e).__name__}: {e} at {where}"
+
+
+def replay(ddb, seed, inputs, event_log=None):
+    # Plays a fixed list of commands. Returns the crash signature or None.
+    io = IoHeadlessGAC(WIDTH, inputs)
+    interpreter = GAC_Interpreter(ddb, io, seed=seed, event_log=event_log)
+    interpreter.start_adventure(validated=True)
+    try:
+        interpreter.run()
+    except Exception as e:
+        return crash_signature(e)
+    return None
+
+
+def shrink(ddb, seed, inputs, signature):
+    # Delta debugging: remove chunks of commands while the crash persists
+    chunk = max(1, len(inputs) // 2)
+    while chunk > 0:
+        pos = 0
+        while pos < len(inputs):
+            candidate = inputs[0:pos] + inputs[pos + chunk :]
+            if replay(ddb, seed, candidate) == signature:
+                inputs = candidate
+            else:
+                pos += chunk
+        chunk >>= 1
+    return inputs
+
+
+def init_worker(ddb):
+    global _ddb
+    _ddb = ddb
+
+
+def play_batch(task):
+    # Returns the finds of every session, as (coverage keys, words)
+    seeds, verbs, nouns, weights, max_turns, coverage = task
+    coverage = set(coverage)
+    finds = []
+    crashes = []
+    turns = 0
+    for seed in seeds:
+        rng = random.Random(seed)
+        io = IoPlayGAC(WIDTH, rng, verbs, nouns, weights, max_turns, coverage)
+        interpreter = GAC_Interpreter(_ddb, io, seed=seed)
+        io.interpreter = interpreter
+        if not interpreter.start_adventure(validated=True):
+            raise ValueError("Invalid Database")
+        try:
+            interpreter.run()
+        except Exception as e:
+            crashes.append((seed, io.inputs, crash_signature(e)))
+        turns += io.turns
+        finds += io.finds
+    return finds, crashes, turns
+
+
+def main():
+    if sys.version_info[0] < 3:  # Python 2
+        sys.exit(_("ERROR: Invalid python version"))
+
+    version = "1.0.0"
+    program = "GAC random playtester " + version
+    exec = "playGAC"
+
+    gettext.bindtextdomain(
+        exec, os.path.join(os.path.abspath(os.path.dirname(__file__)), "locale")
+    )
+    gettext.textdomain(exec)
+    _ = gettext.gettext
+
+    arg_parser = argparse.ArgumentParser(sys.argv[0], description=program)
+    arg_parser.add_argument(
+        "input_path",
+        type=file_path,
+        metavar=_("INPUT_FILE"),
+        help=_("JSON database file"),
+    )
+    arg_parser.add_argument(
+        "-n",
+        "--sessions",
+        type=int,
+        default=1000,
+        help=_("number of sessions to play"),
+    )
+    arg_parser.add_argument(
+        "-t",
+        "--turns",
+        type=int,
+        default=200,
+        help=_("commands typed in each session"),
+    )
+    arg_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help=_("number of worker processes"),
+    )
+    arg_parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help=_("seed of the first session"),
+    )
+    arg_parser.add_argument(
+        "--crash-dir",
+        default="crashes",
+        metavar=_("CRASH_DIR"),
+        help=_("directory for the event logs of the crashing sessions"),
+    )
+
+    try:
+        args = arg_parser.parse_args()
+    except FileNotFoundError as f1:
+        sys.exit(_("ERROR: File not found:") + f"{f1}")
+
+    ddb, error = load_database(args.input_path)
+    if error is not None:
+        sys.exit(f"Invalid Database: {error}")
+
+    verbs = vocabulary_words(ddb["verbs"])
+    nouns = vocabulary_words(ddb["nouns"])
+    if len(verbs) == 0 or len(nouns) == 0:
+        sys.exit(_("ERROR: Empty vocabulary"))
+
+    jobs = max(1, args.jobs)
+    weights = {}
+    coverage = set()
+    crashes = {}
+    turns = 0
+    seed = args.seed
+    last_seed = args.seed + args.sessions
+    start = time.perf_counter()
+    with multiprocessing.Pool(jobs, init_worker, (ddb,)) as pool:
+        # Every round plays a batch in each worker, then weights are updated
+        batch = max(1, min(50, args.sessions // (jobs * 4)))
+        while seed < last_seed:
+            # Workers start from the coverage so far, and their finds are
+            # checked again: another worker may have found them first
+            tasks = []
+            for n in range(jobs):
+                seeds = list(range(seed, min(seed + batch, last_seed)))
+                seed += len(seeds)
+                if len(seeds) > 0:
+                    tasks.append(
+                        (seeds, verbs, nouns, weights, args.turns, frozenset(coverage))
+                    )
+            for finds, crash_list, n in pool.imap_unordered(play_batch, tasks):
+                turns += n
+                for keys, words in finds:
+                    new = [k for k in keys if k not in coverage]
+                    if len(new) > 0:
+                        coverage.update(new)
+                        for word in words:
+                            weights[word] = weights.get(word, 1.0) + BONUS
+                for s, inputs, signature in crash_list:
+                    if signature not in crashes:
+                        crashes[signature] = (s, inputs)
+    elapsed = time.perf_counter() - start
+
+    rooms = sum(1 for x in coverage if x[0] == "room")
+    flags = sum(1 for x in coverage if x[0] == "flag")
+    texts = sum(1 for x in coverage if x[0] == "text")
+    print(
+        f"{args.sessions} sessions, {turns} turns in {elapsed:.3f}s "
+        f"({turns / elapsed:.0f} turns/s)"
+    )
+    print(f"coverage: {rooms} rooms, {flags} flags, {texts} texts")
+
+    if len(crashes) > 0:
+        os.makedirs(args.crash_dir, exist_ok=True)
+    for n, (signature, (s, inputs)) in enumerate(sorted(crashes.items())):
+        inputs = shrink(ddb, s, inputs, signature)
+        event_log = GAC_EventLog()
+        replay(ddb, s, inputs, event_log)
+        path = os.path.join(args.crash_dir, f"crash-{n}.gaclog")
+        event_log.save(path)
+        print(f"{signature}: {len(inputs)} commands, seed {s} -> {path}")
+
+    if len(crashes) > 0:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
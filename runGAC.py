@@ -26,16 +26,76 @@ import argparse
 import gettext
 import json
 import random
+import struct
+import hashlib
+import gzip
+import array
+import itertools
 import platform
 import threading
+import time
+import re
+import tracemalloc
+from io import BytesIO
+from collections import OrderedDict, deque
+
+try:
+    from compression import zstd  # Python 3.14+
+except ImportError:
+    zstd = None
 
 if platform.system() == "Windows":
-    import time
     import msvcrt
 else:
     from select import select
 
 
+class GAC_Object(object):
+    __slots__ = ("weight", "initial_loc", "name", "loc")
+
+    def __init__(self, weight, initial_loc, name):
+        self.weight = weight
+        self.initial_loc = initial_loc
+        self.name = name
+        self.loc = initial_loc
+
+
+class GAC_Location(object):
+    __slots__ = ("graphic_id", "desc", "exits", "connections")
+
+    def __init__(self, graphic_id, desc, exits):
+        self.graphic_id = graphic_id
+        self.desc = desc
+        self.exits = exits
+        self.connections = exit_table(exits)
+
+
+def exit_table(exits):
+    # Direction -> destination. GAC takes the first exit of a direction.
+    table = {}
+    for exit in exits:
+        table.setdefault(exit["dir"], exit["dest"])
+    return table
+
+
+def resolve_word(words, word):
+    # Same matching rules as the interpreter: the typed word may be a prefix
+    word = word.upper()
+    for k, v in words.items():
+        if k.upper()[0 : len(word)] == word:
+            return v
+    return 0
+
+
+def vocabulary_words(words):
+    # One word for each id, the one the parser would match
+    res = {}
+    for k, v in words.items():
+        if v not in res and resolve_word(words, k) == v:
+            res[v] = k
+    return [res[k] for k in sorted(res)]
+
+
 def file_path(string):
     """_summary_
 
@@ -54,6 +114,315 @@ def file_path(string):
         raise FileNotFoundError(string)
 
 
+# Database validation. Each checker returns None when the value is valid or
+# the path, relative to the value, of the first invalid entry.
+
+
+def _check_str(v):
+    return None if isinstance(v, str) else ""
+
+
+def _check_int(v):
+    return None if isinstance(v, int) else ""
+
+
+def _check_str_list(v):
+    if not isinstance(v, list):
+        return ""
+    for n, x in enumerate(v):
+        if not isinstance(x, str):
+            return f"{n}"
+    return None
+
+
+def _check_font(v):
+    if not isinstance(v, list):
+        return ""
+    if len(v) == 0:
+        return None
+    if len(v) != 128 * 8:
+        return "len"
+    # Loaded as bytes by the interpreter
+    for n, x in enumerate(v):
+        if type(x) is not int or x < 0 or x > 255:
+            return f"{n}"
+    return None
+
+
+def _check_words(v):
+    if not isinstance(v, dict):
+        return ""
+    for k, x in v.items():
+        if not isinstance(x, int):
+            return k
+    return None
+
+
+def _check_table(check_entry, max_id=None):
+    # Dictionary with decimal string keys, up to max_id if given
+    def check(v):
+        if not isinstance(v, dict):
+            return ""
+        for k, x in v.items():
+            if not k.isdecimal() or (max_id is not None and int(k) > max_id):
+                return k
+            err = check_entry(x)
+            if err is not None:
+                return f"{k}/{err}" if err else k
+        return None
+
+    return check
+
+
+def _check_record(fields):
+    # Dictionary with a subset of the given fields
+    def check(v):
+        if not isinstance(v, dict):
+            return ""
+        for k, x in v.items():
+            check_field = fields.get(k)
+            if check_field is None:
+                return k
+            err = check_field(x)
+            if err is not None:
+                return f"{k}/{err}" if err else k
+        return None
+
+    return check
+
+
+def _check_list_of(check_entry):
+    def check(v):
+        if not isinstance(v, list):
+            return ""
+        for n, x in enumerate(v):
+            err = check_entry(x)
+            if err is not None:
+                return f"{n}/{err}" if err else f"{n}"
+        return None
+
+    return check
+
+
+def _check_instruction(v):
+    # Opcode name followed by integer operands
+    if not isinstance(v, list) or len(v) == 0 or not isinstance(v[0], str):
+        return ""
+    for n, x in enumerate(v[1:]):
+        if not isinstance(x, int):
+            return f"{n + 1}"
+    return None
+
+
+def _check_model(v):
+    return None if v in ("SPECTRUM",) else ""
+
+
+_check_code = _check_list_of(_check_instruction)
+
+DDB_SCHEMA = {
+    "font": _check_font,
+    "verbs": _check_words,
+    "nouns": _check_words,
+    "adverbs": _check_words,
+    # Messages and objects are stored in tables indexed by their 8 bit id
+    "messages": _check_table(_check_str, 255),
+    "objects": _check_table(
+        _check_record(
+            {"weight": _check_int, "initial_loc": _check_int, "name": _check_str}
+        ),
+        255,
+    ),
+    "locations": _check_table(
+        _check_record(
+            {
+                "graphic_id": _check_int,
+                "desc": _check_str,
+                "exits": _check_list_of(
+                    _check_record({"dir": _check_int, "dest": _check_int})
+                ),
+            }
+        )
+    ),
+    "hpcs": _check_code,
+    "lpcs": _check_code,
+    "lcs": _check_table(_check_code),
+    "gfx": _check_table(_check_code),
+    "model": _check_model,
+    "separators": _check_str_list,
+    "pronouns": _check_str_list,
+    "punctuation": _check_str_list,
+    "init_loc": _check_int,
+    "no_objs_msg": _check_str,
+}
+
+# Bump when DDB_SCHEMA changes, so cached validations are redone
+DDB_SCHEMA_VERSION = 4
+
+
+def intern_code(code, instructions):
+    # Instructions become tuples with an interned opcode name. Repeated
+    # instructions, such as ["PUSH", 1] or ["AND"], end up as a single object,
+    # the first one found in the instructions dictionary of the database.
+    res = []
+    for inst in code:
+        key = tuple(inst)
+        try:
+            shared = instructions.get(key)
+        except TypeError:
+            shared = key  # Unhashable operands, left to the interpreter
+        if shared is None:
+            if len(key) > 0 and isinstance(key[0], str):
+                shared = (sys.intern(key[0]),) + key[1:]
+            else:
+                shared = key  # Not an opcode, reported when it runs
+            instructions[key] = shared
+        res.append(shared)
+    return tuple(res)
+
+
+def intern_words(words):
+    return {sys.intern(k): v for k, v in words.items()}
+
+
+def deep_sizeof(obj, seen):
+    # Size of obj and everything it references, skipping the objects in seen
+    size = 0
+    pending = [obj]
+    while len(pending) > 0:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            pending.extend(obj)
+        elif hasattr(obj, "__slots__"):
+            pending.extend(getattr(obj, x) for x in obj.__slots__ if hasattr(obj, x))
+    return size
+
+
+def validate_database(ddb):
+    """Checks the structure of a JSON database in a single pass.
+
+    Returns None if it is valid, or the path of the first invalid entry,
+    such as "locations/12/exits/0/dest".
+    """
+    if not isinstance(ddb, dict):
+        return ""
+    for k in ddb.keys():
+        if k not in DDB_SCHEMA:
+            return k
+    for k, check in DDB_SCHEMA.items():
+        if k not in ddb:
+            return k
+        err = check(ddb[k])
+        if err is not None:
+            return f"{k}/{err}" if err else k
+    return None
+
+
+# Sections keyed by id or word, compared entry by entry on reload
+TABLE_SECTIONS = (
+    "verbs",
+    "nouns",
+    "adverbs",
+    "messages",
+    "objects",
+    "locations",
+    "lcs",
+    "gfx",
+)
+
+
+def database_digests(ddb):
+    # Digest of every entry of the tables and of each other section
+    def digest(v):
+        return hashlib.blake2b(
+            json.dumps(v, sort_keys=True).encode(), digest_size=8
+        ).digest()
+
+    return {
+        k: {i: digest(x) for i, x in v.items()} if k in TABLE_SECTIONS else digest(v)
+        for k, v in ddb.items()
+    }
+
+
+def database_changes(old, new):
+    """Summary of what changed between two database_digests(), as a list
+    such as ["messages: 2 changed, 1 added", "hpcs"]."""
+    changes = []
+    for k, v in new.items():
+        if k not in TABLE_SECTIONS:
+            if old.get(k) != v:
+                changes.append(k)
+            continue
+        before = old.get(k, {})
+        counts = [
+            (sum(1 for i in v if i in before and before[i] != v[i]), "changed"),
+            (sum(1 for i in v if i not in before), "added"),
+            (sum(1 for i in before if i not in v), "removed"),
+        ]
+        counts = [f"{n} {what}" for n, what in counts if n > 0]
+        if counts:
+            changes.append(f"{k}: {', '.join(counts)}")
+    return changes
+
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Raised by files that can't be read, decompressed or parsed
+LOAD_ERRORS = (OSError, EOFError, ValueError)
+if zstd is not None:
+    LOAD_ERRORS += (zstd.ZstdError,)
+
+
+def load_database(path):
+    """Loads a JSON database, optionally gzip or zstd compressed, and
+    validates it.
+
+    The hash of every file that passes validation is kept in a sidecar
+    file (path + ".valid"), so unchanged databases skip the check the next
+    time. Returns (ddb, error) where error is None for valid databases;
+    ddb is None too if the file can't be read.
+    """
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        if raw.startswith(GZIP_MAGIC):
+            with gzip.GzipFile(fileobj=BytesIO(raw)) as f:
+                ddb = json.load(f)
+        elif raw.startswith(ZSTD_MAGIC):
+            if zstd is None:
+                raise ValueError("zstd databases need Python 3.14 or later")
+            with zstd.ZstdFile(BytesIO(raw)) as f:
+                ddb = json.load(f)
+        else:
+            ddb = json.loads(raw)
+    except LOAD_ERRORS as e:
+        return None, f"{e}"
+    digest = f"{DDB_SCHEMA_VERSION}:{hashlib.blake2b(raw).hexdigest()}"
+    cache_path = path + ".valid"
+    try:
+        with open(cache_path) as f:
+            if f.read() == digest:
+                return ddb, None
+    except OSError:
+        pass
+    error = validate_database(ddb)
+    if error is None:
+        try:
+            with open(cache_path, "w") as f:
+                f.write(digest)
+        except OSError:
+            pass  # Read-only location, validate again next time
+    return ddb, error
+
+
 class GAC_Interpreter:
 
     # Standard message numbers
@@ -86,7 +455,17 @@ class GAC_Interpreter:
     LAMP_FLAG = 2
     SCORE_DIS_FLAG = 3
 
-    def __init__(self, ddb, io):
+    # Messages and objects are stored in lists indexed by their 8 bit id
+    ID_RANGE = range(0, 256)
+
+    # Layout of the snapshots returned by get_state()
+    STATE_HEADER = struct.Struct("<?ii")
+    STATE_PARSER = struct.Struct("<5i")
+    # Mersenne Twister state of the RNG: gauss_next and the 625 words
+    STATE_RNG = struct.Struct("<?d625I")
+    FLAG_BITS = [1 << n for n in range(0, 256)]
+
+    def __init__(self, ddb, io, seed=None, event_log=None, metrics=None):
         self.ddb = ddb
         self.counters = [0 for x in range(0, 128)]
         self.flags = [False for x in range(0, 256)]
@@ -117,236 +496,148 @@ class GAC_Interpreter:
         self.ready = False
         self.show_exits = False
         self.old_noun = 0
+        self.prompting = False
+        self.error = None
+        self.recent_inputs = OrderedDict()
         self._running = False
         self._lock = threading.Lock()
+        # Each session owns its RNG, so runs with the same seed are repeatable
+        self.rng = random.Random(seed)
+        self.event_log = event_log
+        # Optional GAC_Metrics (see metricsGAC) and the instructions executed
+        # by the last condition table, not counting the skipped ones
+        self.metrics = metrics
+        self.steps = 0
+        # Hot reload (see watch): compiled database waiting for the next
+        # turn, the digests of the one in use and the last changes applied
+        self.pending_reload = None
+        self.reload_digests = None
+        self.reload_report = None
+        self._watch_stop = None
+
+    def __parse_database(self):
+        self.__dict__.update(self.compile_database(self.ddb))
+
+    @classmethod
+    def compile_database(cls, ddb):
+        # Attributes of the interpreter built from a database. The result
+        # doesn't depend on the session, so it can be built in another
+        # thread and swapped in (see watch), or shared by several sessions
+        # (see use_database).
+        db = {}
+        # Nothing here references the JSON lists of instructions or the
+        # font, so they are freed along with the raw database.
+        db["font"] = bytes(ddb["font"])
+        db["verbs"] = intern_words(ddb["verbs"])
+        db["nouns"] = intern_words(ddb["nouns"])
+        db["adverbs"] = intern_words(ddb["adverbs"])
+        # Missing ids are None. Ids out of the 8 bit range can't be used by
+        # the opcodes, so they are left out.
+        db["messages"] = [None for x in cls.ID_RANGE]
+        for k, v in ddb["messages"].items():
+            if int(k) in cls.ID_RANGE:
+                db["messages"][int(k)] = sys.intern(v)
+        db["objects"] = [None for x in cls.ID_RANGE]
+        for k, v in ddb["objects"].items():
+            if int(k) in cls.ID_RANGE:
+                db["objects"][int(k)] = GAC_Object(
+                    v["weight"], v["initial_loc"], sys.intern(v["name"])
+                )
+        # Objects in id order, for the opcodes that go through all of them
+        db["object_list"] = tuple(x for x in db["objects"] if x is not None)
+        db["locations"] = {
+            int(k): GAC_Location(v["graphic_id"], sys.intern(v["desc"]), v["exits"])
+            for (k, v) in ddb["locations"].items()
+        }
+        # Repeated instructions of this database. It is dropped once compiled,
+        # so nothing keeps other databases alive.
+        instructions = {}
+        db["hpcs"] = intern_code(ddb["hpcs"], instructions)
+        db["lpcs"] = intern_code(ddb["lpcs"], instructions)
+        db["lcs"] = {
+            int(k): intern_code(v, instructions) for (k, v) in ddb["lcs"].items()
+        }
+        db["model"] = ddb["model"]
+        db["gfx"] = {
+            int(k): intern_code(v, instructions) for (k, v) in ddb["gfx"].items()
+        }
+        db["separators"] = ddb["separators"]
+        db["punctuation"] = ddb["punctuation"]
+        db["pronouns"] = [x.upper() for x in ddb["pronouns"]]
+        db["init_loc"] = ddb["init_loc"]
+        db["no_objs_msg"] = ddb["no_objs_msg"]
+        # Statements end at any separator or punctuation but the space
+        separators = [x for x in db["separators"] + db["punctuation"] if x != " "]
+        db["split_statements"] = re.compile(
+            "|".join(re.escape(x) for x in separators + ["."])
+        ).split
+        db["verb_index"] = cls.__word_index(db["verbs"])
+        db["noun_index"] = cls.__word_index(db["nouns"])
+        db["adverb_index"] = cls.__word_index(db["adverbs"])
+        db["recent_inputs"] = OrderedDict()
+        return db
 
-    def __check_ddb(ddb):
-        default_keys = set(
-            [
+    def use_database(self, db):
+        """Starts from a database already compiled by compile_database(),
+        instead of the JSON one. The objects hold the state of the session,
+        so it gets its own copies of them."""
+        db = dict(db)
+        db["objects"] = [
+            None if x is None else GAC_Object(x.weight, x.initial_loc, x.name)
+            for x in db["objects"]
+        ]
+        db["object_list"] = tuple(x for x in db["objects"] if x is not None)
+        db["recent_inputs"] = OrderedDict()
+        self.__dict__.update(db)
+        self.ddb = None
+
+    @staticmethod
+    def __word_index(word_dictionary):
+        # The real interpreter cuts the found words until it finds a match,
+        # so every prefix of a word maps to the first word starting with it
+        index = {}
+        for k, v in word_dictionary.items():
+            k = k.upper()
+            for n in range(1, len(k) + 1):
+                index.setdefault(k[0:n], v)
+        return index
+
+    def memory_report(self):
+        """Bytes used by each section of the parsed database, as a list of
+        (section, size). Objects shared by several sections count once."""
+        seen = set()
+        return [
+            (name, deep_sizeof(getattr(self, name), seen))
+            for name in (
                 "font",
                 "verbs",
                 "nouns",
                 "adverbs",
+                "verb_index",
+                "noun_index",
+                "adverb_index",
+                "recent_inputs",
+                "pronouns",
                 "messages",
                 "objects",
                 "locations",
                 "hpcs",
                 "lpcs",
                 "lcs",
-                "model",
                 "gfx",
-                "separators",
-                "pronouns",
-                "punctuation",
-                "init_loc",
-                "no_objs_msg",
-            ]
-        )
-        if not isinstance(ddb, dict):
-            return False
-        if set(ddb.keys()) != default_keys:
-            return False
-        for k in default_keys:
-            v = ddb[k]
-            if k == "font":
-                if isinstance(v, list):
-                    if len(v) > 0:
-                        if len(v) != 128 * 8:
-                            return False
-                        elif not isinstance(v[0], int):
-                            return False
-                        elif not all(type(x) == type(v[0]) for x in v):
-                            return False
-                else:
-                    return False
-            elif k == "no_objs_msg":
-                if not isinstance(v, str):
-                    return False
-            elif k == "verbs":
-                if isinstance(v, dict):
-                    for k2, v2 in v.items():
-                        if not isinstance(k2, str) or not isinstance(v2, int):
-                            return False
-                else:
-                    return False
-            elif k == "nouns":
-                if isinstance(v, dict):
-                    for k2, v2 in v.items():
-                        if not isinstance(k2, str) or not isinstance(v2, int):
-                            return False
-                else:
-                    return False
-            elif k == "adverbs":
-                if isinstance(v, dict):
-                    for k2, v2 in v.items():
-                        if not isinstance(k2, str) or not isinstance(v2, int):
-                            return False
-                else:
-                    return False
-            elif k == "messages":
-                if isinstance(v, dict):
-                    for k2, v2 in v.items():
-                        if (
-                            not isinstance(k2, str)
-                            or not isinstance(v2, str)
-                            or not k2.isnumeric()
-                        ):
-                            return False
-                else:
-                    return False
-            elif k == "objects":
-                if isinstance(v, dict):
-                    for k2, v2 in v.items():
-                        if (
-                            not isinstance(k2, str)
-                            or not isinstance(v2, dict)
-                            or not k2.isnumeric()
-                        ):
-                            return False
-                        else:
-                            for k3, v3 in v2.items():
-                                if k3 not in set(["weight", "initial_loc", "name"]):
-                                    return False
-                                elif k3 == "weight":
-                                    if not isinstance(v3, int):
-                                        return False
-                                elif k3 == "initial_loc":
-                                    if not isinstance(v3, int):
-                                        return False
-                                elif k3 == "name":
-                                    if not isinstance(v3, str):
-                                        return False
-                                else:
-                                    return False
-                else:
-                    return False
-            elif k == "locations":
-                if isinstance(v, dict):
-                    for k2, v2 in v.items():
-                        if (
-                            not isinstance(k2, str)
-                            or not isinstance(v2, dict)
-                            or not k2.isnumeric()
-                        ):
-                            return False
-                        else:
-                            for k3, v3 in v2.items():
-                                if k3 not in set(["graphic_id", "desc", "exits"]):
-                                    return False
-                                elif k3 == "graphic_id":
-                                    if not isinstance(v3, int):
-                                        return False
-                                elif k3 == "desc":
-                                    if not isinstance(v3, str):
-                                        return False
-                                elif k3 == "exits":
-                                    if not isinstance(v3, list):
-                                        return False
-                                    for v4 in v3:
-                                        if not isinstance(v4, dict):
-                                            return False
-                                        for k5, v5 in v4.items():
-                                            if k5 not in set(["dir", "dest"]):
-                                                return False
-                                            elif k5 == "dir":
-                                                if not isinstance(v5, int):
-                                                    return False
-                                            elif k5 == "dest":
-                                                if not isinstance(v5, int):
-                                                    return False
-                                            else:
-                                                return False
-                                else:
-                                    return False
-                else:
-                    return False
-            elif k == "hpcs":
-                if not isinstance(v, list) or not all([isinstance(x, list) for x in v]):
-                    return False
-            elif k == "lpcs":
-                if not isinstance(v, list) or not all([isinstance(x, list) for x in v]):
-                    return False
-            elif k == "lcs":
-                if isinstance(v, dict):
-                    for k2, v2 in v.items():
-                        if (
-                            not isinstance(k2, str)
-                            or not isinstance(v2, list)
-                            or not k2.isnumeric()
-                        ):
-                            return False
-                        elif not isinstance(v2[0], list):
-                            return False
-                        elif not all([isinstance(x, list) for x in v2]):
-                            return False
-                else:
-                    return False
-            elif k == "gfx":
-                if isinstance(v, dict):
-                    for k2, v2 in v.items():
-                        if (
-                            not isinstance(k2, str)
-                            or not isinstance(v2, list)
-                            or not k2.isnumeric()
-                        ):
-                            return False
-                        elif not isinstance(v2[0], list):
-                            return False
-                        elif not all([isinstance(x, list) for x in v2]):
-                            return False
-                else:
-                    return False
-            elif k == "punctuation":
-                if not isinstance(v, list):
-                    return False
-                elif not all([isinstance(x, str) for x in v]):
-                    return False
-            elif k == "separators":
-                if not isinstance(v, list):
-                    return False
-                elif not all([isinstance(x, str) for x in v]):
-                    return False
-            elif k == "pronouns":
-                if not isinstance(v, list):
-                    return False
-                elif not all([isinstance(x, str) for x in v]):
-                    return False
-            elif k == "init_loc":
-                if not isinstance(v, int):
-                    return False
-            elif k == "model":
-                if not isinstance(v, str):
-                    return False
-                elif v not in ["SPECTRUM"]:
-                    return False
-            else:
-                return False
-        return True
+            )
+        ]
 
-    def __parse_database(self):
-        self.font = self.ddb["font"]
-        self.verbs = self.ddb["verbs"]
-        self.nouns = self.ddb["nouns"]
-        self.adverbs = self.ddb["adverbs"]
-        self.messages = {int(k): v for (k, v) in self.ddb["messages"].items()}
-        self.objects = {int(k): v for (k, v) in self.ddb["objects"].items()}
-        self.locations = {int(k): v for (k, v) in self.ddb["locations"].items()}
-        self.hpcs = self.ddb["hpcs"]
-        self.lpcs = self.ddb["lpcs"]
-        self.lcs = {int(k): v for (k, v) in self.ddb["lcs"].items()}
-        self.model = self.ddb["model"]
-        self.gfx = {int(k): v for (k, v) in self.ddb["gfx"].items()}
-        self.separators = self.ddb["separators"]
-        self.punctuation = self.ddb["punctuation"]
-        self.pronouns = [x.upper() for x in self.ddb["pronouns"]]
-        self.init_loc = self.ddb["init_loc"]
-        self.no_objs_msg = self.ddb["no_objs_msg"]
-
-    def start_adventure(self):
-        if not self.io or not self.ddb:
-            return False
-        if not GAC_Interpreter.__check_ddb(self.ddb):
+    def start_adventure(self, validated=False):
+        # validated skips the database check, for databases that already
+        # passed it (see load_database)
+        # The database is parsed once, by the first call
+        if not self.io or not (self.ddb or self.locations is not None):
             return False
+        if not validated and self.ddb:
+            self.error = validate_database(self.ddb)
+            if self.error is not None:
+                return False
         if not hasattr(self.io, "separators"):
             return False
         if not hasattr(self.io, "font"):
@@ -359,14 +650,17 @@ class GAC_Interpreter:
             return False
         if not hasattr(self.io, "quit"):
             return False
-        self.__parse_database()
+        if self.ddb:
+            self.__parse_database()
+            # Everything needed is in the parsed copies
+            self.ddb = None
         if self.init_loc == 0:
             return False
         self.io.separators = self.punctuation
         self.io.font = self.font
         self.counters = [0 for x in range(0, 128)]
         self.flags = [False for x in range(0, 256)]
-        self.current_loc = self.ddb["init_loc"]
+        self.current_loc = self.init_loc
         self.stack = []
         self.verb = 0
         self.adverb = 0
@@ -378,49 +672,234 @@ class GAC_Interpreter:
         # Set light on
         self.flags[1] = True
         # set objects to initial locations
-        objs = dict()
-        for k, v in self.objects.items():
-            v["loc"] = v["initial_loc"]
-            objs[k] = v
-        self.objects = objs
+        for obj in self.object_list:
+            obj.loc = obj.initial_loc
         return True
 
-    def __find_word(self, word_dictionary, word):
-        # The real interpreter cuts the found words until it finds a match
-        l = len(word)
-        for k, v in word_dictionary.items():
-            k = k.upper()
-            if len(k) > l:
-                k = k[0:l]
-            if k == word:
-                return v
-        return 0
+    def get_state(self, parser=True):
+        """Compact snapshot of the session, usable as a dictionary key.
+
+        Holds room, strength, counters, flags, the state of the RNG and
+        object locations and, with parser, the words of the last parsed
+        statement.
+        """
+        header = self.STATE_HEADER.pack(parser, self.current_loc, self.max_weight)
+        if parser:
+            header += self.STATE_PARSER.pack(
+                self.verb, self.adverb, self.noun1, self.noun2, self.old_noun
+            )
+        flags = sum(itertools.compress(self.FLAG_BITS, self.flags))
+        version, words, gauss_next = self.rng.getstate()
+        rng = self.STATE_RNG.pack(gauss_next is not None, gauss_next or 0.0, *words)
+        locs = array.array("i", [x.loc for x in self.object_list])
+        return (
+            header
+            + bytes(self.counters)
+            + flags.to_bytes(len(self.flags) >> 3, "little")
+            + rng
+            + locs.tobytes()
+        )
+
+    @classmethod
+    def state_rng_span(cls, state):
+        # Start and end of the RNG state in a get_state() snapshot
+        start = cls.STATE_HEADER.size + 128 + (256 >> 3)  # Counters and flags
+        if cls.STATE_HEADER.unpack_from(state)[0]:
+            start += cls.STATE_PARSER.size
+        return start, start + cls.STATE_RNG.size
+
+    def set_state(self, state):
+        start, end = self.state_rng_span(state)
+        if len(state) != end + 4 * len(self.object_list):
+            raise ValueError("State does not match the database objects")
+        parser, self.current_loc, self.max_weight = self.STATE_HEADER.unpack_from(
+            state
+        )
+        pos = self.STATE_HEADER.size
+        if parser:
+            (
+                self.verb,
+                self.adverb,
+                self.noun1,
+                self.noun2,
+                self.old_noun,
+            ) = self.STATE_PARSER.unpack_from(state, pos)
+            pos += self.STATE_PARSER.size
+        self.counters = list(state[pos : pos + len(self.counters)])
+        pos += len(self.counters)
+        size = len(self.flags) >> 3
+        flags = int.from_bytes(state[pos : pos + size], "little")
+        self.flags = [(flags >> n) & 1 == 1 for n in range(len(self.flags))]
+        pos += size
+        rng = self.STATE_RNG.unpack_from(state, pos)
+        self.rng.setstate((3, rng[2:], rng[1] if rng[0] else None))
+        pos += self.STATE_RNG.size
+        locs = array.array("i")
+        locs.frombytes(state[pos:])
+        for obj, loc in zip(self.object_list, locs):
+            obj.loc = loc
+        self.stack = []
+
+    def watch(self, path, interval=1.0):
+        """Reloads the database from path whenever the file changes.
+
+        A background thread checks the file every interval seconds, loads
+        and compiles new versions, and leaves them for run() to swap in
+        before it asks for the next command.
+        """
+        self.unwatch()
+        ddb, error = load_database(path)
+        self.reload_digests = database_digests(ddb) if error is None else {}
+        stop = threading.Event()
+        self._watch_stop = stop
+        threading.Thread(
+            target=self.__watch_task, args=(path, interval, stop), daemon=True
+        ).start()
+
+    def unwatch(self):
+        if self._watch_stop is not None:
+            self._watch_stop.set()
+            self._watch_stop = None
+
+    def __watch_task(self, path, interval, stop):
+        def version():
+            try:
+                st = os.stat(path)
+                return (st.st_mtime_ns, st.st_size)
+            except OSError:
+                return None
+
+        current = version()
+        while not stop.wait(interval):
+            new = version()
+            if new is None or new == current:
+                continue
+            current = new
+            ddb, error = load_database(path)
+            if error is None and str(ddb["init_loc"]) not in ddb["locations"]:
+                error = "init_loc"
+            if error is not None:
+                with self._lock:
+                    self.pending_reload = (None, None, f"invalid database: {error}")
+                continue
+            try:
+                db = self.compile_database(ddb)
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                with self._lock:
+                    self.pending_reload = (None, None, f"invalid database: {e}")
+                continue
+            digests = database_digests(ddb)
+            with self._lock:
+                changes = database_changes(self.reload_digests, digests)
+                self.pending_reload = (db, digests, changes)
+
+    def __apply_reload(self):
+        # Swaps in the database left by the watch thread. Counters, flags
+        # and the parser state are kept, and so are the room and the object
+        # locations while their ids still exist.
+        with self._lock:
+            db, digests, changes = self.pending_reload
+            self.pending_reload = None
+        if db is None:
+            self.io.print(f"\n[Database not reloaded, {changes}]\n")
+            return
+        locations = db["locations"]
+        # New objects start at their initial location
+        for n, obj in enumerate(db["objects"]):
+            old = self.objects[n]
+            if obj is None or old is None:
+                continue
+            # Rooms that were removed don't keep their objects
+            if old.loc in locations or old.loc not in self.locations:
+                obj.loc = old.loc
+        moved = self.current_loc not in locations
+        self.__dict__.update(db)
+        self.reload_digests = digests
+        self.reload_report = changes
+        self.io.separators = self.punctuation
+        self.io.font = self.font
+        self.stack = []
+        changes = "; ".join(changes) if changes else "no changes"
+        self.io.print(f"\n[Database reloaded: {changes}]\n")
+        if moved:
+            self.current_loc = self.init_loc
+            self.__display_room(self.current_loc)
+
+    def __read_input(self):
+        if self.event_log and self.event_log.replaying:
+            txt = self.event_log.next_input()
+            if txt is None:  # End of the log
+                return "*QUIT"
+            # Let the IO update its line state as if the text had been typed
+            if hasattr(self.io, "replay_input"):
+                self.io.replay_input(txt)
+            return txt
+        txt = self.io.input()
+        if self.event_log:
+            self.event_log.record_input(txt)
+        return txt
+
+    def __rand(self, m):
+        if self.event_log and self.event_log.replaying:
+            return self.event_log.next_rand()
+        r = self.rng.randint(0, m)
+        if self.event_log:
+            self.event_log.record_rand(r)
+        return r
+
+    def __hold(self, frames):
+        if self.event_log and self.event_log.replaying:
+            # Do not wait at all when replaying
+            return self.event_log.next_hold()
+        pressed = bool(self.io.wait_key_or_timeout(frames))
+        if self.event_log:
+            self.event_log.record_hold(pressed)
+        return pressed
+
+    RECENT_INPUTS = 256
+
+    def __tokenize(self, input_string):
+        # Words of a statement with their verb, noun and adverb ids. The
+        # most recent statements are kept, as players repeat them a lot.
+        tokens = self.recent_inputs.get(input_string)
+        if tokens is not None:
+            self.recent_inputs.move_to_end(input_string)
+            return tokens
+        tokens = tuple(
+            (
+                word,
+                self.verb_index.get(word, 0),
+                self.noun_index.get(word, 0),
+                self.adverb_index.get(word, 0),
+            )
+            for word in input_string.upper().split()
+        )
+        self.recent_inputs[input_string] = tokens
+        if len(self.recent_inputs) > self.RECENT_INPUTS:
+            self.recent_inputs.popitem(last=False)
+        return tokens
 
     def __get_location_objects(self, loc_id):
-        res = {}
-        for k, v in self.objects.items():
-            if v["loc"] == loc_id:
-                res[k] = v
-        return res
+        return [x for x in self.object_list if x.loc == loc_id]
 
     def __display_room(self, loc):
         # Check whether there's light
         if not self.flags[self.LIGHTING_FLAG] and not self.flags[self.LAMP_FLAG]:
             self.io.print(self.messages[self.ITSDARK])
         else:
-            self.io.print(self.locations[loc]["desc"])
+            self.io.print(self.locations[loc].desc)
             objs = self.__get_location_objects(loc)
             if len(objs) > 0:
                 str_obj = self.messages[self.OBJHERE]
                 top = False
-                for v in objs.values():
+                for v in objs:
                     if top:
                         str_obj += ","
-                    str_obj += v["name"]
+                    str_obj += v.name
                     top = True
                 self.io.print(str_obj)
             if self.show_exits:
-                exits = self.locations[loc]["exits"]
+                exits = self.locations[loc].exits
                 top = False
                 if len(exits) > 0:
                     str_exits = "\nYou can go "
@@ -440,19 +919,16 @@ class GAC_Interpreter:
         self.adverb = 0
         self.noun1 = 0
         self.noun2 = 0
-        input_string = input_string.upper()
-        words = input_string.split()
-        while len(words) > 0:
-            word = words.pop(0)
+        for word, verb, noun, adverb in self.__tokenize(input_string):
             matched = False
             if word == "*QUIT":
                 return (True, True)
             if self.verb == 0 and not matched:
-                self.verb = self.__find_word(self.verbs, word)
+                self.verb = verb
                 matched = self.verb != 0
             # check noun1 in case the word is duplicated in adverbs and nouns
             if self.noun1 == 0 and not matched:
-                self.noun1 = self.__find_word(self.nouns, word)
+                self.noun1 = noun
                 # Check if it is a pronoun
                 if self.noun1 != 0:
                     self.old_noun = self.noun1
@@ -460,10 +936,10 @@ class GAC_Interpreter:
                     self.noun1 = self.old_noun
                 matched = self.noun1 != 0
             if self.adverb == 0 and not matched:
-                self.adverb = self.__find_word(self.adverbs, word)
+                self.adverb = adverb
                 matched = self.adverb != 0
             if self.noun2 == 0 and self.noun2 != 0 and not matched:
-                self.noun2 = self.__find_word(self.nouns, word)
+                self.noun2 = noun
                 matched = self.noun2 != 0
         return (self.verb != 0 or self.noun1 != 0, False)
 
@@ -475,11 +951,13 @@ class GAC_Interpreter:
         done = False
         finished = False
         if_true = False
+        executed = 0
         while pos < len(cond_list) and not (done and exit_if_done):
             instruction = cond_list[pos]
             pos += 1
             cmd = instruction[0]
             if not skip or (skip and cmd == "END"):
+                executed += 1
                 if cmd == "PUSH":
                     self.stack.append(instruction[1])
                 elif cmd == "OP0":
@@ -508,52 +986,49 @@ class GAC_Interpreter:
                     self.stack.append(s0)
                 elif cmd == "HOLD":
                     s0 = self.stack.pop()
-                    self.io.wait_key_or_timeout(s0)
+                    self.__hold(s0)
                 elif cmd == "GET":
                     s0 = self.stack.pop()
-                    if s0 in self.objects.keys():
-                        obj = self.objects[s0]
+                    obj = self.objects[s0] if s0 in self.ID_RANGE else None
+                    if obj is not None:
                         # First check object is present
-                        if obj["loc"] == self.current_loc:
+                        if obj.loc == self.current_loc:
                             playerweight = 0
-                            for v in self.objects.values():
-                                if v["loc"] == self.CARRIED_LOC:
-                                    playerweight += v["weight"]
-                            if playerweight + obj["weight"] > self.max_weight:
+                            for v in self.object_list:
+                                if v.loc == self.CARRIED_LOC:
+                                    playerweight += v.weight
+                            if playerweight + obj.weight > self.max_weight:
                                 self.io.print(self.messages[self.TOOMUCH] + "\n")
                             else:
-                                obj["loc"] = self.CARRIED_LOC
+                                obj.loc = self.CARRIED_LOC
                         else:
                             self.io.print(self.messages[self.CANTSEE] + "\n")
                 elif cmd == "DROP":
                     s0 = self.stack.pop()
-                    if s0 in self.objects.keys():
-                        obj = self.objects[s0]
-                        if s0 not in self.objects.keys():
-                            self.io.print(self.messages[self.DONTHAVE] + "\n")
+                    obj = self.objects[s0] if s0 in self.ID_RANGE else None
+                    if obj is not None:
+                        if obj.loc == self.CARRIED_LOC:
+                            obj.loc = self.current_loc
                         else:
-                            obj = self.objects[s0]
-                            if obj["loc"] == self.CARRIED_LOC:
-                                obj["loc"] = self.current_loc
-                            else:
-                                self.io.print(self.messages[self.DONTHAVE] + "\n")
+                            self.io.print(self.messages[self.DONTHAVE] + "\n")
                 elif cmd == "SWAP":
                     s0 = self.stack.pop()
                     s1 = self.stack.pop()
-                    if s0 in self.objects.keys() and s1 in self.objects.keys():
-                        l0 = self.objects[s0]["loc"]
-                        l1 = self.objects[s1]["loc"]
-                        self.objects[s0]["loc"] = l1
-                        self.objects[s1]["loc"] = l0
+                    o0 = self.objects[s0] if s0 in self.ID_RANGE else None
+                    o1 = self.objects[s1] if s1 in self.ID_RANGE else None
+                    if o0 is not None and o1 is not None:
+                        o0.loc, o1.loc = o1.loc, o0.loc
                 elif cmd == "TO":
                     r = self.stack.pop()
                     o = self.stack.pop()
-                    if o in self.objects.keys():
-                        self.objects[o]["loc"] = r
+                    obj = self.objects[o] if o in self.ID_RANGE else None
+                    if obj is not None:
+                        obj.loc = r
                 elif cmd == "OBJ":
                     o = self.stack.pop()
-                    if o in self.objects.keys():
-                        self.io.print(self.objects[o]["name"] + "\n")
+                    obj = self.objects[o] if o in self.ID_RANGE else None
+                    if obj is not None:
+                        self.io.print(obj.name + "\n")
                 elif cmd == "SET":
                     f = self.stack.pop()
                     if f in range(0, len(self.flags)):
@@ -613,21 +1088,22 @@ class GAC_Interpreter:
                         self.stack.append(0)
                 elif cmd == "DESC":
                     r = self.stack.pop()
-                    if r in self.locations.keys():
+                    if r in self.locations:
                         self.__display_room(r)
                 elif cmd == "LOOK":
-                    if self.current_loc in self.locations.keys():
+                    if self.current_loc in self.locations:
                         self.__display_room(self.current_loc)
                 elif cmd == "MESS":
                     m = self.stack.pop()
-                    if m in self.messages.keys():
-                        self.io.print(self.messages[m])
+                    msg = self.messages[m] if m in self.ID_RANGE else None
+                    if msg is not None:
+                        self.io.print(msg)
                 elif cmd == "PRIN":
                     m = self.stack.pop()
                     self.io.print(f"{m}")
                 elif cmd == "RAND":
                     m = self.stack.pop()
-                    self.stack.append(random.randint(0, m))
+                    self.stack.append(self.__rand(m))
                 elif cmd == "<":
                     s0 = self.stack.pop()
                     s1 = self.stack.pop()
@@ -651,9 +1127,9 @@ class GAC_Interpreter:
                         self.stack.append(0)
                 elif cmd == "HERE":
                     s0 = self.stack.pop()
-                    if s0 in self.objects.keys():
-                        obj = self.objects[s0]
-                        if obj["loc"] == self.current_loc:
+                    obj = self.objects[s0] if s0 in self.ID_RANGE else None
+                    if obj is not None:
+                        if obj.loc == self.current_loc:
                             self.stack.append(1)
                         else:
                             self.stack.append(0)
@@ -661,9 +1137,9 @@ class GAC_Interpreter:
                         self.stack.append(0)
                 elif cmd == "CARR":
                     s0 = self.stack.pop()
-                    if s0 in self.objects.keys():
-                        obj = self.objects[s0]
-                        if obj["loc"] == self.CARRIED_LOC:
+                    obj = self.objects[s0] if s0 in self.ID_RANGE else None
+                    if obj is not None:
+                        if obj.loc == self.CARRIED_LOC:
                             self.stack.append(1)
                         else:
                             self.stack.append(0)
@@ -671,12 +1147,9 @@ class GAC_Interpreter:
                         self.stack.append(0)
                 elif cmd == "AVAIL":
                     s0 = self.stack.pop()
-                    if s0 in self.objects.keys():
-                        obj = self.objects[s0]
-                        if (
-                            obj["loc"] == self.current_loc
-                            or obj["loc"] == self.CARRIED_LOC
-                        ):
+                    obj = self.objects[s0] if s0 in self.ID_RANGE else None
+                    if obj is not None:
+                        if obj.loc == self.current_loc or obj.loc == self.CARRIED_LOC:
                             self.stack.append(1)
                         else:
                             self.stack.append(0)
@@ -712,7 +1185,7 @@ class GAC_Interpreter:
                     done = True
                 elif cmd == "QUIT":
                     self.io.print(self.messages[self.YOUSURE])
-                    res = self.io.input()
+                    res = self.__read_input()
                     if res.upper() in ["YES", "Y", "SI", "S"]:
                         finished = True
                 elif cmd == "EXIT":
@@ -740,7 +1213,7 @@ class GAC_Interpreter:
                 elif cmd == "GOTO":
                     r = self.stack.pop()
                     self.current_loc = r
-                    if r in self.locations.keys():
+                    if r in self.locations:
                         self.__display_room(self.current_loc)
                 elif cmd == "NO1":
                     self.stack.append(self.noun1)
@@ -751,27 +1224,24 @@ class GAC_Interpreter:
                 elif cmd == "LIST":
                     r = self.stack.pop()
                     nothing = True
-                    for o in self.objects.values():
-                        if o["loc"] == r:
-                            self.io.print(o["name"] + "\n")
+                    for o in self.object_list:
+                        if o.loc == r:
+                            self.io.print(o.name + "\n")
                             nothing = False
                     if nothing:
                         self.io.print(self.no_objs_msg + "\n")
                 elif cmd == "CONN":
                     d = self.stack.pop()
                     res = 0
-                    if self.current_loc in self.locations.keys():
-                        loc = self.locations[self.current_loc]
-                        for v in loc["exits"]:
-                            if v["dir"] == d:
-                                res = v["dest"]
-                                break
+                    if self.current_loc in self.locations:
+                        res = self.locations[self.current_loc].connections.get(d, 0)
                     self.stack.append(res)
                 elif cmd == "WEIG":
                     s0 = self.stack.pop()
                     res = 0
-                    if s0 in self.objects.keys():
-                        res = self.objects[s0]["weight"]
+                    obj = self.objects[s0] if s0 in self.ID_RANGE else None
+                    if obj is not None:
+                        res = obj.weight
                     self.stack.append(res)
                 elif cmd == "WITH":
                     self.stack.append(self.CARRIED_LOC)
@@ -804,86 +1274,124 @@ class GAC_Interpreter:
                     pass
                 else:
                     self.io.print(f"INVALID OPCODE {cmd}.\n")
+        self.steps = executed
         return (finished, done, if_true)
 
+    def __timed_conditions(self, slot, table, cond_list, exit_if_done):
+        # __perfom_conditions, measured in the metrics slot of the thread
+        if slot is None:
+            return self.__perfom_conditions(cond_list, exit_if_done)
+        start = time.perf_counter()
+        result = self.__perfom_conditions(cond_list, exit_if_done)
+        slot.conditions(table, time.perf_counter() - start, self.steps)
+        return result
+
     def quit(self):
         with self._lock:
             self._running = False
 
-    def run(self):
+    def run(self, resume=False):
+        # With resume the session continues at the command prompt, as left
+        # by set_state() with a state captured while waiting for a command.
         if not self.ready:
             return
         with self._lock:
             self._running = True
+        slot = self.metrics.slot() if self.metrics else None
+        if slot:
+            slot.sessions += 1
+        try:
+            self.__run(resume, slot)
+        finally:
+            if slot:
+                slot.sessions -= 1
+
+    def __run(self, resume, slot):
+        turn_start = None
         finished = False
-        new_room = True
+        new_room = not resume
         if_true = False
-        statements = []
+        statements = deque()
         cont = True
         while cont:
 
-            # print current location
-            if new_room:
-                self.__display_room(self.current_loc)
-                new_room = False
-
-            # Increment turn
-            if self.counters[self.TURN_CNT_L] < 255:
-                self.counters[self.TURN_CNT_L] += 1
-            elif self.counters[self.TURN_CNT_H] < 255:
-                self.counters[self.TURN_CNT_L] = 0
-                self.counters[self.TURN_CNT_H] += 1
-
-            # High priority conditions
-            finished, done, if_true = self.__perfom_conditions(self.hpcs, False)
-            if finished:
-                break
+            if resume:
+                resume = False
+            else:
+                # print current location
+                if new_room:
+                    self.__display_room(self.current_loc)
+                    new_room = False
+
+                # Increment turn
+                if self.counters[self.TURN_CNT_L] < 255:
+                    self.counters[self.TURN_CNT_L] += 1
+                elif self.counters[self.TURN_CNT_H] < 255:
+                    self.counters[self.TURN_CNT_L] = 0
+                    self.counters[self.TURN_CNT_H] += 1
+
+                # High priority conditions
+                finished, done, if_true = self.__timed_conditions(
+                    slot, "hpcs", self.hpcs, False
+                )
+                if finished:
+                    break
 
             if not new_room and len(statements) == 0:
+                if self.pending_reload is not None:
+                    self.__apply_reload()
+                if slot and turn_start is not None:
+                    slot.turn(time.perf_counter() - turn_start)
                 input_str = ""
                 while len(input_str) == 0:
                     self.io.print("\n" + self.messages[self.ASK])
-                    input_str = self.io.input()
-                # Separate statements
-                separators = filter(
-                    lambda x: x != " ", self.separators + self.punctuation
-                )
-                for sep in separators:
-                    input_str = input_str.replace(sep, ".")
-                statements = input_str.split(".")
+                    self.prompting = True
+                    try:
+                        input_str = self.__read_input()
+                    finally:
+                        self.prompting = False
+                turn_start = time.perf_counter()
+                statements = deque(self.split_statements(input_str))
                 self.old_noun = 0  # Delete after new text input
 
             # Process player input
             while len(statements) > 0:
-                input_str = statements.pop(0)
+                input_str = statements.popleft()
                 valid_input, finished = self.__parse_input(input_str)
                 if finished:
                     break
                 elif valid_input:
                     # Check connection table
-                    for exit in self.locations[self.current_loc]["exits"]:
-                        if exit["dir"] == self.verb:
-                            self.current_loc = exit["dest"]
-                            new_room = True
-                            break
+                    connections = self.locations[self.current_loc].connections
+                    if self.verb in connections:
+                        self.current_loc = connections[self.verb]
+                        new_room = True
                     if new_room or valid_input:
                         break
 
-            if new_room or finished:
+            if finished:
+                break
+            if new_room:
                 continue
 
             # Local conditions
             done = False
             if_true = False
-            if self.current_loc in self.lcs.keys():
-                finished, done, if_true = self.__perfom_conditions(
-                    self.lcs[self.current_loc], True
+            if self.current_loc in self.lcs:
+                finished, done, if_true = self.__timed_conditions(
+                    slot, "lcs", self.lcs[self.current_loc], True
                 )
+            if finished:
+                break
             if new_room or done:
                 continue
 
             # Low priority conditions
-            finished, done, if_true_lcp = self.__perfom_conditions(self.lpcs, True)
+            finished, done, if_true_lcp = self.__timed_conditions(
+                slot, "lpcs", self.lpcs, True
+            )
+            if finished:
+                break
             if new_room or done:
                 continue
 
@@ -892,6 +1400,8 @@ class GAC_Interpreter:
                     self.io.print(self.messages[self.NOTUNDERSTAND] + "\n")
                 else:
                     self.io.print(self.messages[self.CANTDO] + "\n")
+                if slot:
+                    slot.miss(self.verb == 0)
 
             with self._lock:
                 cont = not finished and self._running
@@ -899,6 +1409,185 @@ class GAC_Interpreter:
             self.io.quit()
 
 
+class GAC_EventLog(object):
+    """Compact binary log of the nondeterministic inputs of a session.
+
+    The stream starts with MAGIC, followed by events made of a one byte tag
+    and a payload. Numbers are stored as unsigned LEB128 varints:
+
+    * INPUT: varint length + UTF-8 text typed by the player
+    * RAND: varint result of the RAND opcode
+    * HOLD: one byte, 1 if a key was pressed before the timeout
+    """
+
+    MAGIC = b"GACL\x01"
+
+    INPUT = 0x49  # 'I'
+    RAND = 0x52  # 'R'
+    HOLD = 0x48  # 'H'
+
+    def __init__(self, data=None, stream=None):
+        self.stream = stream
+        if data is None:
+            self.replaying = False
+            self.data = bytearray(self.MAGIC)
+            if self.stream:
+                self.stream.write(self.MAGIC)
+        else:
+            if bytes(data[0 : len(self.MAGIC)]) != self.MAGIC:
+                raise ValueError("Not a GAC event log")
+            self.replaying = True
+            self.data = bytes(data)
+        self.pos = len(self.MAGIC)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.data)
+
+    def __write(self, chunk):
+        self.data += chunk
+        if self.stream:
+            self.stream.write(chunk)
+
+    @staticmethod
+    def __varint(n):
+        out = bytearray()
+        while True:
+            b = n & 0x7F
+            n >>= 7
+            if n:
+                out.append(b | 0x80)
+            else:
+                out.append(b)
+                return out
+
+    def __read_varint(self):
+        n = 0
+        shift = 0
+        while True:
+            b = self.data[self.pos]
+            self.pos += 1
+            n |= (b & 0x7F) << shift
+            if (b & 0x80) == 0:
+                return n
+            shift += 7
+
+    def __expect(self, tag):
+        if self.pos >= len(self.data):
+            return False
+        if self.data[self.pos] != tag:
+            raise ValueError(f"Event log out of sync at offset {self.pos}")
+        self.pos += 1
+        return True
+
+    def record_input(self, txt):
+        raw = txt.encode("utf-8")
+        self.__write(bytes([self.INPUT]) + self.__varint(len(raw)) + raw)
+
+    def record_rand(self, value):
+        self.__write(bytes([self.RAND]) + self.__varint(value))
+
+    def record_hold(self, pressed):
+        self.__write(struct.pack("<BB", self.HOLD, 1 if pressed else 0))
+
+    def next_input(self):
+        if not self.__expect(self.INPUT):
+            return None
+        length = self.__read_varint()
+        txt = self.data[self.pos : self.pos + length].decode("utf-8")
+        self.pos += length
+        return txt
+
+    def next_rand(self):
+        if not self.__expect(self.RAND):
+            raise ValueError("Event log ended before a RAND result")
+        return self.__read_varint()
+
+    def next_hold(self):
+        if not self.__expect(self.HOLD):
+            raise ValueError("Event log ended before a HOLD outcome")
+        pressed = self.data[self.pos] != 0
+        self.pos += 1
+        return pressed
+
+
+class GAC_Layout(object):
+    """Word wrap of the GAC printing routine, shared by the IO backends.
+
+    Texts are split after every separator. A piece that doesn't fit in the
+    rest of the line goes to the next one. The wrapped output of a text
+    depends only on the column it starts at, so it is cached.
+    """
+
+    CACHE_SIZE = 4096
+
+    def __init__(self, width, separators):
+        self.width = width
+        self.separators = separators
+        self.breaks = frozenset(separators) | {"\n"}
+        self.pieces = {}  # text -> lengths of its pieces, and if they end a line
+        self.wrapped = {}  # (text, line_remain) -> (output, line_remain)
+
+    @classmethod
+    def of(cls, io):
+        # Layout of an IO object, rebuilt if its width or separators change
+        layout = getattr(io, "layout", None)
+        if (
+            layout is None
+            or layout.width != io.width
+            or layout.separators is not io.separators
+        ):
+            layout = cls(io.width, io.separators)
+            io.layout = layout
+        return layout
+
+    def __pieces(self, txt):
+        pieces = self.pieces.get(txt)
+        if pieces is None:
+            pieces = []
+            start = 0
+            breaks = self.breaks
+            for n, c in enumerate(txt):
+                if c in breaks:
+                    pieces.append((n + 1, c == "\n"))
+                    start = n + 1
+            if start < len(txt):
+                pieces.append((len(txt), False))
+            if len(self.pieces) >= self.CACHE_SIZE:
+                self.pieces.clear()
+            self.pieces[txt] = pieces
+        return pieces
+
+    def wrap(self, txt, line_remain):
+        """Returns the text with the line breaks added and the space left
+        in the last line."""
+        key = (txt, line_remain)
+        res = self.wrapped.get(key)
+        if res is None:
+            out = []
+            start = 0
+            for end, newline in self.__pieces(txt):
+                length = end - start
+                if length > line_remain:
+                    out.append("\n")
+                    line_remain = self.width
+                if newline:
+                    line_remain = self.width
+                line_remain -= length
+                out.append(txt[start:end])
+                start = end
+            res = ("".join(out), line_remain)
+            if len(self.wrapped) >= self.CACHE_SIZE:
+                self.wrapped.clear()
+            self.wrapped[key] = res
+        return res
+
+
 class IoCallbackGAC(object):
 
     def __init__(self, width, separators=[], font=[]):
@@ -906,29 +1595,25 @@ class IoCallbackGAC(object):
         self.line_remain = width
         self.separators = separators
         self.font = font
+        self.layout = None
 
     def print(self, string):
-        # This method replicates the 8bit mechanism. No much python-correctness is expected
-        separators = self.separators + ["\n"]
-        pos = 0
-        while pos < len(string):
-            pos_w = pos
-            while pos_w < (len(string) - 1) and string[pos_w] not in separators:
-                pos_w += 1
-            substring = string[pos : pos_w + 1]
-            if len(substring) > self.line_remain:
-                sys.stdout.write("\n")
-                self.line_remain = self.width
-            if string[pos_w] == "\n":
-                self.line_remain = self.width
-            self.line_remain -= len(substring)
-            pos = pos_w + 1
-            sys.stdout.write(substring)
+        txt, self.line_remain = GAC_Layout.of(self).wrap(string, self.line_remain)
+        if txt:
+            self.write(txt)
+
+    def write(self, txt):
+        sys.stdout.write(txt)
 
     def input(self):
         self.line_remain = self.width
         return input()
 
+    def replay_input(self, txt):
+        # Shown as the terminal echoes what is typed into input()
+        self.line_remain = self.width
+        sys.stdout.write(txt + "\n")
+
     def quit(self):
         pass
 
@@ -939,11 +1624,49 @@ class IoCallbackGAC(object):
             while True:
                 if msvcrt.kbhit():
                     inp = msvcrt.getch()
-                    break
+                    return True
                 elif time.time() - start_time > timeout:
-                    break
+                    return False
         else:
             rlist, wlist, xlist = select([sys.stdin], [], [], timeout)
+            return len(rlist) > 0
+
+
+class IoHeadlessGAC(IoCallbackGAC):
+    """IO without a terminal: input comes from a list of lines and the
+    output is kept in memory. When the lines are exhausted the session
+    is ended with *QUIT."""
+
+    def __init__(self, width, lines=[], separators=[], font=[]):
+        super().__init__(width, separators, font)
+        self.lines = list(lines)
+        self.next_line = 0
+        self.output = []
+        self.turns = 0
+
+    def write(self, txt):
+        self.output.append(txt)
+
+    def transcript(self):
+        return "".join(self.output)
+
+    def input(self):
+        self.line_remain = self.width
+        if self.next_line >= len(self.lines):
+            return "*QUIT"
+        txt = self.lines[self.next_line]
+        self.next_line += 1
+        self.turns += 1
+        self.output.append(txt + "\n")
+        return txt
+
+    def replay_input(self, txt):
+        self.line_remain = self.width
+        self.turns += 1
+        self.output.append(txt + "\n")
+
+    def wait_key_or_timeout(self, timeout_frames):
+        return False
 
 
 def main():
@@ -967,6 +1690,34 @@ def main():
         metavar=_("INPUT_FILE"),
         help=_("JSON database file"),
     )
+    arg_parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help=_("seed for the RAND opcode"),
+    )
+    arg_parser.add_argument(
+        "--watch",
+        action="store_true",
+        help=_("reload the database into the session when the file changes"),
+    )
+    arg_parser.add_argument(
+        "--mem-report",
+        action="store_true",
+        help=_("print the memory used by each section of the database and exit"),
+    )
+    log_group = arg_parser.add_mutually_exclusive_group()
+    log_group.add_argument(
+        "--record",
+        metavar=_("LOG_FILE"),
+        help=_("record inputs, RAND results and HOLD outcomes to a file"),
+    )
+    log_group.add_argument(
+        "--replay",
+        type=file_path,
+        metavar=_("LOG_FILE"),
+        help=_("replay a recorded session without waiting for input"),
+    )
 
     try:
         args = arg_parser.parse_args()
@@ -975,16 +1726,52 @@ def main():
     except NotADirectoryError as f2:
         sys.exit(_("ERROR: Not a valid path:") + f"{f2}")
 
-    with open(args.input_path) as f:
-        ddb = json.load(f)
+    if args.mem_report:
+        tracemalloc.start()
+    ddb, error = load_database(args.input_path)
+    if error is not None:
+        sys.exit(f"Invalid Database: {error}")
+
+    if args.mem_report:
+        loaded = tracemalloc.get_traced_memory()[0]
+        interpreter = GAC_Interpreter(ddb, IoCallbackGAC(32))
+        del ddb
+        if not interpreter.start_adventure(validated=True):
+            sys.exit("Invalid Database")
+        parsed, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report = interpreter.memory_report()
+        for name, size in report:
+            print(f"{name:12} {size:10d}")
+        print(f"{'total':12} {sum(x[1] for x in report):10d}")
+        print(f"{'JSON loaded':12} {loaded:10d}")
+        print(f"{'parsed':12} {parsed:10d} (peak {peak})")
+        return
+
+    log_file = None
+    event_log = None
+    if args.replay:
+        try:
+            event_log = GAC_EventLog.load(args.replay)
+        except ValueError as e:
+            sys.exit(_("ERROR: ") + f"{e}")
+    elif args.record:
+        log_file = open(args.record, "wb")
+        event_log = GAC_EventLog(stream=log_file)
 
     io = IoCallbackGAC(32)
-    ddb = GAC_Interpreter(ddb, io)
+    ddb = GAC_Interpreter(ddb, io, seed=args.seed, event_log=event_log)
 
-    if not ddb.start_adventure():
-        sys.exit("Invalid Database")
-    else:
-        ddb.run()
+    try:
+        if not ddb.start_adventure(validated=True):
+            sys.exit("Invalid Database")
+        else:
+            if args.watch:
+                ddb.watch(args.input_path)
+            ddb.run()
+    finally:
+        if log_file:
+            log_file.close()
 
 
 if __name__ == "__main__":
@@ -9,9 +9,157 @@ import threading
 import queue
 import argparse
 import gettext
-import json
+import multiprocessing
+import pickle
+import struct
+import time
+from multiprocessing import shared_memory
 
-from runGAC import GAC_Interpreter
+from runGAC import GAC_Interpreter, GAC_Layout, load_database
+
+
+class GAC_RingBuffer(object):
+    """Queue of screen commands in shared memory, for a single writer and
+    a single reader in different processes.
+
+    The reader sets the waiting flag before it goes to sleep, and the writer
+    only wakes it up (through a pipe) when it finds the flag set.
+    """
+
+    # Bytes written and bytes read so far, and the waiting flag
+    HEADER = struct.Struct("<QQQ")
+    RECORD = struct.Struct("<I")  # Length of each pickled command
+    SIZE = 0x10000
+
+    def __init__(self, name=None, size=SIZE):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(
+                create=True, size=self.HEADER.size + size
+            )
+            # The reader starts asleep
+            self.HEADER.pack_into(self.shm.buf, 0, 0, 0, 1)
+        else:
+            # Child processes share the resource tracker of their parent,
+            # so the creator stays the only one that unlinks it
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.size = size
+        self.buf = self.shm.buf
+
+    def __copy_in(self, pos, data):
+        start = pos % self.size
+        first = min(len(data), self.size - start)
+        base = self.HEADER.size
+        self.buf[base + start : base + start + first] = data[0:first]
+        self.buf[base : base + len(data) - first] = data[first:]
+
+    def __copy_out(self, pos, length):
+        start = pos % self.size
+        first = min(length, self.size - start)
+        base = self.HEADER.size
+        return bytes(self.buf[base + start : base + start + first]) + bytes(
+            self.buf[base : base + length - first]
+        )
+
+    def put(self, cmd):
+        data = pickle.dumps(cmd, pickle.HIGHEST_PROTOCOL)
+        record = self.RECORD.pack(len(data)) + data
+        if len(record) > self.size:
+            raise ValueError("Command too long")
+        while True:
+            written, read, waiting = self.HEADER.unpack_from(self.buf, 0)
+            if written + len(record) - read <= self.size:
+                break
+            time.sleep(0.001)  # Full, wait for the reader
+        self.__copy_in(written, record)
+        # The data must be in place before the reader can see it
+        struct.pack_into("<Q", self.buf, 0, written + len(record))
+        # True if the reader has to be woken up
+        if struct.unpack_from("<Q", self.buf, 16)[0]:
+            struct.pack_into("<Q", self.buf, 16, 0)
+            return True
+        return False
+
+    def get(self):
+        # Next command, or None if there isn't any
+        written, read, waiting = self.HEADER.unpack_from(self.buf, 0)
+        if written == read:
+            return None
+        length = self.RECORD.unpack(self.__copy_out(read, self.RECORD.size))[0]
+        data = self.__copy_out(read + self.RECORD.size, length)
+        struct.pack_into("<Q", self.buf, 8, read + self.RECORD.size + length)
+        return pickle.loads(data)
+
+    def pending(self):
+        # Bytes written and not read yet
+        written, read, waiting = self.HEADER.unpack_from(self.buf, 0)
+        return written - read
+
+    def sleep(self):
+        # Sets the waiting flag. Returns False if a command arrived in the
+        # meantime, and the reader must not sleep.
+        struct.pack_into("<Q", self.buf, 16, 1)
+        return self.pending() == 0
+
+    def close(self, unlink=False):
+        self.buf = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class IoProcessGAC(object):
+    """IO of an interpreter running in a child process. Screen commands go
+    to the window process through a ring buffer and its answers come back
+    through a pipe."""
+
+    def __init__(self, ring, conn, width):
+        self.ring = ring
+        self.conn = conn
+        self.width = width
+        self.line_remain = width
+        self.separators = []
+        self.layout = None
+        self.font = None
+
+    def __send(self, cmd):
+        if self.ring.put(cmd):
+            self.conn.send(True)  # Wakes up the window
+
+    def print(self, txt):
+        txt, self.line_remain = GAC_Layout.of(self).wrap(txt, self.line_remain)
+        if txt:
+            self.__send((0x01, txt))
+
+    def input(self):
+        self.line_remain = self.width
+        self.__send((0x02,))
+        txt = self.conn.recv()
+        if txt is None:  # The window was closed
+            return "*QUIT"
+        return txt
+
+    def replay_input(self, txt):
+        self.line_remain = self.width
+        self.__send((0x01, txt + "\n"))
+
+    def wait_key_or_timeout(self, timeout_frames):
+        self.__send((0x05, timeout_frames))
+        return self.conn.recv() is True
+
+    def quit(self):
+        self.__send((0x00,))
+
+
+def interpreter_process(ddb, ring_name, ring_size, conn, width):
+    ring = GAC_RingBuffer(ring_name, ring_size)
+    io = IoProcessGAC(ring, conn, width)
+    interpreter = GAC_Interpreter(ddb, io)
+    if interpreter.start_adventure(validated=True):
+        interpreter.run()
+    else:
+        io.quit()
+    ring.close()
 
 
 class GAC_interface_Pygame:
@@ -47,14 +195,21 @@ class GAC_interface_Pygame:
     SCREEN_START_X = (WINDOW_WIDTH - SCREEN_WIDTH) >> 1
     SCREEN_START_Y = (WINDOW_HEIGHT - SCREEN_HEIGHT) >> 1
 
-    def __init__(self):
+    FRAME_MS = 20  # The interpreter counts time in 50 Hz frames
+    FLASH_MS = 17 * FRAME_MS
+
+    OUTPUT_EVENT = pygame.USEREVENT  # The interpreter queued commands
+    FLASH_EVENT = pygame.USEREVENT + 1
+    HOLD_EVENT = pygame.USEREVENT + 2
+
+    def __init__(self, use_process=False):
         self.print_att = 0x07
         self.pxl_screen = [0 for x in range(self.CHAR_WIDTH * self.SCREEN_HEIGHT)]
         self.att_screen = [
             self.print_att for x in range(self.CHAR_WIDTH * self.CHAR_HEIGHT)
         ]
-        self.flash_counter = 0
         self.flash = False
+        self.flash_timer = False
         self.border = 0
         self.cx = 0
         self.cy = 0
@@ -68,19 +223,27 @@ class GAC_interface_Pygame:
         self.width = self.SCREEN_WIDTH
         self.line_remain = self.SCREEN_WIDTH
         self.separators = []
+        self.layout = None
         self.font = None
         self.interpreter = None
 
         self.cmd_queue = queue.Queue()
         self.resp_queue = queue.Queue()
 
-        self.th_interpreter = threading.Thread(target=self.__interpreter_task)
+        # With use_process the interpreter runs in a child process, see
+        # start_process(), so it doesn't compete with the drawing for the GIL
+        self.ring = None
+        self.conn = None
+        if use_process:
+            self.ring = GAC_RingBuffer()
+            self.th_interpreter = None
+        else:
+            self.th_interpreter = threading.Thread(target=self.__interpreter_task)
 
         pygame.init()
         self._screen = pygame.display.set_mode(
             (self.WINDOW_WIDTH, self.WINDOW_HEIGHT), pygame.HWSURFACE
         )
-        self._clock = pygame.time.Clock()
         self._active_screen = pygame.Surface((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
         self._running = True
 
@@ -193,121 +356,194 @@ class GAC_interface_Pygame:
 
     def on_cleanup(self):
         pygame.quit()
+        if self.ring:
+            self.th_interpreter.join(1)
+            if self.th_interpreter.is_alive():
+                self.th_interpreter.terminate()
+            self.ring.close(unlink=True)
         sys.exit()
 
+    def start_process(self, ddb):
+        # Interpreter in a child process. The font is needed here to draw.
+        self.font = bytes(ddb["font"])
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, self.child_conn = ctx.Pipe()
+        self.th_interpreter = ctx.Process(
+            target=interpreter_process,
+            args=(ddb, self.ring.name, self.ring.size, self.child_conn, self.width),
+            daemon=True,
+        )
+
+    def queue_depth(self):
+        # Screen commands waiting to be drawn; bytes of them with a process
+        if self.ring:
+            return self.ring.pending() if self.ring.buf is not None else 0
+        return self.cmd_queue.qsize()
+
+    def __respond(self, txt):
+        if self.conn:
+            try:
+                self.conn.send(txt)
+            except OSError:
+                pass  # The process is gone, the wake task closes the window
+        else:
+            self.resp_queue.put(txt)
+
+    def __next_command(self):
+        if self.ring:
+            return self.ring.get()
+        try:
+            rx_data = self.cmd_queue.get_nowait()
+            self.cmd_queue.task_done()
+        except:
+            rx_data = None
+        return rx_data
+
     def run(self):
+        # The loop sleeps until there is an event: a key, output of the
+        # interpreter (OUTPUT_EVENT) or one of the timers.
         self.th_interpreter.start()
+        if self.conn:
+            # Only the child keeps this end, so its death is seen as EOF
+            self.child_conn.close()
+            threading.Thread(target=self.__wake_task, daemon=True).start()
         while self._running:
+            self.on_event(pygame.event.wait())
+            for event in pygame.event.get():
+                self.on_event(event)
             self.on_update()
             self.on_draw()
             pygame.display.flip()
-            self._clock.tick(50)  # limits FPS to 50
         print(self.th_interpreter.is_alive())
         self.on_cleanup()
         # self.th_interpreter.join()
 
-    def on_update(self):
-        self.flash_counter += 1
-        if self.flash_counter > 16:
-            self.flash_counter = 0
-            self.flash = not self.flash
+    def __wake_task(self):
+        # The child process sends a message when it queues a command while
+        # the window waits for one
+        try:
+            while self.conn.recv() is not None:
+                pygame.event.post(pygame.event.Event(self.OUTPUT_EVENT))
+        except (EOFError, OSError):
+            # The interpreter has died, so there's nothing left to show
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    def __send(self, cmd):
+        self.cmd_queue.put(cmd)
+        pygame.event.post(pygame.event.Event(self.OUTPUT_EVENT))
+
+    def __end_wait(self, pressed):
+        # Tells the interpreter whether a key ended the wait
+        self.__respond(pressed)
+        self.waitkey_mode = False
+        self.frame_count = 0
+        pygame.time.set_timer(self.HOLD_EVENT, 0)
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+    def on_event(self, event):
+        if event.type == self.FLASH_EVENT:
+            self.flash = not self.flash
+        elif event.type == self.HOLD_EVENT:
+            if self.waitkey_mode:
+                self.__end_wait(False)
+        elif event.type == pygame.QUIT:
+            if self.conn:
+                try:
+                    self.conn.send(None)
+                except OSError:
+                    pass  # The process has already ended
+            else:
                 self.interpreter.quit()
-                self._running = False
-            if event.type == pygame.KEYDOWN:
-                if self.waitkey_mode:
-                    self.resp_queue.put("")
-                    self.waitkey_mode = False
-                    self.frame_count = 0
-                elif self.input_mode:
-                    if event.key == pygame.K_BACKSPACE:
-                        if not (self.cx == self.scx and self.cy == self.scy):
-                            self.backspace()
-                            self.input_txt = self.input_txt[:-1]
+            self._running = False
+        elif event.type == pygame.KEYDOWN:
+            if self.waitkey_mode:
+                self.__end_wait(True)
+            elif self.input_mode:
+                if event.key == pygame.K_BACKSPACE:
+                    if not (self.cx == self.scx and self.cy == self.scy):
+                        self.backspace()
+                        self.input_txt = self.input_txt[:-1]
+                else:
+                    char = event.unicode
+                    if char == "\r" or char == "\n":
+                        self.__toggle_cursor(False)
+                        self.input_mode = False
+                        self.print_txt("\n")
+                        self.__respond(self.input_txt)
                     else:
-                        char = event.unicode
-                        if char == "\r" or char == "\n":
-                            self.__toggle_cursor(False)
-                            self.input_mode = False
-                            self.print_txt("\n")
-                            self.resp_queue.put(self.input_txt)
-                        else:
-                            self.print_txt(char)
-                            self.input_txt += char
-
-        if self.waitkey_mode:
-            if self.frame_count == 0:
-                self.resp_queue.put("")
-                self.waitkey_mode = False
-            else:
-                self.frame_count -= 1
-        elif not self.input_mode:
-            try:
-                rx_data = self.cmd_queue.get_nowait()
-                self.cmd_queue.task_done()
-            except:
-                rx_data = None
-
-            if isinstance(rx_data, tuple):
-                cmd = rx_data[0]
-                if cmd == 0x00:  # Quit
-                    self._running = False
-                elif cmd == 0x01:  # Print txt
-                    self.print_txt(rx_data[1])
-                elif cmd == 0x02:  # Input
-                    self.input_mode = True
-                    self.input_txt = ""
-                    self.scx = self.cx
-                    self.scy = self.cy
-                    self.__toggle_cursor(True)
-                elif cmd == 0x03:  # Clear screen
-                    self.cls()
-                elif cmd == 0x04:  # New line
-                    self.newline()
-                elif cmd == 0x05:  # wait for key or timeout
-                    self.waitkey_mode = True
-                    self.frame_count = rx_data[1]
-                elif cmd == 0x06:  # pos cursor
-                    self.set_cursor(rx_data[1], rx_data[2])
+                        self.print_txt(char)
+                        self.input_txt += char
+
+    def on_update(self):
+        # Runs the queued commands until the interpreter waits for the player
+        while not self.waitkey_mode and not self.input_mode and self._running:
+            rx_data = self.__next_command()
+            if rx_data is None and self.ring and not self.ring.sleep():
+                continue  # A command arrived before the window went to sleep
+            if not isinstance(rx_data, tuple):
+                break
+            cmd = rx_data[0]
+            if cmd == 0x00:  # Quit
+                self._running = False
+            elif cmd == 0x01:  # Print txt
+                self.print_txt(rx_data[1])
+            elif cmd == 0x02:  # Input
+                self.input_mode = True
+                self.input_txt = ""
+                self.scx = self.cx
+                self.scy = self.cy
+                self.__toggle_cursor(True)
+            elif cmd == 0x03:  # Clear screen
+                self.cls()
+            elif cmd == 0x04:  # New line
+                self.newline()
+            elif cmd == 0x05:  # wait for key or timeout
+                self.waitkey_mode = True
+                self.frame_count = rx_data[1]
+                if self.frame_count == 0:
+                    self.__end_wait(False)
+                else:
+                    pygame.time.set_timer(
+                        self.HOLD_EVENT, self.frame_count * self.FRAME_MS, 1
+                    )
+            elif cmd == 0x06:  # pos cursor
+                self.set_cursor(rx_data[1], rx_data[2])
+
+        # The flash timer only runs while something on screen flashes
+        flashing = any(x & 0x80 for x in self.att_screen)
+        if flashing != self.flash_timer:
+            self.flash_timer = flashing
+            pygame.time.set_timer(self.FLASH_EVENT, self.FLASH_MS if flashing else 0)
+            if not flashing:
+                self.flash = False
 
     def __interpreter_task(self):
         if self.interpreter:
             self.interpreter.run()
 
     def print(self, txt):
-        # This method replicates the 8bit mechanism. No much python-correctness is expected
-        separators = self.separators + ["\n"]
-        pos = 0
-        while pos < len(txt):
-            pos_w = pos
-            while pos_w < (len(txt) - 1) and txt[pos_w] not in separators:
-                pos_w += 1
-            subtxt = txt[pos : pos_w + 1]
-            if len(subtxt) > self.line_remain:
-                self.cmd_queue.put((0x01, "\n"))
-                self.line_remain = self.width
-            if txt[pos_w] == "\n":
-                self.line_remain = self.width
-            self.line_remain -= len(subtxt)
-            pos = pos_w + 1
-            self.cmd_queue.put((0x01, subtxt))
+        txt, self.line_remain = GAC_Layout.of(self).wrap(txt, self.line_remain)
+        if txt:
+            self.__send((0x01, txt))
 
     def input(self):
         self.line_remain = self.width
-        self.cmd_queue.put((0x02,))
+        self.__send((0x02,))
         txt = self.resp_queue.get()
         self.resp_queue.task_done()
         return txt
 
+    def replay_input(self, txt):
+        self.line_remain = self.width
+        self.__send((0x01, txt + "\n"))
+
     def wait_key_or_timeout(self, timeout_frames):
-        self.cmd_queue.put((0x05, timeout_frames))
-        self.resp_queue.get()
+        self.__send((0x05, timeout_frames))
+        pressed = self.resp_queue.get()
         self.resp_queue.task_done()
+        return pressed
 
     def quit(self):
-        self.cmd_queue.put((0x00,))
+        self.__send((0x00,))
 
 
 def file_path(string):
@@ -350,6 +586,16 @@ if __name__ == "__main__":
         metavar=_("INPUT_FILE"),
         help=_("JSON database file"),
     )
+    arg_parser.add_argument(
+        "--process",
+        action="store_true",
+        help=_("run the interpreter in a separate process"),
+    )
+    arg_parser.add_argument(
+        "--metrics",
+        metavar=_("ADDRESS"),
+        help=_("serve Prometheus metrics at HOST:PORT, :PORT or unix:PATH"),
+    )
 
     try:
         args = arg_parser.parse_args()
@@ -358,13 +604,33 @@ if __name__ == "__main__":
     except NotADirectoryError as f2:
         sys.exit(_("ERROR: Not a valid path:") + f"{f2}")
 
-    with open(args.input_path) as f:
-        ddb = json.load(f)
-
-    io = GAC_interface_Pygame()
-    ddb = GAC_Interpreter(ddb, io)
-    io.interpreter = ddb
-    if not ddb.start_adventure():
-        sys.exit("Invalid Database")
-    else:
+    ddb, error = load_database(args.input_path)
+    if error is not None:
+        sys.exit(f"Invalid Database: {error}")
+
+    io = GAC_interface_Pygame(args.process)
+    metrics = None
+    if args.metrics:
+        from metricsGAC import GAC_Metrics, serve_metrics
+
+        # The counters of the interpreter are only seen in this process
+        metrics = GAC_Metrics()
+        metrics.gauge(
+            "gac_pygame_queue_depth",
+            "Screen commands waiting to be drawn (bytes with --process).",
+            io.queue_depth,
+        )
+        try:
+            serve_metrics(metrics, args.metrics)
+        except (OSError, ValueError) as e:
+            sys.exit(_("ERROR: ") + f"{e}")
+    if args.process:
+        io.start_process(ddb)
         io.run()
+    else:
+        ddb = GAC_Interpreter(ddb, io, metrics=metrics)
+        io.interpreter = ddb
+        if not ddb.start_adventure(validated=True):
+            sys.exit("Invalid Database")
+        else:
+            io.run()
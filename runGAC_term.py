@@ -0,0 +1,337 @@
+# MIT License
+#
+# Copyright (c) 2025 Cronomantic
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+# Terminal frontend that emulates the 32x24 text screen of the Spectrum
+# with ANSI sequences. What is on the terminal is kept in a shadow buffer,
+# so each update only sends the cells that changed.
+
+import sys
+import os
+import argparse
+import gettext
+import platform
+import time
+
+from runGAC import GAC_Interpreter, GAC_Layout, load_database
+
+if platform.system() == "Windows":
+    import msvcrt
+else:
+    import termios
+    import tty
+    from select import select
+
+
+class IoTerminalGAC(object):
+
+    CHAR_WIDTH = 32
+    CHAR_HEIGHT = 24
+    SCREEN_SIZE = CHAR_WIDTH * CHAR_HEIGHT
+
+    # ANSI colour of each Spectrum colour
+    ANSI_COLOURS = [0, 4, 1, 5, 2, 6, 3, 7]
+
+    FRAME_TIME = 0.02  # Minimum time between updates while printing
+    FLASH_TIME = 0.34  # 17 frames, as the Spectrum
+
+    def __init__(self, out=sys.stdout, fd=None):
+        self.out = out
+        self.fd = sys.stdin.fileno() if fd is None else fd
+        self.tty = os.isatty(self.fd)
+        self.width = self.CHAR_WIDTH
+        self.line_remain = self.width
+        self.separators = []
+        self.layout = None
+        self.font = None
+
+        # Attributes as in the Spectrum: FLASH, BRIGHT, PAPER (3 bits), INK
+        self.print_att = 0x07
+        self.chars = [" " for x in range(self.SCREEN_SIZE)]
+        self.atts = [self.print_att for x in range(self.SCREEN_SIZE)]
+        # What the terminal shows: (char, SGR sequence), None if unknown
+        self.shown = [None for x in range(self.SCREEN_SIZE)]
+        self.cx = 0
+        self.cy = 0
+        self.flash = False
+        self.last_update = 0.0
+        self.started = False
+
+    def __start(self):
+        # Scroll region of 24 lines, hidden cursor
+        self.out.write("\x1b[0m\x1b[2J\x1b[1;24r\x1b[?25l")
+        self.started = True
+
+    def restore(self):
+        if self.started:
+            self.out.write(f"\x1b[0m\x1b[r\x1b[?25h\x1b[{self.CHAR_HEIGHT + 1};1H")
+            self.out.flush()
+            self.started = False
+
+    def sgr(self, att):
+        ink = att & 0x07
+        paper = (att >> 3) & 0x07
+        if att & 0x80 and self.flash:
+            ink, paper = paper, ink
+        base = 90 if att & 0x40 else 30
+        ink = base + self.ANSI_COLOURS[ink]
+        paper = base + 10 + self.ANSI_COLOURS[paper]
+        return f"\x1b[{ink};{paper}m"
+
+    def update(self):
+        """Sends the cells that changed since the last update."""
+        if not self.started:
+            self.__start()
+        out = []
+        pos = -1  # Position of the terminal cursor, -1 if unknown
+        current = None
+        for n in range(self.SCREEN_SIZE):
+            cell = (self.chars[n], self.sgr(self.atts[n]))
+            if cell == self.shown[n]:
+                continue
+            if pos != n:
+                row, col = divmod(n, self.CHAR_WIDTH)
+                out.append(f"\x1b[{row + 1};{col + 1}H")
+            if cell[1] != current:
+                out.append(cell[1])
+                current = cell[1]
+            out.append(cell[0])
+            self.shown[n] = cell
+            # The terminal cursor doesn't move past the last column
+            pos = n + 1 if (n + 1) % self.CHAR_WIDTH != 0 else -1
+        if len(out) > 0:
+            self.out.write("".join(out))
+        self.out.flush()
+        self.last_update = time.monotonic()
+
+    def __scroll_up(self):
+        w = self.CHAR_WIDTH
+        self.chars = self.chars[w:] + [" " for x in range(w)]
+        self.atts = self.atts[w:] + [self.print_att for x in range(w)]
+        if self.started:
+            # The terminal scrolls too, so only the new line is sent
+            self.out.write("\x1b[S")
+            self.shown = self.shown[w:] + [None for x in range(w)]
+
+    def cls(self):
+        self.cx = 0
+        self.cy = 0
+        self.chars = [" " for x in range(self.SCREEN_SIZE)]
+        self.atts = [self.print_att for x in range(self.SCREEN_SIZE)]
+
+    def newline(self):
+        self.cx = 0
+        if self.cy == self.CHAR_HEIGHT - 1:
+            self.__scroll_up()
+        else:
+            self.cy += 1
+
+    def __toggle_cursor(self, enable):
+        pos = self.cx + (self.cy * self.CHAR_WIDTH)
+        if enable:
+            self.atts[pos] |= 0x80
+        else:
+            self.atts[pos] &= 0x7F
+
+    def print_char(self, ch):
+        ch &= 0x7F
+        if ch >= 32:
+            pos = self.cx + (self.cy * self.CHAR_WIDTH)
+            self.chars[pos] = chr(ch)
+            self.atts[pos] = self.print_att
+            if self.cx == self.CHAR_WIDTH - 1:
+                self.newline()
+            else:
+                self.cx += 1
+        elif ch == 10:
+            self.newline()
+
+    def backspace(self):
+        if self.cx == 0:
+            if self.cy > 0:
+                self.cx = self.CHAR_WIDTH - 1
+                self.cy -= 1
+        else:
+            self.cx -= 1
+        pos = self.cx + (self.cy * self.CHAR_WIDTH)
+        self.chars[pos] = " "
+        self.atts[pos] = self.print_att
+
+    def print_txt(self, txt):
+        for c in txt.encode("ascii", "replace"):
+            self.print_char(c)
+
+    def print(self, txt):
+        txt, self.line_remain = GAC_Layout.of(self).wrap(txt, self.line_remain)
+        self.print_txt(txt)
+        if time.monotonic() - self.last_update >= self.FRAME_TIME:
+            self.update()
+
+    def __read_keys(self, timeout):
+        # Keys typed within timeout seconds, "" if none
+        if platform.system() == "Windows":
+            end = time.monotonic() + timeout
+            while not msvcrt.kbhit():
+                if time.monotonic() >= end:
+                    return ""
+                time.sleep(0.01)
+            keys = ""
+            while msvcrt.kbhit():
+                keys += msvcrt.getwch()
+            return keys
+        rlist, wlist, xlist = select([self.fd], [], [], timeout)
+        if len(rlist) == 0:
+            return ""
+        return os.read(self.fd, 1024).decode("ascii", "ignore")
+
+    def __raw_mode(self):
+        if self.tty and platform.system() != "Windows":
+            mode = termios.tcgetattr(self.fd)
+            tty.setcbreak(self.fd)
+            return mode
+        return None
+
+    def __restore_mode(self, mode):
+        if mode is not None:
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, mode)
+
+    def input(self):
+        self.line_remain = self.width
+        if not self.tty:
+            # Piped input, there is nothing to edit
+            txt = sys.stdin.readline()
+            if txt == "":
+                return "*QUIT"
+            txt = txt.rstrip("\r\n")
+            self.print_txt(txt + "\n")
+            self.update()
+            return txt
+        txt = ""
+        mode = self.__raw_mode()
+        try:
+            self.__toggle_cursor(True)
+            self.update()
+            while True:
+                keys = self.__read_keys(self.FLASH_TIME)
+                if keys == "":
+                    self.flash = not self.flash
+                self.__toggle_cursor(False)
+                for key in keys:
+                    if key in ("\r", "\n"):
+                        self.newline()
+                        self.flash = False
+                        self.update()
+                        return txt
+                    elif key in ("\x7f", "\b"):
+                        if len(txt) > 0:
+                            self.backspace()
+                            txt = txt[:-1]
+                    elif " " <= key <= "~":
+                        self.print_char(ord(key))
+                        txt += key
+                self.__toggle_cursor(True)
+                self.update()
+        finally:
+            self.__restore_mode(mode)
+
+    def replay_input(self, txt):
+        self.line_remain = self.width
+        self.print_txt(txt + "\n")
+
+    def wait_key_or_timeout(self, timeout_frames):
+        self.update()
+        if not self.tty:
+            return False
+        mode = self.__raw_mode()
+        try:
+            return self.__read_keys(timeout_frames / 50) != ""
+        finally:
+            self.__restore_mode(mode)
+
+    def quit(self):
+        self.update()
+
+
+def file_path(string):
+    """_summary_
+
+    Args:
+        string (_type_): _description_
+
+    Raises:
+        FileNotFoundError: _description_
+
+    Returns:
+        _type_: _description_
+    """
+    if os.path.isfile(string):
+        return string
+    else:
+        raise FileNotFoundError(string)
+
+
+if __name__ == "__main__":
+
+    if sys.version_info[0] < 3:  # Python 2
+        sys.exit(_("ERROR: Invalid python version"))
+
+    version = "1.0.0"
+    program = "runGAC" + version
+    exec = "runGAC"
+
+    gettext.bindtextdomain(
+        exec, os.path.join(os.path.abspath(os.path.dirname(__file__)), "locale")
+    )
+    gettext.textdomain(exec)
+    _ = gettext.gettext
+
+    arg_parser = argparse.ArgumentParser(sys.argv[0], description=program)
+    arg_parser.add_argument(
+        "input_path",
+        type=file_path,
+        metavar=_("INPUT_FILE"),
+        help=_("JSON database file"),
+    )
+    arg_parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help=_("seed for the RAND opcode"),
+    )
+
+    try:
+        args = arg_parser.parse_args()
+    except FileNotFoundError as f1:
+        sys.exit(_("ERROR: File not found:") + f"{f1}")
+
+    ddb, error = load_database(args.input_path)
+    if error is not None:
+        sys.exit(f"Invalid Database: {error}")
+
+    io = IoTerminalGAC()
+    ddb = GAC_Interpreter(ddb, io, seed=args.seed)
+    if not ddb.start_adventure(validated=True):
+        sys.exit("Invalid Database")
+    try:
+        ddb.run()
+    finally:
+        io.restore()
@@ -0,0 +1,233 @@
+# MIT License
+#
+# Copyright (c) 2025 Cronomantic
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+# Detector of GAC databases in memory snapshots.
+#
+# Looks for the punctuation table, that UnGAC uses as a magic number, and
+# checks that the table of pointers stored after it makes sense for some
+# mapping of file offsets to Spectrum addresses. Only a few bytes of each
+# file are read, so non-GAC files are rejected quickly.
+
+import sys
+import os
+import argparse
+import gettext
+import json
+import mmap
+import time
+
+from deGAC import (
+    PUNCTUATION_ADDR,
+    NOUNS_ADDR,
+    ADVERBS_ADDR,
+    OBJECTS_ADDR,
+    ROOMS_ADDR,
+    HPCS_ADDR,
+    LCS_ADDR,
+    LPCS_ADDR,
+    MESSAGES_ADDR,
+    GRAPHICS_ADDR,
+    TOKENS_ADDR,
+    STARTROOM_ADDR,
+    VERBS_ADDR,
+    MINRAM,
+    MAXRAM,
+)
+
+PUNC_MAGIC = b"\0 .,-!?:"
+MAX_MATCHES = 16  # Occurrences of the magic checked in each file
+
+# Known containers: file size -> (format, address of the first byte)
+CONTAINERS = {
+    49179: ("sna48", MINRAM - 27),
+    131103: ("sna128", MINRAM - 27),
+    147487: ("sna128", MINRAM - 27),
+    49152: ("raw48", MINRAM),
+    65536: ("raw64", 0),
+}
+
+# Pointers stored after the punctuation table
+POINTERS = {
+    "nouns": NOUNS_ADDR,
+    "adverbs": ADVERBS_ADDR,
+    "objects": OBJECTS_ADDR,
+    "rooms": ROOMS_ADDR,
+    "hpcs": HPCS_ADDR,
+    "lcs": LCS_ADDR,
+    "lpcs": LPCS_ADDR,
+    "messages": MESSAGES_ADDR,
+    "graphics": GRAPHICS_ADDR,
+    "tokens": TOKENS_ADDR,
+}
+
+
+def file_path(string):
+    """_summary_
+
+    Args:
+        string (_type_): _description_
+
+    Raises:
+        FileNotFoundError: _description_
+
+    Returns:
+        _type_: _description_
+    """
+    if os.path.isfile(string):
+        return string
+    else:
+        raise FileNotFoundError(string)
+
+
+def check_layout(buf, offset, base):
+    # Layout of the database whose punctuation table is at offset when the
+    # first byte of buf is at address base, or None if it isn't plausible.
+    size = len(buf)
+    punctuation = offset + base
+    relocation = punctuation - PUNCTUATION_ADDR
+
+    def peek2(addr):
+        pos = addr - base
+        if pos < 0 or pos + 1 >= size:
+            return None
+        return buf[pos] + 256 * buf[pos + 1]
+
+    pointers = {}
+    for name, addr in POINTERS.items():
+        ptr = peek2(addr + relocation)
+        if ptr is None or ptr < MINRAM or ptr > MAXRAM or ptr - base >= size:
+            return None
+        pointers[name] = ptr
+    # Every table lives above the punctuation table
+    if min(pointers.values()) < punctuation:
+        return None
+    # The first token must have a length
+    if buf[pointers["tokens"] - base] == 0:
+        return None
+    start_room = peek2(STARTROOM_ADDR + relocation)
+    if start_room is None or start_room == 0:
+        return None
+    pointers["verbs"] = VERBS_ADDR + relocation
+    return {
+        "magic_offset": offset,
+        "base": base,
+        "punctuation": punctuation,
+        "relocation": relocation,
+        "start_room": start_room,
+        "pointers": pointers,
+    }
+
+
+def scan_image(buf):
+    """Looks for a GAC database in a bytes-like object.
+
+    Returns its layout as a dictionary, or None when there isn't one.
+    """
+    container = CONTAINERS.get(len(buf))
+    offset = buf.find(PUNC_MAGIC)
+    matches = 0
+    while offset >= 0 and matches < MAX_MATCHES:
+        if container:
+            layout = check_layout(buf, offset, container[1])
+            if layout:
+                layout["format"] = container[0]
+                return layout
+        # Unknown container: assume the database is at its usual address
+        layout = check_layout(buf, offset, PUNCTUATION_ADDR - offset)
+        if layout:
+            layout["format"] = container[0] if container else "unknown"
+            return layout
+        matches += 1
+        offset = buf.find(PUNC_MAGIC, offset + 1)
+    return None
+
+
+def scan_file(path):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < len(PUNC_MAGIC):
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return scan_image(mm)
+
+
+def main():
+    if sys.version_info[0] < 3:  # Python 2
+        sys.exit(_("ERROR: Invalid python version"))
+
+    version = "1.0.0"
+    program = "GAC database detector " + version
+    exec = "scanGAC"
+
+    gettext.bindtextdomain(
+        exec, os.path.join(os.path.abspath(os.path.dirname(__file__)), "locale")
+    )
+    gettext.textdomain(exec)
+    _ = gettext.gettext
+
+    arg_parser = argparse.ArgumentParser(sys.argv[0], description=program)
+    arg_parser.add_argument(
+        "input_paths",
+        type=file_path,
+        nargs="+",
+        metavar=_("INPUT_FILE"),
+        help=_("snapshot files"),
+    )
+    arg_parser.add_argument(
+        "--json",
+        action="store_true",
+        help=_("print one JSON object per file"),
+    )
+
+    try:
+        args = arg_parser.parse_args()
+    except FileNotFoundError as f1:
+        sys.exit(_("ERROR: File not found:") + f"{f1}")
+
+    start = time.perf_counter()
+    found = 0
+    for path in args.input_paths:
+        try:
+            layout = scan_file(path)
+        except OSError as e:
+            print(f"{path}: ERROR {e}", file=sys.stderr)
+            continue
+        if layout:
+            found += 1
+        if args.json:
+            print(json.dumps({"path": path, "gac": layout is not None, "layout": layout}))
+        elif layout:
+            print(
+                f"{path}: GAC {layout['format']} punctuation "
+                f"0x{layout['punctuation']:04X} relocation {layout['relocation']:+d}"
+            )
+        else:
+            print(f"{path}: not GAC")
+    elapsed = time.perf_counter() - start
+    print(
+        f"{found}/{len(args.input_paths)} GAC files in {elapsed:.3f}s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
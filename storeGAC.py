@@ -0,0 +1,302 @@
+# MIT License
+#
+# Copyright (c) 2025 Cronomantic
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+# Persistent sessions.
+#
+# The get_state() snapshot of every session is kept in a SQLite database,
+# keyed by a session id. Saving only takes the snapshot; a background thread
+# writes the sessions changed since its last pass in a single transaction.
+
+import sys
+import os
+import argparse
+import gettext
+import hashlib
+import sqlite3
+import threading
+import time
+
+from runGAC import GAC_Interpreter, IoCallbackGAC, load_database
+
+
+class GAC_SessionStore(object):
+    """SQLite store of session states with write-behind."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            game TEXT NOT NULL,
+            state BLOB NOT NULL,
+            updated REAL NOT NULL
+        )
+    """
+
+    def __init__(self, path, flush_interval=0.5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.dirty = {}  # Session id -> (game, state, time), not written yet
+        self.writing = {}  # Sessions of the transaction in progress
+        self.cond = threading.Condition()
+        self.closed = False
+        self.flushing = 0  # Threads waiting in flush()
+        self.error = None
+        # Readers and the writer use their own connections; with WAL they
+        # don't block each other
+        self.db = self.__connect()
+        self.db.execute(self.SCHEMA)
+        self.db.commit()
+        self.db_lock = threading.Lock()
+        self.writer = threading.Thread(target=self.__writer_task, daemon=True)
+        self.writer.start()
+
+    def __connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def __writer_task(self):
+        db = self.__connect()
+        while True:
+            with self.cond:
+                while len(self.dirty) == 0 and not self.closed:
+                    self.cond.wait()
+                # Gather the saves that arrive in the meantime
+                deadline = time.monotonic() + self.flush_interval
+                while not self.closed and self.flushing == 0:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+                batch = self.dirty
+                self.dirty = {}
+                self.writing = batch
+                closed = self.closed
+            if len(batch) > 0:
+                try:
+                    with db:
+                        db.executemany(
+                            "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?)",
+                            [(k,) + v for k, v in batch.items()],
+                        )
+                    self.error = None
+                except sqlite3.Error as e:
+                    self.error = e
+                with self.cond:
+                    if self.error is not None:
+                        # Retried with the next batch, unless saved again
+                        for k, v in batch.items():
+                            self.dirty.setdefault(k, v)
+                    self.writing = {}
+                    self.cond.notify_all()
+            if closed:
+                break
+        db.close()
+
+    def save(self, session_id, game, state):
+        # Doesn't wait for the disk
+        with self.cond:
+            if len(self.dirty) == 0:
+                self.cond.notify_all()  # The writer only waits for the first
+            self.dirty[session_id] = (game, state, time.time())
+
+    def load(self, session_id, game=None):
+        """State of a session, or None if it isn't stored or belongs to
+        another game."""
+        with self.cond:
+            entry = self.dirty.get(session_id) or self.writing.get(session_id)
+        if entry is None:
+            with self.db_lock:
+                entry = self.db.execute(
+                    "SELECT game, state, updated FROM sessions WHERE id = ?",
+                    (session_id,),
+                ).fetchone()
+        if entry is None or (game is not None and entry[0] != game):
+            return None
+        return bytes(entry[1])
+
+    def delete(self, session_id):
+        self.flush()
+        with self.db_lock:
+            with self.db:
+                self.db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def sessions(self):
+        # (id, game, updated) of the stored sessions, most recent first
+        self.flush()
+        with self.db_lock:
+            return self.db.execute(
+                "SELECT id, game, updated FROM sessions ORDER BY updated DESC"
+            ).fetchall()
+
+    def flush(self):
+        # Waits until every session saved so far is on disk
+        with self.cond:
+            self.flushing += 1  # The writer doesn't wait for more saves
+            self.cond.notify_all()
+            try:
+                while len(self.dirty) + len(self.writing) > 0:
+                    if not self.writer.is_alive():
+                        break
+                    if self.error is not None:
+                        raise self.error
+                    self.cond.wait(self.flush_interval)
+            finally:
+                self.flushing -= 1
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.writer.join()
+        self.db.close()
+        if self.error is not None:
+            raise self.error
+
+
+class IoSessionGAC(IoCallbackGAC):
+    """Terminal IO that saves the session every time it asks for a
+    command."""
+
+    def __init__(self, width, store, session_id, game):
+        super().__init__(width)
+        self.store = store
+        self.session_id = session_id
+        self.game = game
+        self.interpreter = None
+
+    def input(self):
+        if self.interpreter and self.interpreter.prompting:
+            self.store.save(self.session_id, self.game, self.interpreter.get_state())
+        return super().input()
+
+
+def game_id(path):
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def file_path(string):
+    """_summary_
+
+    Args:
+        string (_type_): _description_
+
+    Raises:
+        FileNotFoundError: _description_
+
+    Returns:
+        _type_: _description_
+    """
+    if os.path.isfile(string):
+        return string
+    else:
+        raise FileNotFoundError(string)
+
+
+def main():
+    if sys.version_info[0] < 3:  # Python 2
+        sys.exit(_("ERROR: Invalid python version"))
+
+    version = "1.0.0"
+    program = "GAC persistent sessions " + version
+    exec = "storeGAC"
+
+    gettext.bindtextdomain(
+        exec, os.path.join(os.path.abspath(os.path.dirname(__file__)), "locale")
+    )
+    gettext.textdomain(exec)
+    _ = gettext.gettext
+
+    arg_parser = argparse.ArgumentParser(sys.argv[0], description=program)
+    arg_parser.add_argument(
+        "input_path",
+        type=file_path,
+        metavar=_("INPUT_FILE"),
+        help=_("JSON database file"),
+    )
+    arg_parser.add_argument(
+        "store_path",
+        metavar=_("STORE_FILE"),
+        help=_("SQLite file with the sessions"),
+    )
+    arg_parser.add_argument(
+        "-s",
+        "--session",
+        default="default",
+        help=_("id of the session to play or resume"),
+    )
+    arg_parser.add_argument(
+        "--restart",
+        action="store_true",
+        help=_("forget the stored state of the session"),
+    )
+    arg_parser.add_argument(
+        "--list",
+        action="store_true",
+        help=_("list the stored sessions"),
+    )
+
+    try:
+        args = arg_parser.parse_args()
+    except FileNotFoundError as f1:
+        sys.exit(_("ERROR: File not found:") + f"{f1}")
+
+    store = GAC_SessionStore(args.store_path)
+    try:
+        if args.list:
+            for session_id, game, updated in store.sessions():
+                print(f"{session_id} {game} {time.ctime(updated)}")
+            return
+
+        ddb, error = load_database(args.input_path)
+        if error is not None:
+            sys.exit(f"Invalid Database: {error}")
+        game = game_id(args.input_path)
+
+        io = IoSessionGAC(32, store, args.session, game)
+        interpreter = GAC_Interpreter(ddb, io)
+        io.interpreter = interpreter
+        if not interpreter.start_adventure(validated=True):
+            sys.exit("Invalid Database")
+
+        if args.restart:
+            store.delete(args.session)
+        state = store.load(args.session, game)
+        if state is not None:
+            try:
+                interpreter.set_state(state)
+            except ValueError:
+                # Saved by an older version with another layout
+                state = None
+        if state is not None:
+            # States are saved at the command prompt, where run() resumes
+            interpreter.run(resume=True)
+        else:
+            interpreter.run()
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
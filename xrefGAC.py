@@ -0,0 +1,320 @@
+# MIT License
+#
+# Copyright (c) 2025 Cronomantic
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+
+# Cross-reference of the condition programs.
+#
+# Tells which instructions of the high priority, low priority and local
+# conditions read or write each flag, counter, object, message, room, verb,
+# noun and adverb. The ids are the PUSH operands that reach each opcode; the
+# stack is followed symbolically, so operands computed at run time (such as
+# NO1 or CTR results) are counted apart as dynamic references.
+#
+# The index is saved next to the database (path + ".xref") and reused while
+# the file doesn't change.
+
+import sys
+import os
+import argparse
+import gettext
+import hashlib
+import json
+
+from runGAC import load_database
+
+XREF_VERSION = 1
+
+KINDS = ("flag", "counter", "object", "message", "room", "verb", "noun", "adverb")
+
+# opcode -> (values popped, values pushed, references). Each reference is
+# (stack position, kind, access), position 0 being the top of the stack.
+OPCODES = {
+    "OP0": (0, 0, ()),
+    "AND": (2, 1, ()),
+    "OR": (2, 1, ()),
+    "XOR": (2, 1, ()),
+    "NOT": (1, 1, ()),
+    "HOLD": (1, 0, ()),
+    "GET": (1, 0, ((0, "object", "write"),)),
+    "DROP": (1, 0, ((0, "object", "write"),)),
+    "SWAP": (2, 0, ((0, "object", "write"), (1, "object", "write"))),
+    "TO": (2, 0, ((0, "room", "read"), (1, "object", "write"))),
+    "OBJ": (1, 0, ((0, "object", "read"),)),
+    "SET": (1, 0, ((0, "flag", "write"),)),
+    "RESE": (1, 0, ((0, "flag", "write"),)),
+    "SET?": (1, 1, ((0, "flag", "read"),)),
+    "RES?": (1, 1, ((0, "flag", "read"),)),
+    "CSET": (2, 0, ((0, "counter", "write"),)),
+    "CTR": (1, 1, ((0, "counter", "read"),)),
+    "INCR": (1, 0, ((0, "counter", "write"),)),
+    "DECR": (1, 0, ((0, "counter", "write"),)),
+    "EQU?": (2, 1, ((0, "counter", "read"),)),
+    "DESC": (1, 0, ((0, "room", "read"),)),
+    "LOOK": (0, 0, ()),
+    "MESS": (1, 0, ((0, "message", "read"),)),
+    "PRIN": (1, 0, ()),
+    "RAND": (1, 1, ()),
+    "<": (2, 1, ()),
+    ">": (2, 1, ()),
+    "=": (2, 1, ()),
+    "HERE": (1, 1, ((0, "object", "read"),)),
+    "CARR": (1, 1, ((0, "object", "read"),)),
+    "AVAIL": (1, 1, ((0, "object", "read"),)),
+    "+": (2, 1, ()),
+    "-": (2, 1, ()),
+    "TURN": (0, 1, ()),
+    "AT": (1, 1, ((0, "room", "read"),)),
+    "OP28": (0, 0, ()),
+    "OP29": (0, 0, ()),
+    "OKAY": (0, 0, ()),
+    "WAIT": (0, 0, ()),
+    "QUIT": (0, 0, ()),
+    "EXIT": (0, 0, ()),
+    "ROOM": (0, 1, ()),
+    "NOUN": (1, 1, ((0, "noun", "read"),)),
+    "VERB": (1, 1, ((0, "verb", "read"),)),
+    "ADVE": (1, 1, ((0, "adverb", "read"),)),
+    "GOTO": (1, 0, ((0, "room", "write"),)),
+    "NO1": (0, 1, ()),
+    "NO2": (0, 1, ()),
+    "VBNO": (0, 1, ()),
+    "LIST": (1, 0, ((0, "room", "read"),)),
+    "CONN": (1, 1, ((0, "verb", "read"),)),
+    "WEIG": (1, 1, ((0, "object", "read"),)),
+    "WITH": (0, 1, ()),
+    "STRE": (1, 0, ()),
+    "LF": (0, 0, ()),
+    "IF": (1, 0, ()),
+    "PICT": (0, 0, ()),
+    "TEXT": (0, 0, ()),
+    "SAVE": (0, 0, ()),
+    "LOAD": (0, 0, ()),
+}
+
+
+def condition_blocks(ddb):
+    # (name, instructions) of every condition program
+    yield "hpcs", ddb["hpcs"]
+    yield "lpcs", ddb["lpcs"]
+    for k, v in sorted(ddb["lcs"].items(), key=lambda x: int(x[0])):
+        yield f"lcs/{k}", v
+
+
+class GAC_XrefIndex(object):
+    """References of every id in the condition programs.
+
+    refs[kind][id] is a list of (block, offset, opcode, access), with
+    block "hpcs", "lpcs" or "lcs/<room>" and offset the position of the
+    opcode in it. dynamic[kind] holds the references whose id is only
+    known at run time.
+    """
+
+    def __init__(self, refs, dynamic):
+        self.refs = refs
+        self.dynamic = dynamic
+
+    @classmethod
+    def from_database(cls, ddb):
+        refs = {k: {} for k in KINDS}
+        dynamic = {k: [] for k in KINDS}
+        for block, code in condition_blocks(ddb):
+            # Known values of the stack, None for computed ones
+            stack = []
+            for offset, instruction in enumerate(code):
+                cmd = instruction[0]
+                if cmd == "PUSH":
+                    stack.append(instruction[1])
+                    continue
+                if cmd == "END":
+                    stack = []
+                    continue
+                pops, pushes, operands = OPCODES.get(cmd, (0, 0, ()))
+                for pos, kind, access in operands:
+                    value = stack[-1 - pos] if pos < len(stack) else None
+                    ref = (block, offset, cmd, access)
+                    if value is None:
+                        dynamic[kind].append(ref)
+                    else:
+                        refs[kind].setdefault(value, []).append(ref)
+                if pops > 0:
+                    del stack[-pops:]
+                stack.extend(None for x in range(pushes))
+        return cls(refs, dynamic)
+
+    def query(self, kind, id=None, access=None):
+        """References to an id of a kind, or to any of them if id is None,
+        as (id, block, offset, opcode, access); id is None for the dynamic
+        ones. access filters "read" or "write"."""
+        if id is None:
+            refs = self.refs[kind]
+            found = [(k,) + x for k in sorted(refs) for x in refs[k]]
+            found += [(None,) + x for x in self.dynamic[kind]]
+        else:
+            found = [(id,) + x for x in self.refs[kind].get(id, [])]
+        return [x for x in found if access is None or x[4] == access]
+
+    def to_json(self):
+        return {
+            "refs": {
+                k: {str(i): r for i, r in v.items()} for k, v in self.refs.items()
+            },
+            "dynamic": self.dynamic,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        refs = {
+            k: {int(i): [tuple(x) for x in r] for i, r in v.items()}
+            for k, v in data["refs"].items()
+        }
+        dynamic = {k: [tuple(x) for x in v] for k, v in data["dynamic"].items()}
+        return cls(refs, dynamic)
+
+
+def load_index(path, cache=True):
+    """Index of a database file and its error, as load_database().
+
+    The index is kept in path + ".xref" along with the hash of the file it
+    was built from, so it is only rebuilt when the database changes.
+    """
+    with open(path, "rb") as f:
+        digest = f"{XREF_VERSION}:{hashlib.blake2b(f.read()).hexdigest()}"
+    cache_path = path + ".xref"
+    if cache:
+        try:
+            with open(cache_path) as f:
+                data = json.load(f)
+            if data.get("digest") == digest:
+                return GAC_XrefIndex.from_json(data), None
+        except (OSError, ValueError, KeyError):
+            pass
+    ddb, error = load_database(path)
+    if error is not None:
+        return None, error
+    index = GAC_XrefIndex.from_database(ddb)
+    if cache:
+        try:
+            with open(cache_path, "w") as f:
+                json.dump(dict(index.to_json(), digest=digest), f)
+        except OSError:
+            pass
+    return index, None
+
+
+def file_path(string):
+    """_summary_
+
+    Args:
+        string (_type_): _description_
+
+    Raises:
+        FileNotFoundError: _description_
+
+    Returns:
+        _type_: _description_
+    """
+    if os.path.isfile(string):
+        return string
+    else:
+        raise FileNotFoundError(string)
+
+
+def main():
+    if sys.version_info[0] < 3:  # Python 2
+        sys.exit(_("ERROR: Invalid python version"))
+
+    version = "1.0.0"
+    program = "GAC cross-reference " + version
+    exec = "xrefGAC"
+
+    gettext.bindtextdomain(
+        exec, os.path.join(os.path.abspath(os.path.dirname(__file__)), "locale")
+    )
+    gettext.textdomain(exec)
+    _ = gettext.gettext
+
+    arg_parser = argparse.ArgumentParser(sys.argv[0], description=program)
+    arg_parser.add_argument(
+        "input_path",
+        type=file_path,
+        metavar=_("INPUT_FILE"),
+        help=_("JSON database file"),
+    )
+    arg_parser.add_argument(
+        "kind",
+        nargs="?",
+        choices=KINDS,
+        help=_("kind of id to look up"),
+    )
+    arg_parser.add_argument(
+        "id",
+        nargs="?",
+        type=int,
+        help=_("id to look up, all of the kind if missing"),
+    )
+    access_group = arg_parser.add_mutually_exclusive_group()
+    access_group.add_argument(
+        "--reads",
+        action="store_const",
+        const="read",
+        dest="access",
+        help=_("only the instructions that read the id"),
+    )
+    access_group.add_argument(
+        "--writes",
+        action="store_const",
+        const="write",
+        dest="access",
+        help=_("only the instructions that write the id"),
+    )
+    arg_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=_("rebuild the index without reading or writing the cache file"),
+    )
+
+    try:
+        args = arg_parser.parse_args()
+    except FileNotFoundError as f1:
+        sys.exit(_("ERROR: File not found:") + f"{f1}")
+
+    index, error = load_index(args.input_path, cache=not args.no_cache)
+    if error is not None:
+        sys.exit(f"Invalid Database: {error}")
+
+    if args.kind is None:
+        for kind in KINDS:
+            refs = index.refs[kind]
+            print(
+                f"{kind:8} {len(refs):4d} ids "
+                f"{sum(len(x) for x in refs.values()):6d} references "
+                f"{len(index.dynamic[kind]):5d} dynamic"
+            )
+        return
+
+    for id, block, offset, cmd, access in index.query(args.kind, args.id, args.access):
+        id = "?" if id is None else id
+        print(f"{args.kind} {id:>3} {access:5} {block}:{offset} {cmd}")
+
+
+if __name__ == "__main__":
+    main()